@@ -0,0 +1,267 @@
+"""
+Analysis Result Cache
+
+Cache hasil /api/analyze berdasarkan hash isi audio + parameter analisis:
+- Tier 1: in-process LRU (OrderedDict)
+- Tier 2 (opsional): JSON files di disk dengan TTL dan batas ukuran total
+Hit = PitchDetector dan VocalAnalyzer dilewati sepenuhnya.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional
+
+
+def _json_default(obj):
+    """Convert numpy scalars/arrays for json.dump"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+
+class AnalysisCache:
+    def __init__(
+        self,
+        max_entries: int = 256,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 100 * 1024 * 1024,
+        ttl_seconds: float = 7 * 24 * 3600
+    ):
+        """
+        Initialize AnalysisCache
+
+        Args:
+            max_entries: Max entries in the in-memory LRU tier
+            disk_dir: Directory for the on-disk tier (None = memory only)
+            disk_max_bytes: Total size budget of the disk tier
+            ttl_seconds: Time-to-live for both tiers
+        """
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'evictions': 0
+        }
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        print("✅ AnalysisCache initialized")
+        print(f"   - Memory entries: {max_entries}")
+        print(f"   - Disk tier: {disk_dir or 'disabled'}")
+
+    # ===== KEYS =====
+
+    @staticmethod
+    def make_key(stream: BinaryIO, **params) -> str:
+        """
+        Build cache key from audio bytes + analysis parameters
+
+        Args:
+            stream: Binary file object (rewound to 0 afterwards)
+            **params: Analysis parameters (engine, sample_rate, ...)
+
+        Returns:
+            Hex digest
+        """
+        hasher = hashlib.sha256()
+
+        stream.seek(0)
+        for block in iter(lambda: stream.read(1024 * 1024), b''):
+            hasher.update(block)
+        stream.seek(0)
+
+        hasher.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+        return hasher.hexdigest()
+
+    # ===== LOOKUP =====
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return cached value (deep copy) or None"""
+        return self._get(key, count=True)
+
+    def peek(self, key: str) -> Optional[Dict]:
+        """get() without touching the hit/miss counters (re-checks of a key already counted)"""
+        return self._get(key, count=False)
+
+    def _get(self, key: str, count: bool) -> Optional[Dict]:
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    if count:
+                        self._stats['hits'] += 1
+                        self._stats['memory_hits'] += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+        value = self._disk_get(key, now)
+
+        with self._lock:
+            if value is None:
+                if count:
+                    self._stats['misses'] += 1
+                return None
+
+            if count:
+                self._stats['hits'] += 1
+                self._stats['disk_hits'] += 1
+            self._memory_set(key, value, now)
+
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict):
+        """Store value in both tiers"""
+        now = time.time()
+
+        with self._lock:
+            self._memory_set(key, copy.deepcopy(value), now)
+
+        self._disk_set(key, value)
+
+    def _memory_set(self, key: str, value: Dict, stored_at: float):
+        """Insert into LRU tier (caller holds the lock)"""
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    # ===== DISK TIER =====
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict]:
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            if now - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+
+            # Access time for LRU eviction on disk
+            os.utime(path, (now, os.path.getmtime(path)))
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _disk_set(self, key: str, value: Dict):
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f, default=_json_default)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ AnalysisCache: failed to write {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self._disk_evict()
+
+    def _disk_evict(self):
+        """Drop expired files, then least recently used files until under budget"""
+        now = time.time()
+        entries = []
+        total = 0
+
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+
+            if now - st.st_mtime > self.ttl_seconds:
+                self._remove(path)
+                continue
+
+            entries.append((st.st_atime, st.st_size, path))
+            total += st.st_size
+
+        if total <= self.disk_max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            with self._lock:
+                self._stats['evictions'] += 1
+        except OSError:
+            pass
+
+    # ===== STATS =====
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+
+        if self.disk_dir:
+            sizes = []
+            for name in os.listdir(self.disk_dir):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    sizes.append(os.path.getsize(os.path.join(self.disk_dir, name)))
+                except OSError:
+                    continue
+            stats['disk_entries'] = len(sizes)
+            stats['disk_bytes'] = sum(sizes)
+
+        return stats
+
+    def clear(self):
+        """Drop all entries (both tiers)"""
+        with self._lock:
+            self._memory.clear()
+
+        if self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith('.json'):
+                    self._remove(os.path.join(self.disk_dir, name))
@@ -3,19 +3,38 @@ VocaKey Backend - Pitch Detection & Vocal Analysis API
 Menggunakan algoritma konvensional (pYIN) untuk deteksi pitch dari humming
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 import os
+import copy
+import json
+import time
 from werkzeug.utils import secure_filename
 import traceback
-import sqlite3  # ✅ ADD THIS
 
 
 from pitch_detector import PitchDetector
+from pitch_engines import PITCH_ENGINES
 from vocal_analyzer import VocalAnalyzer
-from database_manager import DatabaseManager, db_manager  # ✅ Keep this
+from database_manager import DatabaseManager  # ✅ Keep this
 from song_recommender_sqlite import SongRecommenderSQLite
+from streaming_pitch import StreamingPitchTracker
+from audio_io import decode_audio_stream
+from analysis_cache import AnalysisCache
+from melody_search import MelodyIndex, melody_from_track
+from transpose_cache import TransposeCache
+from transpose_jobs import TransposeJobQueue
+from single_flight import SingleFlight
+import note_table
 
+# ✅ Optional: WebSocket support for live pitch streaming
+try:
+    from flask_sock import Sock
+    FLASK_SOCK_AVAILABLE = True
+except ImportError:
+    FLASK_SOCK_AVAILABLE = False
+    print("⚠️  flask-sock not installed. /api/analyze/stream disabled.")
+    print("   For live streaming: pip install flask-sock")
 
 # ✅ Add project bin folder to PATH for rubberband.exe
 project_root = os.path.dirname(os.path.abspath(__file__))
@@ -40,6 +59,28 @@ UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'mp3', 'wav', 'm4a', 'ogg', 'flac', 'aac', 'webm'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
+STREAM_MAX_DURATION = 60  # seconds of audio per streaming session
+STREAM_SAMPLE_RATES = (8000, 96000)  # accepted client sample rate range (Hz)
+
+# Analysis result cache (disk tier aktif jika ANALYSIS_CACHE_DIR di-set)
+ANALYSIS_CACHE_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_ENTRIES', 256))
+ANALYSIS_CACHE_DIR = os.environ.get('ANALYSIS_CACHE_DIR')
+ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get('ANALYSIS_CACHE_MAX_BYTES', 100 * 1024 * 1024))
+ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', 7 * 24 * 3600))
+
+# Transposed audio cache (shared by all transpose endpoints, served from /songs/transposed)
+TRANSPOSE_CACHE_DIR = os.environ.get('TRANSPOSE_CACHE_DIR', 'songs/transposed')
+TRANSPOSE_CACHE_MAX_BYTES = int(os.environ.get('TRANSPOSE_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+TRANSPOSE_CACHE_POLICY = os.environ.get('TRANSPOSE_CACHE_POLICY', 'lru')
+
+# Song transposition runs in worker processes (jobs persisted in their own SQLite file)
+TRANSPOSE_JOBS_DB = os.environ.get('TRANSPOSE_JOBS_DB', 'transpose_jobs.db')
+TRANSPOSE_WORKERS = int(os.environ.get('TRANSPOSE_WORKERS', 2))
+# Processes per job rendering (> 1 = split one song over several cores, 0 = serial);
+# only transpose_worker.py processes start render pools, never the app process
+TRANSPOSE_PARALLEL_WORKERS = int(os.environ.get('TRANSPOSE_PARALLEL_WORKERS', 0))
+JOB_EVENTS_TIMEOUT = 600  # seconds an SSE progress stream stays open
+
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
@@ -49,10 +90,32 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 pitch_detector = PitchDetector()
 vocal_analyzer = VocalAnalyzer()
 song_recommender = SongRecommenderSQLite()
+melody_index = MelodyIndex()
+analysis_cache = AnalysisCache(
+    max_entries=ANALYSIS_CACHE_ENTRIES,
+    disk_dir=ANALYSIS_CACHE_DIR,
+    disk_max_bytes=ANALYSIS_CACHE_MAX_BYTES,
+    ttl_seconds=ANALYSIS_CACHE_TTL
+)
+# Concurrent identical uploads share one analysis (across processes via ANALYSIS_CACHE_DIR locks)
+analysis_flights = SingleFlight(lock_dir=ANALYSIS_CACHE_DIR)
+transpose_cache = TransposeCache(
+    cache_dir=TRANSPOSE_CACHE_DIR,
+    max_bytes=TRANSPOSE_CACHE_MAX_BYTES,
+    policy=TRANSPOSE_CACHE_POLICY
+)
+transpose_jobs = TransposeJobQueue(
+    db_path=TRANSPOSE_JOBS_DB,
+    cache_dir=transpose_cache.cache_dir,
+    workers=TRANSPOSE_WORKERS,
+    render_workers=TRANSPOSE_PARALLEL_WORKERS
+)
+transpose_jobs.resume()
 
 print("✅ PitchDetector initialized")
 print("✅ VocalAnalyzer initialized")
 print("✅ SongRecommenderSQLite initialized")
+print("✅ MelodyIndex initialized")
 
 # ===== HELPER FUNCTIONS =====
 
@@ -67,6 +130,43 @@ def cleanup_file(filepath):
     except Exception as e:
         print(f"⚠️ Failed to cleanup {filepath}: {e}")
 
+def job_payload(job):
+    """Public view of a transpose job (the first read of a finished job registers it in the cache)"""
+    payload = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': round(job['progress'], 3),
+        'semitone_shift': job['semitone_shift'],
+        'attempts': job['attempts'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'status_url': f"/api/jobs/{job['id']}",
+        'events_url': f"/api/jobs/{job['id']}/events"
+    }
+    payload.update(job['context'] or {})
+    
+    if job['status'] == 'done' and job['result']:
+        result = job['result']
+        # Once per job: adopt() merges into the shared manifest, later status reads / SSE ticks must not
+        if not job['adopted'] and transpose_jobs.mark_adopted(job['id']):
+            # key / engine of the file actually written (differs from the job's after an engine fallback)
+            transpose_cache.adopt(
+                result.get('key', job['cache_key']), job['output_format'], result.get('info'),
+                source_hash=job['source_hash'], semitone_shift=job['semitone_shift'],
+                engine=result.get('engine', job['engine']), quality=job['quality']
+            )
+        payload.update({
+            'transposed_url': f"/songs/transposed/{result['file']}",
+            'file_size_mb': round(result['size'] / (1024 * 1024), 2),
+            'method': (result.get('info') or {}).get('method')
+        })
+    elif job['status'] == 'failed':
+        payload['error'] = job['error']
+    
+    return payload
+
 # ===== ROUTES =====
 
 @app.route('/api/health', methods=['GET'])
@@ -84,14 +184,94 @@ def test_endpoint():
         'endpoints': {
             'health': '/api/health',
             'analyze': '/api/analyze (POST)',
+            'analyze_stream': '/api/analyze/stream (WebSocket)',
+            'cache_stats': '/api/cache/stats',
+            'songs_in_range': '/api/songs/in-range?min=C3&max=G4&max_shift=2',
+            'identify': '/api/identify (POST)',
+            'search': '/api/songs/search?q=shape of',
+            'autocomplete': '/api/songs/autocomplete?q=sha',
+            'job_status': '/api/jobs/<job_id>',
+            'job_events': '/api/jobs/<job_id>/events (SSE)',
+            'transpose_stream': '/api/songs/<id>/transpose/stream?semitone_shift=-2 (chunked WAV)',
             'test': '/api/test'
         }
     }), 200
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters of the analysis result and transposed audio caches"""
+    return jsonify({
+        'success': True,
+        'analysis_cache': analysis_cache.stats(),
+        'analysis_single_flight': analysis_flights.stats(),
+        'transpose_cache': transpose_cache.stats()
+    }), 200
+
+def _run_analysis(cache_key, stream, filename, engine):
+    """
+    Decode + pitch detection + vocal analysis for one upload (single-flight leader)
+
+    Returns:
+        {'pitch_metadata', 'vocal_analysis'} (also stored in analysis_cache)
+        or {'error': message}
+    """
+    # Another request / process may have finished it while we waited for the lock
+    # (peek: /api/analyze already counted this lookup)
+    cached = analysis_cache.peek(cache_key)
+    if cached is not None:
+        print(f"[DEBUG] Analysis cache hit after wait: {cache_key[:12]}")
+        return cached
+
+    # ===== DECODE AUDIO (in memory, no uploads/ round-trip) =====
+    try:
+        y, sr = decode_audio_stream(
+            stream,
+            sample_rate=pitch_detector.sample_rate,
+            extension=filename.rsplit('.', 1)[1].lower()
+        )
+    except Exception as e:
+        print(f"[ERROR] Failed to decode audio: {str(e)}")
+        return {'error': f'Failed to load audio file: {str(e)}'}
+
+    print(f"[DEBUG] Decoded in memory: {len(y)} samples at {sr} Hz")
+
+    # ===== STEP 1: PITCH DETECTION =====
+    print(f"\n[1/4] Detecting pitch from: {filename}")
+    pitch_data = pitch_detector.detect_pitch_array(y, sr, engine=engine)
+
+    print(f"[DEBUG] Pitch detection result:")
+    print(f"  - success: {pitch_data.get('success')}")
+    print(f"  - keys: {list(pitch_data.keys())}")
+
+    if not pitch_data['success']:
+        error_msg = pitch_data.get('error', 'Pitch detection failed')
+        print(f"[ERROR] Pitch detection failed: {error_msg}")
+        return {'error': error_msg}
+
+    # ===== STEP 2: VOCAL ANALYSIS =====
+    print(f"\n[2/4] Analyzing vocal characteristics...")
+    print(f"[DEBUG] Calling vocal_analyzer.analyze()...")
+
+    try:
+        vocal_analysis = vocal_analyzer.analyze(pitch_data)
+        print(f"[DEBUG] Vocal analysis complete")
+        print(f"  - type: {type(vocal_analysis)}")
+        print(f"  - keys: {list(vocal_analysis.keys()) if isinstance(vocal_analysis, dict) else 'NOT A DICT'}")
+    except Exception as e:
+        print(f"[ERROR] Vocal analysis failed: {str(e)}")
+        print(traceback.format_exc())
+        return {'error': f'Vocal analysis failed: {str(e)}'}
+
+    result = {
+        'pitch_metadata': pitch_data.get('metadata', {}),
+        'vocal_analysis': vocal_analysis
+    }
+    analysis_cache.set(cache_key, result)
+    return result
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_vocal():
     audio_file = None
-    filepath = None
     
     try:
         # ===== STEP 0: VALIDATE REQUEST =====
@@ -117,7 +297,6 @@ def analyze_vocal():
             }), 400
         
         filename = secure_filename(audio_file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         
         if not allowed_file(filename):
             print(f"[ERROR] Invalid file type: {filename}")
@@ -126,53 +305,59 @@ def analyze_vocal():
                 'error': 'Invalid file type'
             }), 400
         
-        audio_file.save(filepath)
-        print(f"[DEBUG] File saved to: {filepath}")
-        
         # Get optional parameters
         get_recommendations = request.form.get('get_recommendations', 'true').lower() == 'true'
         max_recommendations = int(request.form.get('max_recommendations', 10))
+        engine = request.form.get('engine', pitch_detector.engine.name)
         
-        print(f"[DEBUG] Parameters:")
-        print(f"  - get_recommendations: {get_recommendations}")
-        print(f"  - max_recommendations: {max_recommendations}")
-        
-        # ===== STEP 1: PITCH DETECTION =====
-        print(f"\n[1/4] Detecting pitch from: {filename}")
-        pitch_data = pitch_detector.detect_pitch(filepath)
-        
-        print(f"[DEBUG] Pitch detection result:")
-        print(f"  - success: {pitch_data.get('success')}")
-        print(f"  - keys: {list(pitch_data.keys())}")
-        
-        if not pitch_data['success']:
-            error_msg = pitch_data.get('error', 'Pitch detection failed')
-            print(f"[ERROR] Pitch detection failed: {error_msg}")
-            cleanup_file(filepath)
+        if engine not in PITCH_ENGINES:
+            print(f"[ERROR] Unknown pitch engine: {engine}")
             return jsonify({
                 'success': False,
-                'error': error_msg
+                'error': f'Unknown engine: {engine}. Available: {", ".join(PITCH_ENGINES)}'
             }), 400
         
-        # ===== STEP 2: VOCAL ANALYSIS =====
-        print(f"\n[2/4] Analyzing vocal characteristics...")
-        print(f"[DEBUG] Calling vocal_analyzer.analyze()...")
+        print(f"[DEBUG] Parameters:")
+        print(f"  - get_recommendations: {get_recommendations}")
+        print(f"  - max_recommendations: {max_recommendations}")
+        print(f"  - engine: {engine}")
+        
+        # ===== CACHE LOOKUP (audio bytes + analysis params) =====
+        cache_key = analysis_cache.make_key(
+            audio_file.stream,
+            engine=engine,
+            sample_rate=pitch_detector.sample_rate,
+            fmin=pitch_detector.fmin,
+            fmax=pitch_detector.fmax,
+            frame_length=pitch_detector.frame_length,
+            use_vad=pitch_detector.use_vad,
+            adaptive_range=pitch_detector.adaptive_range
+        )
+        cached = analysis_cache.get(cache_key)
+        # Results from the single-flight below are fresh computations, not hits
+        cache_hit = cached is not None
+        
+        if cached is None:
+            # Identical uploads arriving together are decoded + analyzed once
+            cached, shared = analysis_flights.do(
+                cache_key,
+                lambda: _run_analysis(cache_key, audio_file.stream, filename, engine)
+            )
+            if shared:
+                print(f"[DEBUG] Joined in-flight analysis: {cache_key[:12]}")
+                cached = copy.deepcopy(cached)
+        else:
+            print(f"[DEBUG] Analysis cache hit: {cache_key[:12]}")
         
-        try:
-            vocal_analysis = vocal_analyzer.analyze(pitch_data)
-            print(f"[DEBUG] Vocal analysis complete")
-            print(f"  - type: {type(vocal_analysis)}")
-            print(f"  - keys: {list(vocal_analysis.keys()) if isinstance(vocal_analysis, dict) else 'NOT A DICT'}")
-        except Exception as e:
-            print(f"[ERROR] Vocal analysis failed: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            cleanup_file(filepath)
+        if 'error' in cached:
             return jsonify({
                 'success': False,
-                'error': f'Vocal analysis failed: {str(e)}'
+                'error': cached['error']
             }), 400
         
+        pitch_metadata = cached['pitch_metadata']
+        vocal_analysis = cached['vocal_analysis']
+        
         # ===== STEP 3: SONG RECOMMENDATION =====
         recommended_songs = []
         if get_recommendations:
@@ -194,9 +379,6 @@ def analyze_vocal():
         
         print(f"\n[4/4] Analysis complete! Found {len(recommended_songs)} recommendations")
         
-        # Cleanup uploaded file
-        cleanup_file(filepath)
-        
         # ===== STEP 4: BUILD RESPONSE =====
         print("\n[DEBUG] Building response...")
         
@@ -264,15 +446,19 @@ def analyze_vocal():
                     'title': song.get('title', 'Unknown'),
                     'artist': song.get('artist', 'Unknown'),
                     'original_note': song.get('key_note', 'Unknown'),
+                    'recommended_shift': song.get('recommended_shift', 0),
+                    'recommended_note': song.get('recommended_key', song.get('key_note', 'Unknown')),
                     'match_score': song.get('compatibility_score', {}).get('total', 0) 
                         if isinstance(song.get('compatibility_score'), dict) else 0
                 }
                 for song in recommended_songs
             ],
             'metadata': {
-                'audio_duration': pitch_data.get('metadata', {}).get('duration', 0),
-                'sample_rate': pitch_data.get('metadata', {}).get('sample_rate', 0),
-                'algorithm': 'pYIN',
+                'audio_duration': pitch_metadata.get('duration', 0),
+                'sample_rate': pitch_metadata.get('sample_rate', 0),
+                'algorithm': pitch_metadata.get('algorithm', 'pYIN'),
+                'engine': engine,
+                'cached': cache_hit,
                 'num_samples': statistics.get('num_samples', 0) if isinstance(statistics, dict) else 0
             }
         }
@@ -283,10 +469,6 @@ def analyze_vocal():
         return jsonify(response_data), 200
     
     except Exception as e:
-        # Cleanup on error
-        if filepath and os.path.exists(filepath):
-            cleanup_file(filepath)
-        
         # Print detailed error
         print("\n" + "=" * 60)
         print("❌ UNHANDLED EXCEPTION")
@@ -305,6 +487,138 @@ def analyze_vocal():
 
 
 
+# ===== ENDPOINT: LIVE PITCH STREAMING (WebSocket) =====
+
+if FLASK_SOCK_AVAILABLE:
+    sock = Sock(app)
+
+    @sock.route('/api/analyze/stream')
+    def analyze_stream(ws):
+        """
+        Live pitch tracking over WebSocket
+
+        Client -> Server:
+            - Text (optional, first): {"type": "start", "sample_rate": 16000, "format": "float32"}
+            - Binary: mono PCM chunks (float32 or int16, little-endian)
+            - Text: {"type": "end"} to flush and get the final result
+
+        Server -> Client:
+            - {"type": "ready", "sample_rate": 16000, "format": "float32", "hop_length": 512}
+            - {"type": "pitch", "frames": [{"time", "pitch", "voiced", "prob"}], "analysis": {...}}
+            - {"type": "final", "frames": [...], "analysis": {...}, "metadata": {...}}
+            - {"type": "error", "error": "..."}
+        """
+        sample_rate = pitch_detector.sample_rate
+        sample_format = 'float32'
+        tracker = None
+
+        try:
+            print("\n[Stream] WebSocket session opened")
+
+            while True:
+                message = ws.receive()
+
+                if message is None:
+                    break
+
+                # ===== CONTROL MESSAGES =====
+                if isinstance(message, str):
+                    try:
+                        control = json.loads(message)
+                    except ValueError:
+                        ws.send(json.dumps({'type': 'error', 'error': 'Invalid JSON message'}))
+                        continue
+
+                    if control.get('type') == 'start' and tracker is None:
+                        try:
+                            sample_rate = int(control.get('sample_rate', sample_rate))
+                        except (TypeError, ValueError, OverflowError):
+                            sample_rate = None
+                        if sample_rate is None or not STREAM_SAMPLE_RATES[0] <= sample_rate <= STREAM_SAMPLE_RATES[1]:
+                            ws.send(json.dumps({
+                                'type': 'error',
+                                'error': f'sample_rate must be an integer from {STREAM_SAMPLE_RATES[0]} to {STREAM_SAMPLE_RATES[1]}'
+                            }))
+                            break
+                        sample_format = control.get('format', sample_format)
+
+                        if sample_format not in ('float32', 'int16'):
+                            ws.send(json.dumps({'type': 'error', 'error': f'Unsupported format: {sample_format}'}))
+                            break
+
+                        tracker = StreamingPitchTracker(
+                            sample_rate=sample_rate,
+                            fmin=pitch_detector.fmin,
+                            fmax=pitch_detector.fmax,
+                            frame_length=pitch_detector.frame_length,
+                            vocal_analyzer=vocal_analyzer,
+                            keep_frames=False
+                        )
+                        ws.send(json.dumps({
+                            'type': 'ready',
+                            'sample_rate': sample_rate,
+                            'format': sample_format,
+                            'hop_length': tracker.hop_length
+                        }))
+
+                    elif control.get('type') == 'end':
+                        if tracker is None:
+                            ws.send(json.dumps({'type': 'error', 'error': 'No audio received'}))
+                            break
+
+                        frames = tracker.finish()
+                        ws.send(json.dumps({
+                            'type': 'final',
+                            'frames': frames,
+                            'analysis': tracker.get_running_analysis(),
+                            'metadata': {
+                                'audio_duration': tracker.duration,
+                                'sample_rate': sample_rate,
+                                'total_frames': tracker.committed_frames,
+                                'algorithm': 'pYIN (streaming)'
+                            }
+                        }))
+                        print(f"[Stream] Finished: {tracker.duration:.2f}s, {tracker.committed_frames} frames")
+                        break
+
+                    continue
+
+                # ===== AUDIO CHUNKS =====
+                if tracker is None:
+                    tracker = StreamingPitchTracker(
+                        sample_rate=sample_rate,
+                        fmin=pitch_detector.fmin,
+                        fmax=pitch_detector.fmax,
+                        frame_length=pitch_detector.frame_length,
+                        vocal_analyzer=vocal_analyzer,
+                        keep_frames=False
+                    )
+
+                frames = tracker.push_pcm(message, sample_format)
+
+                if tracker.duration > STREAM_MAX_DURATION:
+                    ws.send(json.dumps({
+                        'type': 'error',
+                        'error': f'Stream too long (maximum {STREAM_MAX_DURATION}s)'
+                    }))
+                    break
+
+                if frames:
+                    ws.send(json.dumps({
+                        'type': 'pitch',
+                        'frames': frames,
+                        'analysis': tracker.get_running_analysis()
+                    }))
+
+        except Exception as e:
+            print(f"❌ Stream Error: {str(e)}")
+            print(traceback.format_exc())
+            try:
+                ws.send(json.dumps({'type': 'error', 'error': str(e)}))
+            except Exception:
+                pass
+
+
 # ===== ENDPOINT: TRANSPOSE AUDIO =====
 
 @app.route('/api/transpose/audio', methods=['POST'])
@@ -322,14 +636,14 @@ def transpose_audio_endpoint():
         {
             "success": true,
             "semitone_shift": 2,
-            "transposed_audio_url": "/uploads/...",
+            "transposed_audio_url": "/songs/transposed/...",
+            "cached": false,
             "quality": {...}
         }
     """
     
     audio_file = None
     filepath = None
-    output_file = None
     
     try:
         # Import transpose_audio function
@@ -370,12 +684,13 @@ def transpose_audio_endpoint():
             filepath,
             original_key,
             target_key,
-            preserve_formant=preserve_formant
+            preserve_formant=preserve_formant,
+            cache=transpose_cache
         )
         
         # Generate URL
         output_filename = os.path.basename(output_file)
-        transposed_url = f"/uploads/{output_filename}"
+        transposed_url = f"/songs/transposed/{output_filename}"
         
         # Cleanup original file
         cleanup_file(filepath)
@@ -388,6 +703,7 @@ def transpose_audio_endpoint():
             'semitone_shift': transpose_info['semitone_shift'],
             'direction': transpose_info['direction'],
             'transposed_audio_url': transposed_url,
+            'cached': transpose_info['cached'],
             'quality': transpose_info['quality'],
             'audio_info': transpose_info['audio_info']
         })
@@ -395,8 +711,6 @@ def transpose_audio_endpoint():
     except ValueError as e:
         if filepath:
             cleanup_file(filepath)
-        if output_file:
-            cleanup_file(output_file)
         
         return jsonify({
             'success': False,
@@ -406,8 +720,6 @@ def transpose_audio_endpoint():
     except Exception as e:
         if filepath:
             cleanup_file(filepath)
-        if output_file:
-            cleanup_file(output_file)
         
         print(f"❌ Transpose Error: {str(e)}")
         print(traceback.format_exc())
@@ -568,19 +880,26 @@ def transpose_song_custom(song_id):
         "semitone_shift": -2,  // Negative = down, Positive = up
         "preserve_formant": true  // Optional, default = true
     }
-    Response:
+    Response (200, cached):
     {
         "success": true,
+        "status": "done",
         "transposed_url": "http://192.168.3.2:5000/songs/transposed/...",
         "semitone_shift": -2,
         "direction": "down",
         "original_key": "G",
         "new_key": "F"
     }
+    Response (202, rendering in a worker):
+    {
+        "success": true,
+        "status": "queued",
+        "job_id": "...",
+        "status_url": "/api/jobs/<job_id>",
+        "events_url": "/api/jobs/<job_id>/events"
+    }
     """
     try:
-        import librosa
-        import soundfile as sf
         from key_utils import transpose_key
         
         # ✅ Get song from database
@@ -623,65 +942,46 @@ def transpose_song_custom(song_id):
                 'error': f'Audio file not found for song "{song["title"]}". Download status: {song.get("download_status", "unknown")}'
             }), 404
         
-        # Generate output filename
         direction = 'down' if semitone_shift < 0 else 'up'
-        transposed_filename = f"{os.path.splitext(os.path.basename(song['audio_path']))[0]}_transpose_{semitone_shift}.mp3"
-        transposed_path = os.path.join('songs/transposed', transposed_filename)
-        
-        # Check if already transposed (cache)
-        if os.path.exists(transposed_path):
-            print(f"✅ Transpose: Using cached version: {transposed_filename}")
-            
-            new_key = transpose_key(song['key_note'], semitone_shift)
-            
-            return jsonify({
-                'success': True,
-                'message': 'Transposed audio already exists (cached)',
-                'transposed_url': f"http://{request.host}/songs/transposed/{transposed_filename}",
-                'semitone_shift': semitone_shift,
-                'direction': direction,
-                'original_key': song['key_note'],
-                'new_key': new_key,
-                'song': {
-                    'id': song['id'],
-                    'title': song['title'],
-                    'artist': song['artist']
-                }
-            }), 200
-        
-        # Load and transpose audio
-        print(f"\n{'='*60}")
-        print(f"[Transpose] Loading: {song['audio_path']}")
-        y, sr = librosa.load(song['audio_path'], sr=16000, mono=True)
         
-        print(f"[Transpose] Shifting by {semitone_shift} semitones ({direction})")
-        y_shifted = librosa.effects.pitch_shift(y, sr=sr, n_steps=semitone_shift)
+        new_key = transpose_key(song['key_note'], semitone_shift)
+        song_info = {
+            'id': song['id'],
+            'title': song['title'],
+            'artist': song['artist']
+        }
         
-        # Save transposed audio
-        sf.write(transposed_path, y_shifted, sr)
+        # Cache hit -> answer now; otherwise a worker process renders it
+        entry, job = transpose_jobs.submit(
+            transpose_cache,
+            song['audio_path'],
+            semitone_shift,
+            preserve_formant=preserve_formant,
+            context={'original_key': song['key_note'], 'new_key': new_key, 'song': song_info}
+        )
         
-        file_size_bytes = os.path.getsize(transposed_path)
-        file_size_mb = round(file_size_bytes / (1024 * 1024), 2)
+        if job is not None:
+            print(f"[Transpose] {song['title']} ({semitone_shift:+d}) -> job {job['id']} ({job['status']})")
+            payload = job_payload(job)
+            payload.update({'success': True, 'message': 'Transpose job queued', 'direction': direction})
+            return jsonify(payload), 202
         
-        print(f"✅ Transpose: Done! Size: {file_size_mb} MB")
-        print(f"{'='*60}\n")
-        
-        new_key = transpose_key(song['key_note'], semitone_shift)
+        file_size_mb = round(entry['size'] / (1024 * 1024), 2)
+        print(f"✅ Transpose: Using cached version: {entry['file']}")
         
         return jsonify({
             'success': True,
-            'message': 'Song transposed successfully',
-            'transposed_url': f"http://{request.host}/songs/transposed/{transposed_filename}",
+            'status': 'done',
+            'message': 'Transposed audio already exists (cached)',
+            'transposed_url': f"http://{request.host}/songs/transposed/{entry['file']}",
             'semitone_shift': semitone_shift,
             'direction': direction,
             'original_key': song['key_note'],
             'new_key': new_key,
             'file_size_mb': file_size_mb,
-            'song': {
-                'id': song['id'],
-                'title': song['title'],
-                'artist': song['artist']
-            }
+            'cached': True,
+            'method': entry['info'].get('method'),
+            'song': song_info
         }), 200
         
     except Exception as e:
@@ -693,6 +993,68 @@ def transpose_song_custom(song_id):
         }), 500
 
 
+@app.route('/api/songs/<int:song_id>/transpose/stream', methods=['GET'])
+def stream_transposed_song(song_id):
+    """
+    Transposed song audio, streamed while it renders (usable directly as <audio src>)
+    Query: ?semitone_shift=-2&preserve_formant=true
+    Response: audio/wav, chunked (cached renderings are sent as a plain file)
+    """
+    try:
+        song = song_recommender.db_manager.get_song_by_id(song_id)
+        
+        if not song:
+            return jsonify({
+                'success': False,
+                'error': f'Song with ID {song_id} not found'
+            }), 404
+        
+        try:
+            semitone_shift = int(request.args.get('semitone_shift', ''))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'semitone_shift is required'
+            }), 400
+        preserve_formant = request.args.get('preserve_formant', 'true').lower() == 'true'
+        
+        if semitone_shift < -12 or semitone_shift > 12 or semitone_shift == 0:
+            return jsonify({
+                'success': False,
+                'error': 'semitone_shift must be between -12 and 12 (not 0)'
+            }), 400
+        
+        if not song.get('audio_path') or not os.path.exists(song['audio_path']):
+            return jsonify({
+                'success': False,
+                'error': f'Audio file not found for song "{song["title"]}"'
+            }), 404
+        
+        from streaming_shifter import StreamingShifter, cached_transposition, wav_stream
+        
+        # Full render if there is one, else an earlier stream of this song
+        entry = cached_transposition(transpose_cache, song['audio_path'], semitone_shift, preserve_formant)
+        if entry is not None:
+            print(f"✅ Transpose stream: Using cached version: {entry['file']}")
+            return send_from_directory(transpose_cache.cache_dir, entry['file'], mimetype='audio/wav')
+        
+        print(f"[Transpose] Streaming {song['title']} ({semitone_shift:+d})")
+        shifter = StreamingShifter(song['audio_path'], semitone_shift, preserve_formant=preserve_formant)
+        
+        return Response(wav_stream(shifter, cache=transpose_cache), mimetype='audio/wav', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        
+    except Exception as e:
+        print(f"❌ Error streaming transposed song: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': f'Failed to transpose song: {str(e)}'
+        }), 500
+
+
 from flask import send_file
 import os
 
@@ -811,15 +1173,7 @@ def list_songs():
     List semua lagu di database
     """
     try:
-        conn = sqlite3.connect(song_recommender.db_manager.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT id, title, artist, key_note, audio_path FROM songs")
-        rows = cursor.fetchall()
-        conn.close()
-        
-        songs = [dict(row) for row in rows]
+        songs = song_recommender.db_manager.list_songs()
         
         return jsonify({
             "success": True,
@@ -833,6 +1187,192 @@ def list_songs():
             "error": str(e)
         }), 500
 
+# ✅ ENDPOINT: Search songs by title/artist
+@app.route('/api/songs/search', methods=['GET'])
+def search_songs():
+    """
+    Ranked full-text search over title and artist
+    
+    Query params:
+        q: Search text (e.g. 'ed sheeran', 'shape of')
+        limit: Maximum results (default: 10, max 100)
+    """
+    try:
+        text = request.args.get('q', '').strip()
+        if not text:
+            return jsonify({'success': False, 'error': "Missing query parameter 'q'"}), 400
+        
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        songs = song_recommender.db_manager.search_songs(text, limit=limit)
+        
+        return jsonify({
+            'success': True,
+            'count': len(songs),
+            'songs': songs
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ✅ ENDPOINT: Autocomplete song titles/artists
+@app.route('/api/songs/autocomplete', methods=['GET'])
+def autocomplete_songs():
+    """
+    Title/artist suggestions while typing
+    
+    Query params:
+        q: Typed prefix (e.g. 'sha', 'ed sh')
+        limit: Maximum suggestions (default: 10, max 50)
+    """
+    try:
+        text = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        suggestions = song_recommender.db_manager.autocomplete(text, limit=limit) if text else []
+        
+        return jsonify({
+            'success': True,
+            'count': len(suggestions),
+            'suggestions': suggestions
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ✅ ENDPOINT: Songs singable within a vocal range
+@app.route('/api/songs/in-range', methods=['GET'])
+def songs_in_range():
+    """
+    Songs whose vocal range fits inside [min, max] with at most max_shift semitones transpose
+    
+    Query params:
+        min: Lowest note (e.g. 'C3') or MIDI number
+        max: Highest note (e.g. 'G4') or MIDI number
+        max_shift: Maximum transposition in semitones (default: 0, max 12)
+    """
+    try:
+        bounds = []
+        for name in ('min', 'max'):
+            value = request.args.get(name, '').strip()
+            midi = note_table.note_to_midi(value)
+            if midi is None:
+                try:
+                    midi = float(value)
+                except ValueError:
+                    return jsonify({'success': False, 'error': f"Invalid '{name}' note: {value!r}"}), 400
+            bounds.append(midi)
+        
+        low_midi, high_midi = bounds
+        if low_midi > high_midi:
+            return jsonify({'success': False, 'error': "'min' must not be above 'max'"}), 400
+        
+        max_shift = request.args.get('max_shift', 0, type=int)
+        if max_shift < 0 or max_shift > 12:
+            return jsonify({'success': False, 'error': 'max_shift must be between 0 and 12'}), 400
+        
+        songs = song_recommender.db_manager.find_songs_in_range(low_midi, high_midi, max_shift)
+        
+        return jsonify({
+            'success': True,
+            'count': len(songs),
+            'songs': [
+                {
+                    'id': song['id'],
+                    'title': song['title'],
+                    'artist': song['artist'],
+                    'key_note': song['key_note'],
+                    'vocal_range': f"{song['vocal_range_min']} - {song['vocal_range_max']}",
+                    'recommended_shift': song['recommended_shift']
+                }
+                for song in songs
+            ]
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/identify', methods=['POST'])
+def identify_song():
+    """
+    Query-by-humming: identify a song from a hummed/sung melody
+    
+    Form params:
+        audio: Audio file (same formats as /api/analyze)
+        max_results: Number of candidate songs (default: 5)
+    """
+    try:
+        if 'audio' not in request.files:
+            return jsonify({'success': False, 'error': 'No audio file provided'}), 400
+        
+        audio_file = request.files['audio']
+        filename = secure_filename(audio_file.filename)
+        
+        if filename == '' or not allowed_file(filename):
+            return jsonify({'success': False, 'error': 'Invalid file type'}), 400
+        
+        max_results = request.form.get('max_results', 5, type=int)
+        
+        try:
+            y, sr = decode_audio_stream(
+                audio_file.stream,
+                sample_rate=pitch_detector.sample_rate,
+                extension=filename.rsplit('.', 1)[1].lower()
+            )
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'error': f'Failed to load audio file: {str(e)}'
+            }), 400
+        
+        pitch_data = pitch_detector.detect_pitch_array(y, sr)
+        if not pitch_data['success']:
+            return jsonify({
+                'success': False,
+                'error': pitch_data.get('error', 'Pitch detection failed')
+            }), 400
+        
+        result = melody_index.search(melody_from_track(pitch_data['track']), top_k=max_results)
+        print(f"[Identify] {result['stats']}")
+        
+        matches = []
+        for match in result['matches']:
+            song = song_recommender.db_manager.get_song_by_id(match['song_id'])
+            if not song:
+                continue
+            matches.append({
+                'id': song['id'],
+                'title': song['title'],
+                'artist': song['artist'],
+                'key_note': song['key_note'],
+                'score': round(match['score'], 4),
+                'offset_seconds': match['offset_seconds'],
+                'tempo_scale': match['tempo_scale']
+            })
+        
+        return jsonify({
+            'success': True,
+            'count': len(matches),
+            'matches': matches,
+            'search_ms': round(result['stats']['elapsed_ms'], 2),
+            'indexed_songs': result['stats']['songs']
+        }), 200
+    
+    except Exception as e:
+        print(f"[ERROR] Identify failed: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/songs/<path:subpath>/<filename>')
 def serve_audio(subpath, filename):
     """
@@ -917,19 +1457,9 @@ def search_song_by_title(title):
     try:
         print(f"\n🔍 Searching for song: {title}")
         
-        # Search in database
+        # Search in database (exact title, then ranked full-text match)
         song = song_recommender.db_manager.get_song_by_title(title)
         
-        if not song:
-            # Try fuzzy search
-            all_songs = song_recommender.db_manager.get_all_songs()
-            title_lower = title.lower()
-            
-            for s in all_songs:
-                if title_lower in s['title'].lower():
-                    song = s
-                    break
-        
         if not song:
             return jsonify({
                 'success': False,
@@ -976,19 +1506,15 @@ def search_song_by_title(title):
 
 @app.route('/api/songs/search/<string:title>/transpose', methods=['POST'])
 def transpose_song_by_title(title):
-    """Transpose song audio by title with high quality (natural sound)"""
+    """
+    Transpose song audio by title with high quality (natural sound)
+    
+    200 with transposed_url when the rendering is cached, otherwise 202 with
+    a job_id (poll /api/jobs/<job_id> or stream /api/jobs/<job_id>/events)
+    """
     try:
-        import librosa
-        import soundfile as sf
         from key_utils import transpose_key
         
-        # ✅ Try to import pyrubberband
-        try:
-            import pyrubberband as pyrb
-            PYRUBBERBAND_AVAILABLE = True
-        except ImportError:
-            PYRUBBERBAND_AVAILABLE = False
-        
         data = request.get_json()
         semitone_shift = data.get('semitone_shift', 0)
         preserve_formant = data.get('preserve_formant', True)
@@ -1006,14 +1532,6 @@ def transpose_song_by_title(title):
         # Find song
         song = song_recommender.db_manager.get_song_by_title(title)
         
-        if not song:
-            all_songs = song_recommender.db_manager.get_all_songs()
-            title_lower = title.lower()
-            for s in all_songs:
-                if title_lower in s['title'].lower():
-                    song = s
-                    break
-        
         if not song:
             return jsonify({'success': False, 'error': f'Song "{title}" not found'}), 404
         
@@ -1042,88 +1560,45 @@ def transpose_song_by_title(title):
         
         print(f"✅ Audio path: {original_audio_path}")
         
-        # Generate output path
-        transposed_folder = 'songs/transposed'
-        os.makedirs(transposed_folder, exist_ok=True)
-        
-        base_filename = os.path.splitext(os.path.basename(original_audio_path))[0]
-        shift_str = f"+{semitone_shift}" if semitone_shift > 0 else str(semitone_shift)
-        transposed_filename = f"{base_filename}_transpose_{shift_str}.wav"
-        transposed_path = os.path.join(transposed_folder, transposed_filename)
-        
-        # Check cache
-        if os.path.exists(transposed_path):
-            print(f"⚡ Using cached transpose: {transposed_path}")
-            method_used = "cached"
-        else:
-            print(f"🔧 Transposing audio...")
-            
-            # Load audio
-            y, sr = librosa.load(original_audio_path, sr=None, mono=True)
-            print(f"   Loaded: {len(y)} samples at {sr} Hz")
-            
-            method_used = None
-            y_shifted = None
-            
-            # ✅ Try pyrubberband first (best quality)
-            if PYRUBBERBAND_AVAILABLE:
-                try:
-                    print(f"   Attempting: pyrubberband (highest quality)")
-                    y_shifted = pyrb.pitch_shift(
-                        y, 
-                        sr, 
-                        n_steps=semitone_shift,
-                        rbargs={'--formant': ''} if preserve_formant else {}
-                    )
-                    method_used = "pyrubberband"
-                    print(f"   ✅ Success with pyrubberband!")
-                except Exception as e:
-                    print(f"   ⚠️ pyrubberband failed: {str(e)}")
-                    print(f"   → Falling back to librosa with Phase Vocoder")
-            
-            # ✅ Fallback to librosa with BEST parameters
-            if y_shifted is None:
-                print(f"   Method: librosa.effects.pitch_shift (Phase Vocoder)")
-                
-                # Use librosa with better parameters for natural sound
-                y_shifted = librosa.effects.pitch_shift(
-                    y, 
-                    sr=sr, 
-                    n_steps=semitone_shift,
-                    bins_per_octave=12,  # Standard tuning
-                    res_type='kaiser_best'  # ✅ Highest quality resampling
-                )
-                method_used = "librosa_phase_vocoder"
-                print(f"   ✅ Pitch shifted by {semitone_shift} semitones")
-            
-            # Save
-            sf.write(transposed_path, y_shifted, sr)
-            
-            file_size_mb = round(os.path.getsize(transposed_path) / (1024 * 1024), 2)
-            print(f"✅ Transpose complete! ({file_size_mb} MB)")
-        
         # Calculate new key
         original_key = song.get('key_note', 'C') + ' major'
         new_key = transpose_key(original_key, semitone_shift)
         
+        # Cache hit -> answer now; otherwise a worker process renders it
+        entry, job = transpose_jobs.submit(
+            transpose_cache,
+            original_audio_path,
+            semitone_shift,
+            preserve_formant=preserve_formant,
+            context={'original_key': original_key, 'new_key': new_key}
+        )
+        
+        if job is not None:
+            print(f"🔧 Transpose job {job['id']} ({job['status']})")
+            print(f"{'='*60}\n")
+            payload = job_payload(job)
+            payload['success'] = True
+            return jsonify(payload), 202
+        
         # Return relative URL
-        transposed_url = f"/songs/transposed/{transposed_filename}"
+        transposed_url = f"/songs/transposed/{entry['file']}"
         
+        print(f"⚡ Using cached transpose: {entry['path']}")
         print(f"{'='*60}")
         print(f"✅ SUCCESS")
         print(f"   Original Key: {original_key}")
         print(f"   New Key: {new_key}")
-        print(f"   Method: {method_used}")
         print(f"   Transposed URL: {transposed_url}")
         print(f"{'='*60}\n")
         
         return jsonify({
             'success': True,
+            'status': 'done',
             'transposed_url': transposed_url,
             'original_key': original_key,
             'new_key': new_key,
             'semitone_shift': semitone_shift,
-            'method': method_used
+            'method': 'cached'
         }), 200
         
     except Exception as e:
@@ -1133,6 +1608,67 @@ def transpose_song_by_title(title):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+# ===== ENDPOINT: TRANSPOSE JOBS =====
+
+@app.route('/api/jobs/<string:job_id>', methods=['GET'])
+def get_transpose_job(job_id):
+    """
+    Status of a transpose job
+    
+    Response:
+        {
+            "success": true,
+            "job_id": "...",
+            "status": "queued" | "running" | "done" | "failed",
+            "stage": "loading" | "shifting" | "saving" | ...,
+            "progress": 0.2,
+            "transposed_url": "/songs/transposed/..."   // when done
+        }
+    """
+    job = transpose_jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': f'Job {job_id} not found'}), 404
+    
+    payload = job_payload(job)
+    payload['success'] = True
+    return jsonify(payload), 200
+
+
+@app.route('/api/jobs/<string:job_id>/events', methods=['GET'])
+def stream_transpose_job(job_id):
+    """Server-Sent Events: one event per status/stage/progress change, closed when the job finishes"""
+    if not transpose_jobs.get(job_id):
+        return jsonify({'success': False, 'error': f'Job {job_id} not found'}), 404
+    
+    def events():
+        last_state = None
+        last_sent = time.time()
+        deadline = time.time() + JOB_EVENTS_TIMEOUT
+        
+        while time.time() < deadline:
+            job = transpose_jobs.get(job_id)
+            if job is None:
+                return
+            
+            state = (job['status'], job['stage'], job['progress'])
+            if state != last_state:
+                yield f"event: {job['status']}\ndata: {json.dumps(job_payload(job))}\n\n"
+                last_state = state
+                last_sent = time.time()
+            elif time.time() - last_sent >= 15:
+                yield ": keepalive\n\n"
+                last_sent = time.time()
+            
+            if job['status'] in ('done', 'failed'):
+                return
+            time.sleep(0.5)
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @app.route('/api/songs/<int:song_id>', methods=['DELETE'])
 def delete_song(song_id):
     """Delete song from database and file"""
@@ -1156,11 +1692,7 @@ def delete_song(song_id):
                 print(f"⚠️ Could not delete audio file: {e}")
         
         # Delete from database
-        conn = sqlite3.connect(song_recommender.db_manager.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM songs WHERE id = ?", (song_id,))
-        conn.commit()
-        conn.close()
+        song_recommender.db_manager.delete_song(song_id)
         
         print(f"✅ Deleted song from database: {song['title']} (ID: {song_id})")
         
@@ -1183,7 +1715,7 @@ def delete_song(song_id):
 def serve_transposed_file(filename):
     """Serve transposed audio files"""
     try:
-        transposed_folder = 'songs/transposed'
+        transposed_folder = transpose_cache.cache_dir
         file_path = os.path.join(transposed_folder, filename)
         
         print(f"📁 Serving transposed audio: {file_path}")
@@ -1193,6 +1725,7 @@ def serve_transposed_file(filename):
             return jsonify({'success': False, 'error': 'File not found'}), 404
         
         print(f"✅ Sending file: {file_path}")
+        transpose_cache.touch(filename)
         
         # Detect file extension
         ext = os.path.splitext(filename)[1].lower()
@@ -0,0 +1,73 @@
+"""
+Audio I/O Helpers
+
+Decode uploaded audio langsung dari memory (request stream / spooled buffer)
+tanpa menyimpan ke uploads/ terlebih dahulu.
+- WAV/FLAC/OGG/MP3 didecode oleh soundfile langsung dari buffer
+- Format yang butuh ffmpeg (m4a, aac, webm) di-spill ke temp file unik
+"""
+
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Tuple
+
+import librosa
+import numpy as np
+
+# Uploads bigger than this are spooled to an anonymous temp file instead of RAM
+SPOOL_MAX_SIZE = 2 * 1024 * 1024  # 2MB
+
+
+def _as_seekable(stream: BinaryIO) -> BinaryIO:
+    """Return a seekable file object positioned at 0 (spool non-seekable streams)"""
+    try:
+        if stream.seekable():
+            stream.seek(0)
+            return stream
+    except (AttributeError, OSError):
+        pass
+
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode='w+b')
+    shutil.copyfileobj(stream, spooled)
+    spooled.seek(0)
+    return spooled
+
+
+def decode_audio_stream(
+    stream: BinaryIO,
+    sample_rate: int = 16000,
+    extension: str = 'wav',
+    mono: bool = True
+) -> Tuple[np.ndarray, int]:
+    """
+    Decode audio from a binary file object
+
+    Args:
+        stream: File object (e.g. FileStorage.stream from Flask)
+        sample_rate: Target sample rate (None = native)
+        extension: Original file extension (used only for the temp-file fallback)
+        mono: Downmix to mono
+
+    Returns:
+        (y, sr)
+    """
+    buffer = _as_seekable(stream)
+
+    # 1. In-memory decode via soundfile
+    try:
+        return librosa.load(buffer, sr=sample_rate, mono=mono)
+    except Exception:
+        buffer.seek(0)
+
+    # 2. Fallback: audioread/ffmpeg needs a real path -> unique temp file
+    tmp = tempfile.NamedTemporaryFile(suffix=f'.{extension}', delete=False)
+    try:
+        with tmp:
+            shutil.copyfileobj(buffer, tmp)
+        return librosa.load(tmp.name, sr=sample_rate, mono=mono)
+    finally:
+        try:
+            os.remove(tmp.name)
+        except OSError:
+            pass
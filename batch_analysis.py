@@ -0,0 +1,303 @@
+"""
+Batch Pitch / Vocal Analysis
+
+Analisis banyak rekaman sekaligus dengan ProcessPoolExecutor:
+- detect_pitch_batch() : PitchDetector.detect_pitch untuk banyak file
+- analyze_batch()      : pitch detection + VocalAnalyzer per file
+- Hasil selalu urut sesuai input, error satu file tidak menghentikan batch
+
+Usage:
+    python batch_analysis.py uploads/archive -o results.jsonl
+    python batch_analysis.py uploads/archive -o results.csv --format csv --workers 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional
+
+AUDIO_EXTENSIONS = {'mp3', 'wav', 'm4a', 'ogg', 'flac', 'aac', 'webm'}
+
+# Per-process components (created once per worker by _init_worker)
+_pitch_detector = None
+_vocal_analyzer = None
+
+
+def _init_worker(sample_rate: int, engine: str):
+    """Create PitchDetector + VocalAnalyzer once per worker process"""
+    global _pitch_detector, _vocal_analyzer
+    from pitch_detector import PitchDetector
+    from vocal_analyzer import VocalAnalyzer
+
+    _pitch_detector = PitchDetector(sample_rate=sample_rate, engine=engine)
+    _vocal_analyzer = VocalAnalyzer()
+
+
+def _check_engine(engine: str):
+    """Raise ValueError for an unknown engine before any worker starts"""
+    from pitch_engines import get_pitch_engine
+    get_pitch_engine(engine)
+
+
+def _detect_one(audio_path: str) -> Dict:
+    """Pitch detection for one file (runs in worker)"""
+    try:
+        pitch_data = _pitch_detector.detect_pitch(audio_path)
+    except Exception as e:
+        pitch_data = {
+            'success': False,
+            'error': f'Unexpected error: {str(e)}',
+            'traceback': traceback.format_exc()
+        }
+    pitch_data['path'] = audio_path
+    return pitch_data
+
+
+def _analyze_one(audio_path: str) -> Dict:
+    """Pitch detection + vocal analysis for one file (runs in worker)"""
+    result = {'path': audio_path, 'success': False}
+
+    try:
+        pitch_data = _pitch_detector.detect_pitch(audio_path)
+        if not pitch_data['success']:
+            result['error'] = pitch_data.get('error', 'Pitch detection failed')
+            return result
+
+        vocal_analysis = _vocal_analyzer.analyze(pitch_data)
+        if 'error' in vocal_analysis:
+            result['error'] = vocal_analysis['error']
+            return result
+
+        result['success'] = True
+        result['metadata'] = pitch_data['metadata']
+        result['analysis'] = vocal_analysis
+    except Exception as e:
+        result['error'] = f'Unexpected error: {str(e)}'
+        result['traceback'] = traceback.format_exc()
+
+    return result
+
+
+def _run_batch(func, paths: List[str], workers: Optional[int], chunksize: int,
+               sample_rate: int, engine: str) -> Iterator[Dict]:
+    """
+    Fan paths out over a process pool and yield results in input order
+
+    A crashed worker (BrokenProcessPool) marks the remaining files as failed
+    instead of aborting the whole batch.
+    """
+    if not paths:
+        return
+
+    done = 0
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(sample_rate, engine)
+        ) as executor:
+            for result in executor.map(func, paths, chunksize=chunksize):
+                done += 1
+                yield result
+    except BrokenProcessPool as e:
+        for path in paths[done:]:
+            yield {
+                'path': path,
+                'success': False,
+                'error': f'Worker process crashed: {str(e)}'
+            }
+
+
+def iter_detect_pitch_batch(paths: Iterable[str], workers: Optional[int] = None, chunksize: int = 4,
+                            sample_rate: int = 16000, engine: str = 'pyin') -> Iterator[Dict]:
+    """Lazy version of detect_pitch_batch() (yields results in input order)"""
+    _check_engine(engine)
+    return _run_batch(_detect_one, list(paths), workers, chunksize, sample_rate, engine)
+
+
+def iter_analyze_batch(paths: Iterable[str], workers: Optional[int] = None, chunksize: int = 4,
+                       sample_rate: int = 16000, engine: str = 'pyin') -> Iterator[Dict]:
+    """Lazy version of analyze_batch() (yields results in input order)"""
+    _check_engine(engine)
+    return _run_batch(_analyze_one, list(paths), workers, chunksize, sample_rate, engine)
+
+
+def detect_pitch_batch(paths: Iterable[str], workers: Optional[int] = None, chunksize: int = 4,
+                       sample_rate: int = 16000, engine: str = 'pyin') -> List[Dict]:
+    """
+    Detect pitch for many audio files in parallel
+
+    Args:
+        paths: Audio file paths
+        workers: Number of worker processes (default: CPU count)
+        chunksize: Files sent to a worker per task
+        sample_rate: Target sample rate (default: 16000 Hz)
+        engine: Pitch engine ('pyin' or 'fast_yin')
+
+    Returns:
+        List of PitchDetector.detect_pitch() results (same order as paths),
+        each with an extra 'path' key
+
+    Raises:
+        ValueError: Unknown engine
+    """
+    return list(iter_detect_pitch_batch(paths, workers, chunksize, sample_rate, engine))
+
+
+def analyze_batch(paths: Iterable[str], workers: Optional[int] = None, chunksize: int = 4,
+                  sample_rate: int = 16000, engine: str = 'pyin') -> List[Dict]:
+    """
+    Pitch detection + vocal analysis for many audio files in parallel
+
+    Returns:
+        List of dicts (same order as paths):
+        {'path', 'success', 'metadata', 'analysis'} or {'path', 'success': False, 'error'}
+    """
+    return list(iter_analyze_batch(paths, workers, chunksize, sample_rate, engine))
+
+
+def find_audio_files(input_dir: str, recursive: bool = False) -> List[str]:
+    """List audio files in a directory (sorted for stable output order)"""
+    audio_files = []
+
+    if recursive:
+        for root, _, files in os.walk(input_dir):
+            for name in files:
+                if name.rsplit('.', 1)[-1].lower() in AUDIO_EXTENSIONS:
+                    audio_files.append(os.path.join(root, name))
+    else:
+        for name in os.listdir(input_dir):
+            path = os.path.join(input_dir, name)
+            if os.path.isfile(path) and name.rsplit('.', 1)[-1].lower() in AUDIO_EXTENSIONS:
+                audio_files.append(path)
+
+    return sorted(audio_files)
+
+
+# ===== OUTPUT =====
+
+CSV_COLUMNS = [
+    'path', 'success', 'error', 'duration', 'voiced_percentage',
+    'key', 'scale', 'key_confidence',
+    'min_note', 'max_note', 'min_hz', 'max_hz', 'median_hz', 'range_semitones',
+    'vocal_type'
+]
+
+
+def _to_row(result: Dict) -> Dict:
+    """Flatten one analyze result to a CSV row"""
+    row = {column: '' for column in CSV_COLUMNS}
+    row['path'] = result['path']
+    row['success'] = result['success']
+    row['error'] = result.get('error', '')
+
+    if result['success']:
+        metadata = result['metadata']
+        analysis = result['analysis']
+        pitch_range = analysis['pitch_range']
+        row.update({
+            'duration': metadata['duration'],
+            'voiced_percentage': metadata['voiced_percentage'],
+            'key': analysis['key']['key'],
+            'scale': analysis['key']['scale'],
+            'key_confidence': analysis['key']['confidence'],
+            'min_note': pitch_range['notes']['min'],
+            'max_note': pitch_range['notes']['max'],
+            'min_hz': pitch_range['hz']['min'],
+            'max_hz': pitch_range['hz']['max'],
+            'median_hz': pitch_range['hz']['median'],
+            'range_semitones': pitch_range['midi']['range_semitones'],
+            'vocal_type': analysis['vocal_classification']['primary']
+        })
+
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Batch vocal analysis over a directory of recordings')
+    parser.add_argument('input_dir', help='Directory with audio files')
+    parser.add_argument('-o', '--output', default='batch_results.jsonl', help='Output file')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default=None,
+                        help='Output format (default: from output extension)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=4, help='Files per worker task')
+    parser.add_argument('--engine', default='pyin', help='Pitch engine (pyin, fast_yin)')
+    parser.add_argument('--sample-rate', type=int, default=16000)
+    parser.add_argument('--recursive', action='store_true', help='Include subdirectories')
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ('csv' if args.output.lower().endswith('.csv') else 'jsonl')
+
+    try:
+        _check_engine(args.engine)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if not os.path.isdir(args.input_dir):
+        print(f"❌ Folder not found: {args.input_dir}")
+        return 1
+
+    paths = find_audio_files(args.input_dir, recursive=args.recursive)
+    if not paths:
+        print(f"❌ No audio files found in {args.input_dir}")
+        return 1
+
+    print("=" * 60)
+    print("🎵 BATCH VOCAL ANALYSIS")
+    print("=" * 60)
+    print(f"Files: {len(paths)}")
+    print(f"Workers: {args.workers or os.cpu_count()}")
+    print(f"Engine: {args.engine}")
+    print(f"Output: {args.output} ({output_format})")
+    print()
+
+    start = time.time()
+    ok_count = 0
+    failed_count = 0
+
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        writer = None
+        if output_format == 'csv':
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+
+        results = iter_analyze_batch(
+            paths,
+            workers=args.workers,
+            chunksize=args.chunksize,
+            sample_rate=args.sample_rate,
+            engine=args.engine
+        )
+
+        for result in results:
+            if result['success']:
+                ok_count += 1
+            else:
+                failed_count += 1
+                print(f"❌ {result['path']}: {result.get('error')}")
+
+            if writer is not None:
+                writer.writerow(_to_row(result))
+            else:
+                f.write(json.dumps(result) + '\n')
+
+    elapsed = time.time() - start
+    print()
+    print("=" * 60)
+    print(f"✅ Done in {elapsed:.1f}s ({len(paths) / max(elapsed, 1e-9):.1f} files/s)")
+    print(f"   ✅ Success: {ok_count}")
+    print(f"   ❌ Failed: {failed_count}")
+    print("=" * 60)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
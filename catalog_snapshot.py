@@ -0,0 +1,157 @@
+"""
+Catalog Snapshot
+
+Salinan katalog lagu (tabel songs) di memory untuk request handler:
+- Immutable: row disimpan sebagai tuple, index id / title dibuat sekali per load
+- Lookup by id / title = dictionary lookup (tanpa query SQLite)
+- Rebuild atomic saat PRAGMA data_version berubah: snapshot baru dibuat
+  penuh dulu, lalu referensinya di-swap; reader yang sedang memakai
+  snapshot lama tidak terganggu
+- Reader tidak mengambil lock; data_version hanya dicek paling sering
+  sekali per check_interval (atau segera setelah invalidate())
+"""
+
+import sqlite3
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Iterator, Optional, Sequence
+
+# Default staleness bound for writes made by other processes
+CHECK_INTERVAL = 0.5
+
+
+class CatalogSnapshot:
+    """Immutable copy of the songs table at one data_version"""
+
+    __slots__ = ('columns', 'rows', 'by_id', 'by_title', 'data_version', 'loaded_at')
+
+    def __init__(self, columns: Sequence[str], rows: Sequence[tuple], data_version: Optional[int] = None):
+        """
+        Build the snapshot and its lookup indexes
+
+        Args:
+            columns: Column names of the rows (must include id and title)
+            rows: songs rows ordered by id
+            data_version: PRAGMA data_version the rows were read at
+        """
+        self.columns = tuple(columns)
+        self.rows = tuple(rows)
+        self.data_version = data_version
+        self.loaded_at = time.time()
+
+        id_column = self.columns.index('id')
+        title_column = self.columns.index('title')
+
+        # Row position per id, and per lowercased title (lowest id wins, like ORDER BY id LIMIT 1)
+        by_id = {}
+        by_title = {}
+        for position, row in enumerate(self.rows):
+            by_id[row[id_column]] = position
+            title = row[title_column]
+            if title:
+                by_title.setdefault(title.lower(), position)
+
+        self.by_id = MappingProxyType(by_id)
+        self.by_title = MappingProxyType(by_title)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _song(self, position: int) -> Dict:
+        # Fresh dict per call: callers annotate results, the snapshot stays untouched
+        return dict(zip(self.columns, self.rows[position]))
+
+    def get(self, song_id: int) -> Optional[Dict]:
+        """Song dict by id (None if missing)"""
+        position = self.by_id.get(song_id)
+        return self._song(position) if position is not None else None
+
+    def find_title(self, title: str) -> Optional[Dict]:
+        """Song dict by exact, case-insensitive title (None if missing)"""
+        position = self.by_title.get(title.strip().lower()) if title else None
+        return self._song(position) if position is not None else None
+
+    def songs(self, columns: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """All songs in database (id) order, optionally only some columns"""
+        if columns is None:
+            for position in range(len(self.rows)):
+                yield self._song(position)
+            return
+
+        indexes = [self.columns.index(column) for column in columns]
+        for row in self.rows:
+            yield {column: row[i] for column, i in zip(columns, indexes)}
+
+
+class CatalogCache:
+    def __init__(self, db_path: str = "songs.db", check_interval: float = CHECK_INTERVAL):
+        """
+        Initialize CatalogCache (the snapshot is loaded lazily on first use)
+
+        Args:
+            db_path: SQLite database path
+            check_interval: Seconds between data_version checks
+        """
+        self.db_path = db_path
+        self.check_interval = check_interval
+
+        # Dedicated connection: data_version only changes for commits made by
+        # *other* connections, so our own reads never trigger a rebuild
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._dirty = False
+
+    def current(self) -> CatalogSnapshot:
+        """
+        Latest snapshot
+
+        Within check_interval of the last check this is a plain attribute
+        read. Otherwise one caller checks data_version (and rebuilds if it
+        changed) while the others keep using the current snapshot; only the
+        first load and reads right after invalidate() wait for it.
+        """
+        snapshot = self._snapshot
+        if (snapshot is not None and not self._dirty
+                and time.monotonic() - self._checked_at < self.check_interval):
+            return snapshot
+
+        if not self._lock.acquire(blocking=snapshot is None or self._dirty):
+            return snapshot
+
+        try:
+            # Clear before reading the version: a write committed after this
+            # point marks the cache dirty again instead of being lost
+            self._dirty = False
+            version = self._current_data_version()
+            if self._snapshot is None or version != self._snapshot.data_version:
+                self._snapshot = self._load(version)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        """Make the next current() call see writes committed by this process"""
+        self._dirty = True
+
+    def _current_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _load(self, version: int) -> CatalogSnapshot:
+        """Read the whole songs table into a new snapshot (caller holds the lock)"""
+        start = time.time()
+
+        # Version read first: a commit landing in between only costs one extra rebuild
+        cursor = self._conn.execute("SELECT * FROM songs ORDER BY id")
+        columns = [description[0] for description in cursor.description]
+        snapshot = CatalogSnapshot(columns, cursor.fetchall(), version)
+
+        print(f"[CatalogSnapshot] Loaded {len(snapshot)} songs in {(time.time() - start) * 1000:.0f} ms")
+        return snapshot
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,15 +1,117 @@
+import itertools
+import math
+import os
+import re
 import sqlite3
-from typing import List, Dict, Optional
+import threading
+from typing import Dict, Iterable, List, Optional
 from contextlib import contextmanager
 
+import note_table
+from catalog_snapshot import CatalogCache
+
+# Connection tuning (per connection, except journal_mode which is stored in the file)
+BUSY_TIMEOUT_MS = 5000                  # wait for the writer lock instead of failing
+MMAP_SIZE = 256 * 1024 * 1024           # memory-mapped reads
+CACHE_SIZE_KB = 64 * 1024               # page cache per connection
+CACHED_STATEMENTS = 256                 # prepared statements kept per connection
+
+# Full-text search ranking: title matches weigh more than artist matches
+FTS_TITLE_WEIGHT = 10.0
+FTS_ARTIST_WEIGHT = 1.0
+
+_SEARCH_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+# Columns written by bulk_upsert; (title, artist) is the natural key
+SONG_COLUMNS = (
+    'title', 'artist', 'key_note', 'scale', 'vocal_range_min', 'vocal_range_max',
+    'difficulty', 'genre', 'audio_path', 'vocal_range_min_midi', 'vocal_range_max_midi'
+)
+
+# Kept separate so bulk_upsert can drop it during large loads and rebuild once
+_FTS_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS songs_fts_ai AFTER INSERT ON songs
+    BEGIN
+        INSERT INTO songs_fts (rowid, title, artist) VALUES (new.id, new.title, new.artist);
+    END
+'''
+
+# MIDI -> note name as plain Python strings (scalar numpy lookups are slow per row)
+_MIDI_NOTE_NAMES = tuple(note_table.MIDI_NOTE_NAMES.tolist())
+
+# Field names used by older scripts / catalog files -> column
+_SONG_ALIASES = {
+    'key': 'key_note',
+    'keynote': 'key_note',
+    'audiopath': 'audio_path',
+    'audio_file_path': 'audio_path',
+    'vocalrangemin': 'vocal_range_min',
+    'vocalrangemax': 'vocal_range_max'
+}
+
 class DatabaseManager:
     def __init__(self, db_path: str = "songs.db"):
         self.db_path = db_path
+        
+        # One connection per thread (reused across calls), tracked for close()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        
         self.init_database()
+        
+        # Read-only in-memory copy of songs for id / title lookups
+        self.catalog = CatalogCache(db_path)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a tuned connection"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=CACHED_STATEMENTS,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        return conn
+    
+    def connection(self) -> sqlite3.Connection:
+        """
+        This thread's connection (created on first use)
+        
+        Use `with db.connection() as conn:` for writes: commits on success,
+        rolls back on error. Connections inherited through fork are not reused.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self):
+        """Close every pooled connection (threads reconnect on next use)"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
     
     def init_database(self):
         """Initialize database with songs table"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connection()
+        
+        # WAL: readers never block the writer (persistent, stored in the file)
+        conn.execute("PRAGMA journal_mode = WAL")
+        
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -24,115 +126,455 @@ class DatabaseManager:
                 difficulty TEXT,
                 genre TEXT,
                 audio_path TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                vocal_range_min_midi INTEGER,
+                vocal_range_max_midi INTEGER
             )
         ''')
         
+        self.rtree_enabled = self._init_range_index(cursor)
+        self.fts_enabled = self._init_search_index(cursor)
+        self.upsert_enabled = self._init_natural_key(cursor)
+        
         conn.commit()
-        conn.close()
         print(f"✅ Database initialized: {self.db_path}")
     
+    def _init_range_index(self, cursor) -> bool:
+        """
+        Numeric vocal range columns + R*Tree interval index
+        
+        - Adds vocal_range_min_midi / vocal_range_max_midi to older databases
+        - Backfills them from the note strings (rows written by other scripts)
+        - songs_range_rtree mirrors the MIDI range per song, kept in sync by triggers
+        
+        Returns:
+            False if this SQLite build has no R*Tree (range queries fall back
+            to a B-tree index on the MIDI columns)
+        """
+        cursor.execute("PRAGMA table_info(songs)")
+        columns = {col[1] for col in cursor.fetchall()}
+        for column in ('vocal_range_min_midi', 'vocal_range_max_midi'):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE songs ADD COLUMN {column} INTEGER")
+        
+        # Backfill MIDI from note strings where missing
+        cursor.execute('''
+            SELECT id, vocal_range_min, vocal_range_max FROM songs
+            WHERE (vocal_range_min IS NOT NULL AND vocal_range_min_midi IS NULL)
+               OR (vocal_range_max IS NOT NULL AND vocal_range_max_midi IS NULL)
+        ''')
+        updates = [
+            (note_table.note_to_midi(low) if low else None,
+             note_table.note_to_midi(high) if high else None,
+             song_id)
+            for song_id, low, high in cursor.fetchall()
+        ]
+        if updates:
+            cursor.executemany(
+                "UPDATE songs SET vocal_range_min_midi = ?, vocal_range_max_midi = ? WHERE id = ?",
+                updates
+            )
+            print(f"   - Backfilled MIDI vocal range for {len(updates)} songs")
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS songs_range_rtree
+                USING rtree(id, min_midi, max_midi)
+            ''')
+            cursor.execute("SELECT 1 FROM songs_range_rtree LIMIT 1")
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  R*Tree not available ({e}), range queries use a B-tree index")
+            # Triggers from an R*Tree build would make every write fail here
+            for trigger in ('songs_range_ai', 'songs_range_au', 'songs_range_ad'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_songs_range_midi
+                ON songs(vocal_range_min_midi, vocal_range_max_midi)
+            ''')
+            return False
+        
+        cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS songs_range_ai AFTER INSERT ON songs
+            WHEN new.vocal_range_min_midi IS NOT NULL AND new.vocal_range_max_midi IS NOT NULL
+            BEGIN
+                INSERT OR REPLACE INTO songs_range_rtree (id, min_midi, max_midi)
+                VALUES (new.id, new.vocal_range_min_midi, new.vocal_range_max_midi);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS songs_range_au
+            AFTER UPDATE OF vocal_range_min_midi, vocal_range_max_midi ON songs
+            BEGIN
+                DELETE FROM songs_range_rtree WHERE id = old.id;
+                INSERT INTO songs_range_rtree (id, min_midi, max_midi)
+                SELECT new.id, new.vocal_range_min_midi, new.vocal_range_max_midi
+                WHERE new.vocal_range_min_midi IS NOT NULL AND new.vocal_range_max_midi IS NOT NULL;
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS songs_range_ad AFTER DELETE ON songs
+            BEGIN
+                DELETE FROM songs_range_rtree WHERE id = old.id;
+            END;
+        ''')
+        
+        # (Re)build the R*Tree if it is out of sync (new index / rows added before the triggers)
+        indexed = cursor.execute("SELECT COUNT(*) FROM songs_range_rtree").fetchone()[0]
+        expected = cursor.execute('''
+            SELECT COUNT(*) FROM songs
+            WHERE vocal_range_min_midi IS NOT NULL AND vocal_range_max_midi IS NOT NULL
+        ''').fetchone()[0]
+        if indexed != expected:
+            cursor.execute("DELETE FROM songs_range_rtree")
+            cursor.execute('''
+                INSERT INTO songs_range_rtree (id, min_midi, max_midi)
+                SELECT id, vocal_range_min_midi, vocal_range_max_midi FROM songs
+                WHERE vocal_range_min_midi IS NOT NULL AND vocal_range_max_midi IS NOT NULL
+            ''')
+        
+        return True
+    
+    def _init_natural_key(self, cursor) -> bool:
+        """
+        UNIQUE (title, artist) index, the conflict target of bulk_upsert
+        
+        NULL artist counts as '' so unknown-artist duplicates collide too.
+        Returns False (and leaves the data alone) if duplicates already exist.
+        """
+        try:
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_songs_title_artist
+                ON songs(title, COALESCE(artist, ''))
+            ''')
+        except sqlite3.IntegrityError:
+            print("⚠️  Duplicate (title, artist) rows in songs, bulk_upsert disabled until they are removed")
+            return False
+        return True
+    
+    def _init_search_index(self, cursor) -> bool:
+        """
+        FTS5 index over title/artist (external content = songs, synced by triggers)
+        
+        Returns:
+            False if this SQLite build has no FTS5 (search falls back to LIKE)
+        """
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_songs_title_nocase ON songs(title COLLATE NOCASE)")
+        
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'songs_fts'"
+        ).fetchone()
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+                    title, artist,
+                    content='songs', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  FTS5 not available ({e}), song search uses LIKE")
+            return False
+        
+        cursor.execute(_FTS_INSERT_TRIGGER)
+        cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS songs_fts_ad AFTER DELETE ON songs
+            BEGIN
+                INSERT INTO songs_fts (songs_fts, rowid, title, artist)
+                VALUES ('delete', old.id, old.title, old.artist);
+            END;
+            
+            CREATE TRIGGER IF NOT EXISTS songs_fts_au AFTER UPDATE OF title, artist ON songs
+            BEGIN
+                INSERT INTO songs_fts (songs_fts, rowid, title, artist)
+                VALUES ('delete', old.id, old.title, old.artist);
+                INSERT INTO songs_fts (rowid, title, artist) VALUES (new.id, new.title, new.artist);
+            END;
+        ''')
+        
+        # New index over existing rows
+        if not exists:
+            cursor.execute("INSERT INTO songs_fts (songs_fts) VALUES ('rebuild')")
+        
+        return True
+    
+    @staticmethod
+    def _range_midi_fields(fields: Dict) -> Dict:
+        """MIDI columns derived from vocal_range_min / vocal_range_max note strings"""
+        derived = {}
+        for text_column, midi_column in (('vocal_range_min', 'vocal_range_min_midi'),
+                                         ('vocal_range_max', 'vocal_range_max_midi')):
+            if text_column in fields and midi_column not in fields:
+                note = fields[text_column]
+                derived[midi_column] = note_table.note_to_midi(note) if note else None
+        return derived
+    
     @contextmanager
     def get_session(self):
         """
         Context manager for database sessions (SQLite compatible)
         Replaces SQLAlchemy session
+        
+        Yields this thread's pooled connection; commits on success, rolls back
+        on error. The connection stays open for reuse.
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
+        conn = self.connection()
+        with conn:
             yield conn
-        finally:
-            conn.close()
+        self.catalog.invalidate()
     
     def get_songs_by_keys(self, keys: List[str]) -> List[Dict]:
         """Get songs by multiple keys"""
         if not keys:
             return []
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
         placeholders = ','.join('?' * len(keys))
         query = f"SELECT * FROM songs WHERE key_note IN ({placeholders})"
         
-        cursor.execute(query, keys)
-        rows = cursor.fetchall()
-        conn.close()
-        
+        rows = self.connection().execute(query, keys).fetchall()
         return [dict(row) for row in rows]
     
     def get_song_by_id(self, song_id: int) -> Optional[Dict]:
-        """Get a single song by ID"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        """Get a single song by ID (catalog snapshot lookup)"""
+        return self.catalog.current().get(song_id)
+    
+    def get_song_by_title(self, title: str) -> Optional[Dict]:
+        """
+        Get a single song by title
         
-        cursor.execute("SELECT * FROM songs WHERE id = ?", (song_id,))
-        row = cursor.fetchone()
-        conn.close()
+        Exact (case-insensitive) title from the catalog snapshot first,
+        otherwise the best ranked full-text match on title/artist.
+        """
+        song = self.catalog.current().find_title(title)
+        if song:
+            return song
         
-        return dict(row) if row else None
+        matches = self.search_songs(title, limit=1)
+        return matches[0] if matches else None
     
-    def get_song_by_title(self, title: str) -> Optional[Dict]:
-        """Get a single song by title"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    @staticmethod
+    def _fts_query(text: str, prefix: bool = True) -> Optional[str]:
+        """User text -> FTS5 query (every word required, last word as prefix)"""
+        tokens = _SEARCH_TOKEN.findall(text.lower())
+        if not tokens:
+            return None
+        terms = [f'"{token}"' for token in tokens]
+        if prefix:
+            terms[-1] += '*'
+        return ' '.join(terms)
+    
+    def search_songs(self, text: str, limit: int = 10) -> List[Dict]:
+        """
+        Ranked title/artist search (bm25, title weighted higher)
+        
+        Args:
+            text: Free text, e.g. 'shape of', 'ed sheeran'
+            limit: Maximum number of songs
+        
+        Returns:
+            Song dicts, best match first
+        """
+        if not self.fts_enabled:
+            rows = self.connection().execute(
+                "SELECT * FROM songs WHERE title LIKE ? OR artist LIKE ? ORDER BY id LIMIT ?",
+                (f"%{text}%", f"%{text}%", limit)
+            ).fetchall()
+            return [dict(row) for row in rows]
+        
+        query = self._fts_query(text)
+        if query is None:
+            return []
+        
+        rows = self.connection().execute(f'''
+            SELECT songs.* FROM songs_fts
+            JOIN songs ON songs.id = songs_fts.rowid
+            WHERE songs_fts MATCH ?
+            ORDER BY bm25(songs_fts, {FTS_TITLE_WEIGHT}, {FTS_ARTIST_WEIGHT}), songs.id
+            LIMIT ?
+        ''', (query, limit)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Title/artist suggestions for a partially typed query
+        
+        Titles starting with the prefix come first (range scan on the title
+        index), then other title/artist word-prefix matches from FTS. Neither
+        step sorts the full match set, so short prefixes stay fast.
+        
+        Returns:
+            [{'id', 'title', 'artist'}]
+        """
+        text = prefix.strip()
+        if not text:
+            return []
+        
+        conn = self.connection()
+        # LIKE is case-insensitive like the NOCASE title index, which turns the prefix into a range scan
+        pattern = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        rows = conn.execute('''
+            SELECT id, title, artist FROM songs
+            WHERE title LIKE ? ESCAPE '\\'
+            ORDER BY title COLLATE NOCASE
+            LIMIT ?
+        ''', (pattern, limit)).fetchall()
+        suggestions = [dict(row) for row in rows]
         
-        cursor.execute("SELECT * FROM songs WHERE title LIKE ?", (f"%{title}%",))
-        row = cursor.fetchone()
-        conn.close()
+        query = self._fts_query(text)
+        if len(suggestions) < limit and self.fts_enabled and query is not None:
+            seen = {song['id'] for song in suggestions}
+            rows = conn.execute('''
+                SELECT songs.id, songs.title, songs.artist FROM songs_fts
+                JOIN songs ON songs.id = songs_fts.rowid
+                WHERE songs_fts MATCH ?
+                LIMIT ?
+            ''', (query, limit + len(suggestions))).fetchall()
+            suggestions += [dict(row) for row in rows if row['id'] not in seen][:limit - len(suggestions)]
         
-        return dict(row) if row else None
+        return suggestions
     
     def add_song(self, title: str, artist: str = None, key_note: str = None, 
                  scale: str = None, audio_path: str = None, **kwargs) -> int:
         """Add a new song to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        range_midi = self._range_midi_fields({
+            'vocal_range_min': kwargs.get('vocal_range_min'),
+            'vocal_range_max': kwargs.get('vocal_range_max')
+        })
         
-        cursor.execute('''
-            INSERT INTO songs (title, artist, key_note, scale, audio_path,
-                             vocal_range_min, vocal_range_max, difficulty, genre)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            title, artist, key_note, scale, audio_path,
-            kwargs.get('vocal_range_min'),
-            kwargs.get('vocal_range_max'),
-            kwargs.get('difficulty'),
-            kwargs.get('genre')
-        ))
-        
-        song_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.execute('''
+                INSERT INTO songs (title, artist, key_note, scale, audio_path,
+                                 vocal_range_min, vocal_range_max, difficulty, genre,
+                                 vocal_range_min_midi, vocal_range_max_midi)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                title, artist, key_note, scale, audio_path,
+                kwargs.get('vocal_range_min'),
+                kwargs.get('vocal_range_max'),
+                kwargs.get('difficulty'),
+                kwargs.get('genre'),
+                range_midi['vocal_range_min_midi'],
+                range_midi['vocal_range_max_midi']
+            ))
+        self.catalog.invalidate()
         
-        return song_id
+        return cursor.lastrowid
     
-    def get_all_songs(self) -> List[Dict]:
-        """Get all songs from database"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    @staticmethod
+    def _song_row(record: Dict) -> Optional[tuple]:
+        """
+        Song record (dict from code, JSON or CSV) -> values in SONG_COLUMNS order
         
-        cursor.execute("SELECT * FROM songs ORDER BY title")
-        rows = cursor.fetchall()
-        conn.close()
+        Accepts the legacy aliases in _SONG_ALIASES and a 'vocal_range_midi'
+        {'min', 'max'} dict; empty strings count as missing. Note strings and
+        MIDI range columns are derived from each other. None if no title.
+        """
+        fields = {}
+        for name, value in record.items():
+            column = _SONG_ALIASES.get(name, name)
+            if column in SONG_COLUMNS and value is not None and value != '':
+                fields[column] = value.strip() if isinstance(value, str) else value
         
-        return [dict(row) for row in rows]
+        if not fields.get('title'):
+            return None
+        
+        midi_range = record.get('vocal_range_midi')
+        if isinstance(midi_range, dict):
+            fields.setdefault('vocal_range_min_midi', midi_range.get('min'))
+            fields.setdefault('vocal_range_max_midi', midi_range.get('max'))
+        
+        for text_column, midi_column in (('vocal_range_min', 'vocal_range_min_midi'),
+                                         ('vocal_range_max', 'vocal_range_max_midi')):
+            if fields.get(midi_column) is not None:
+                fields[midi_column] = min(max(int(round(float(fields[midi_column]))), 0), 127)
+                fields.setdefault(text_column, _MIDI_NOTE_NAMES[fields[midi_column]])
+        fields.update(DatabaseManager._range_midi_fields(fields))
+        
+        return tuple(fields.get(column) for column in SONG_COLUMNS)
     
-    def delete_song(self, song_id: int) -> bool:
-        """Delete a song by ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def bulk_upsert(self, records: Iterable[Dict], batch_size: int = 10000,
+                    update_existing: bool = True) -> Dict[str, int]:
+        """
+        Insert or update many songs in one transaction
         
-        cursor.execute("DELETE FROM songs WHERE id = ?", (song_id,))
-        affected = cursor.rowcount
+        Songs are matched on (title, artist). Existing rows keep their value
+        for any field the record leaves out. Records are consumed lazily, so
+        a streaming reader (see import_songs.py) never holds the whole catalog.
         
-        conn.commit()
-        conn.close()
+        Args:
+            records: Song dicts (same fields as add_song)
+            batch_size: Rows per executemany call
+            update_existing: False = leave songs that already exist untouched
+        
+        Returns:
+            {'inserted', 'existing', 'skipped'}: existing = records matching a
+            song already in the table, skipped = records without a title
+        """
+        if not self.upsert_enabled:
+            raise ValueError("bulk_upsert needs unique (title, artist); remove duplicate songs first")
+        
+        if update_existing:
+            conflict = 'DO UPDATE SET ' + ', '.join(
+                f"{column} = COALESCE(excluded.{column}, songs.{column})"
+                for column in SONG_COLUMNS if column not in ('title', 'artist')
+            )
+        else:
+            conflict = 'DO NOTHING'
+        query = f'''
+            INSERT INTO songs ({', '.join(SONG_COLUMNS)})
+            VALUES ({', '.join('?' * len(SONG_COLUMNS))})
+            ON CONFLICT (title, COALESCE(artist, '')) {conflict}
+        '''
+        
+        written = 0
+        skipped = 0
+        records = iter(records)
+        
+        with self.connection() as conn:
+            # Take the write lock up front: counts and rows in one transaction
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+            
+            bulk_mode = False
+            while True:
+                batch = list(itertools.islice(records, batch_size))
+                if not batch:
+                    break
+                
+                # Large load: one FTS rebuild at the end beats a trigger per row
+                if not written and not skipped and len(batch) == batch_size and self.fts_enabled:
+                    conn.execute("DROP TRIGGER IF EXISTS songs_fts_ai")
+                    bulk_mode = True
+                
+                rows = [self._song_row(record) for record in batch]
+                rows = [row for row in rows if row is not None]
+                skipped += len(batch) - len(rows)
+                
+                if rows:
+                    conn.executemany(query, rows)
+                    written += len(rows)
+            
+            if bulk_mode:
+                conn.execute("INSERT INTO songs_fts (songs_fts) VALUES ('rebuild')")
+                conn.execute(_FTS_INSERT_TRIGGER)
+            
+            inserted = conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0] - before
+        self.catalog.invalidate()
+        
+        return {'inserted': inserted, 'existing': written - inserted, 'skipped': skipped}
+    
+    def get_all_songs(self) -> List[Dict]:
+        """Get all songs from database"""
+        return sorted(self.catalog.current().songs(), key=lambda song: song['title'])
+    
+    def list_songs(self) -> List[Dict]:
+        """Song list summary (id, title, artist, key_note, audio_path) in database order"""
+        return list(self.catalog.current().songs(('id', 'title', 'artist', 'key_note', 'audio_path')))
+    
+    def delete_song(self, song_id: int) -> bool:
+        """Delete a song by ID"""
+        with self.connection() as conn:
+            affected = conn.execute("DELETE FROM songs WHERE id = ?", (song_id,)).rowcount
+        self.catalog.invalidate()
         
         return affected > 0
     
@@ -141,21 +583,81 @@ class DatabaseManager:
         if not kwargs:
             return False
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Keep MIDI range columns in sync with the note strings
+        kwargs.update(self._range_midi_fields(kwargs))
         
         # Build UPDATE query dynamically
         fields = ', '.join([f"{key} = ?" for key in kwargs.keys()])
         values = list(kwargs.values()) + [song_id]
         
         query = f"UPDATE songs SET {fields} WHERE id = ?"
-        cursor.execute(query, values)
-        
-        affected = cursor.rowcount
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            affected = conn.execute(query, values).rowcount
+        self.catalog.invalidate()
         
         return affected > 0
 
-# ✅ Create global instance for backwards compatibility
-db_manager = DatabaseManager()
+    def find_songs_in_range(self, low_midi: float, high_midi: float, max_shift: int = 0) -> List[Dict]:
+        """
+        Songs singable inside [low_midi, high_midi] with at most max_shift semitones transposition
+        
+        Uses the R*Tree (or the MIDI column index without one): a song fits at some shift |s| <= max_shift iff
+        min >= low - max_shift, max <= high + max_shift and its width fits the range.
+        
+        Args:
+            low_midi: Lowest singable MIDI note
+            high_midi: Highest singable MIDI note
+            max_shift: Maximum transposition (semitones)
+        
+        Returns:
+            Song dicts with 'recommended_shift' (smallest shift that fits), ordered by |shift|
+        """
+        params = (low_midi - max_shift, high_midi + max_shift, high_midi - low_midi)
+        if self.rtree_enabled:
+            rows = self.connection().execute('''
+                SELECT songs.* FROM songs_range_rtree AS r
+                JOIN songs ON songs.id = r.id
+                WHERE r.min_midi >= ? AND r.max_midi <= ?
+                  AND songs.vocal_range_max_midi - songs.vocal_range_min_midi <= ?
+            ''', params).fetchall()
+        else:
+            rows = self.connection().execute('''
+                SELECT * FROM songs
+                WHERE vocal_range_min_midi BETWEEN ?1 AND ?2
+                  AND vocal_range_max_midi <= ?2
+                  AND vocal_range_max_midi - vocal_range_min_midi <= ?3
+            ''', params).fetchall()
+        
+        songs = []
+        for row in rows:
+            song = dict(row)
+            # Valid shifts: [low - min, high - max] ∩ [-max_shift, max_shift]; pick closest to 0
+            lowest_shift = max(math.ceil(low_midi - song['vocal_range_min_midi']), -max_shift)
+            highest_shift = min(math.floor(high_midi - song['vocal_range_max_midi']), max_shift)
+            if lowest_shift > highest_shift:
+                continue
+            song['recommended_shift'] = int(min(max(0, lowest_shift), highest_shift))
+            songs.append(song)
+        
+        songs.sort(key=lambda song: (abs(song['recommended_shift']), song['id']))
+        return songs
+
+_db_manager = None
+_db_manager_lock = threading.Lock()
+
+
+def get_db_manager() -> DatabaseManager:
+    """Shared DatabaseManager for songs.db (opened, and migrated, on first use)"""
+    global _db_manager
+    with _db_manager_lock:
+        if _db_manager is None:
+            _db_manager = DatabaseManager()
+        return _db_manager
+
+
+def __getattr__(name: str):
+    # ✅ Global instance for backwards compatibility, created on first access:
+    # a plain `import database_manager` must not open (and migrate) songs.db
+    if name == 'db_manager':
+        return get_db_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,346 @@
+"""
+Catalog Feature Extraction (offline)
+
+Ukur key, scale, vocal range dan tempo langsung dari audio di songs/original
+(bukan data yang diketik manual di populate_*.py) lalu tulis ke songs.db:
+- Paralel di semua core (ProcessPoolExecutor, satu PitchDetector per worker)
+- Resumable: hasil per file di-commit langsung ke tabel song_features
+- File dengan size + mtime yang sama dengan run sebelumnya di-skip (hasil
+  --dry-run belum diterapkan, jadi run biasa berikutnya tetap memprosesnya)
+- Melody contour sekaligus disimpan untuk query-by-humming (song_melodies)
+
+Usage:
+    python extract_catalog_features.py
+    python extract_catalog_features.py songs/original --workers 8 --engine pyin
+    python extract_catalog_features.py --force        # re-extract everything
+    python extract_catalog_features.py --dry-run      # measure, don't touch songs
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import note_table
+from batch_analysis import find_audio_files
+from database_manager import DatabaseManager
+from melody_search import FRAME_RATE, MelodyIndex, melody_from_track
+
+# Vocal range = 5th..95th percentile of voiced pitch (full mixes have outliers)
+RANGE_PERCENTILES = (5, 95)
+
+# Per-process components (created once per worker by _init_worker)
+_pitch_detector = None
+_vocal_analyzer = None
+
+
+def _init_worker(sample_rate: int, engine: str):
+    """Create PitchDetector + VocalAnalyzer once per worker process"""
+    global _pitch_detector, _vocal_analyzer
+    from pitch_detector import PitchDetector
+    from vocal_analyzer import VocalAnalyzer
+
+    _pitch_detector = PitchDetector(sample_rate=sample_rate, engine=engine)
+    _vocal_analyzer = VocalAnalyzer()
+
+
+def _extract_one(audio_path: str) -> Dict:
+    """Decode + pitch/key/range/tempo/melody for one file (runs in worker)"""
+    import librosa
+
+    result = {'path': audio_path, 'success': False}
+
+    try:
+        y, sr = librosa.load(audio_path, sr=_pitch_detector.sample_rate, mono=True)
+
+        pitch_data = _pitch_detector.detect_pitch_array(y, sr)
+        if not pitch_data['success']:
+            result['error'] = pitch_data.get('error', 'Pitch detection failed')
+            return result
+
+        track = pitch_data['track']
+        analysis = _vocal_analyzer.analyze(track)
+        if 'error' in analysis:
+            result['error'] = analysis['error']
+            return result
+
+        midi = note_table.hz_to_midi(track.voiced_pitches())
+        range_min, range_max = np.percentile(midi, RANGE_PERCENTILES)
+
+        tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+
+        result.update({
+            'success': True,
+            'key_note': analysis['key']['key'],
+            'scale': analysis['key']['scale'],
+            'key_confidence': float(analysis['key']['confidence']),
+            'vocal_range_min': note_table.midi_to_note(range_min),
+            'vocal_range_max': note_table.midi_to_note(range_max),
+            'median_hz': float(analysis['pitch_range']['hz']['median']),
+            'tempo_bpm': float(np.atleast_1d(tempo)[0]),
+            'duration': float(len(y) / sr),
+            'melody': melody_from_track(track).tobytes()
+        })
+    except Exception as e:
+        result['error'] = f'Unexpected error: {str(e)}'
+        result['traceback'] = traceback.format_exc()
+
+    return result
+
+
+# ===== DATABASE =====
+
+def init_features_table(conn: sqlite3.Connection):
+    """
+    song_features: measured features + file fingerprint (size, mtime) per audio file
+
+    applied = 0 marks dry-run rows whose features never reached songs /
+    song_melodies (older tables get the column with 0, so they run once more).
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS song_features (
+            audio_path TEXT PRIMARY KEY,
+            song_id INTEGER,
+            file_size INTEGER NOT NULL,
+            file_mtime REAL NOT NULL,
+            key_note TEXT,
+            scale TEXT,
+            key_confidence REAL,
+            vocal_range_min TEXT,
+            vocal_range_max TEXT,
+            median_hz REAL,
+            tempo_bpm REAL,
+            duration REAL,
+            error TEXT,
+            applied INTEGER NOT NULL DEFAULT 0,
+            extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(song_features)")}
+    if 'applied' not in columns:
+        conn.execute("ALTER TABLE song_features ADD COLUMN applied INTEGER NOT NULL DEFAULT 0")
+    conn.commit()
+
+
+def _path_key(path: str) -> str:
+    """Normalized relative path ('songs/original/x.mp3') used to match songs.audio_path"""
+    return os.path.normpath(os.path.relpath(path)).replace(os.sep, '/')
+
+
+def _song_ids_by_path(conn: sqlite3.Connection) -> Dict[str, int]:
+    """songs.audio_path (normalized, and bare filename as fallback) -> song id"""
+    by_path = {}
+    for song_id, audio_path in conn.execute("SELECT id, audio_path FROM songs WHERE audio_path IS NOT NULL"):
+        key = os.path.normpath(audio_path).replace(os.sep, '/')
+        by_path.setdefault(key, song_id)
+        by_path.setdefault(os.path.basename(key), song_id)
+    return by_path
+
+
+def pending_files(conn: sqlite3.Connection, paths: List[str], force: bool = False,
+                  retry_failed: bool = False, apply: bool = True) -> List[str]:
+    """
+    Files that are new or changed (size / mtime) since their last extraction
+
+    With apply=True, files only measured by a dry run are pending too.
+    """
+    done = {
+        row[0]: (row[1], row[2], row[3], row[4])
+        for row in conn.execute("SELECT audio_path, file_size, file_mtime, error, applied FROM song_features")
+    }
+
+    pending = []
+    for path in paths:
+        previous = done.get(_path_key(path))
+        if force or previous is None:
+            pending.append(path)
+            continue
+
+        stat = os.stat(path)
+        size, mtime, error, applied = previous
+        if (size != stat.st_size or mtime != stat.st_mtime
+                or (error is not None and retry_failed)
+                or (error is None and apply and not applied)):
+            pending.append(path)
+
+    return pending
+
+
+def save_result(conn: sqlite3.Connection, result: Dict, song_id: Optional[int], update_song: bool = True):
+    """
+    Record one extraction (and apply it to the songs row) in a single transaction
+
+    With update_song=False (dry run) only song_features is written, marked
+    as not applied; songs and song_melodies stay untouched.
+    """
+    stat = os.stat(result['path'])
+    features = {
+        column: result.get(column)
+        for column in ('key_note', 'scale', 'key_confidence', 'vocal_range_min', 'vocal_range_max',
+                       'median_hz', 'tempo_bpm', 'duration')
+    }
+
+    with conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO song_features
+                (audio_path, song_id, file_size, file_mtime, key_note, scale, key_confidence,
+                 vocal_range_min, vocal_range_max, median_hz, tempo_bpm, duration, error, applied,
+                 extracted_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (
+            _path_key(result['path']), song_id, stat.st_size, stat.st_mtime,
+            features['key_note'], features['scale'], features['key_confidence'],
+            features['vocal_range_min'], features['vocal_range_max'],
+            features['median_hz'], features['tempo_bpm'], features['duration'],
+            None if result['success'] else result.get('error', 'Unknown error'),
+            int(update_song)
+        ))
+
+        if not result['success'] or song_id is None or not update_song:
+            return
+
+        song_fields = {
+            'key_note': features['key_note'],
+            'scale': features['scale'],
+            'vocal_range_min': features['vocal_range_min'],
+            'vocal_range_max': features['vocal_range_max']
+        }
+        song_fields.update(DatabaseManager._range_midi_fields(song_fields))
+        assignments = ', '.join(f"{column} = ?" for column in song_fields)
+        conn.execute(f"UPDATE songs SET {assignments} WHERE id = ?", list(song_fields.values()) + [song_id])
+
+        if result.get('melody'):
+            conn.execute(
+                '''INSERT OR REPLACE INTO song_melodies (song_id, frame_rate, contour, updated_at)
+                   VALUES (?, ?, ?, CURRENT_TIMESTAMP)''',
+                (song_id, FRAME_RATE, result['melody'])
+            )
+
+
+# ===== PIPELINE =====
+
+def extract_catalog(input_dir: str = 'songs/original', db_path: str = 'songs.db',
+                    workers: Optional[int] = None, sample_rate: int = 16000, engine: str = 'fast_yin',
+                    force: bool = False, retry_failed: bool = False, update_songs: bool = True) -> Dict:
+    """
+    Extract features for every new/changed audio file in input_dir
+
+    Args:
+        input_dir: Folder with original song audio (searched recursively)
+        db_path: SQLite database
+        workers: Worker processes (default: CPU count)
+        sample_rate: Decode sample rate
+        engine: Pitch engine ('fast_yin' or 'pyin')
+        force: Ignore the size/mtime fingerprint and re-extract everything
+        retry_failed: Also re-run files that failed with the same fingerprint
+        update_songs: Write measured key/scale/range into the songs table and
+            melodies into song_melodies (False = dry run, song_features only)
+
+    Returns:
+        Counters: {'files', 'skipped', 'success', 'failed', 'unmatched'}
+    """
+    # Make sure songs (+ range index) and song_melodies exist
+    DatabaseManager(db_path)
+    MelodyIndex(db_path).close()
+
+    conn = sqlite3.connect(db_path)
+    init_features_table(conn)
+
+    paths = find_audio_files(input_dir, recursive=True)
+    pending = pending_files(conn, paths, force=force, retry_failed=retry_failed, apply=update_songs)
+    song_ids = _song_ids_by_path(conn)
+
+    counters = {'files': len(paths), 'skipped': len(paths) - len(pending), 'success': 0, 'failed': 0, 'unmatched': 0}
+    print(f"[Features] {len(paths)} files, {len(pending)} new/changed, {counters['skipped']} up to date")
+
+    if not pending:
+        conn.close()
+        return counters
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(sample_rate, engine)
+        ) as executor:
+            futures = [executor.submit(_extract_one, path) for path in pending]
+
+            # Commit as files finish: an interrupted run keeps everything done so far
+            for future in as_completed(futures):
+                result = future.result()
+                key = _path_key(result['path'])
+                song_id = song_ids.get(key, song_ids.get(os.path.basename(key)))
+                save_result(conn, result, song_id, update_song=update_songs)
+
+                if not result['success']:
+                    counters['failed'] += 1
+                    print(f"❌ {key}: {result.get('error')}")
+                    continue
+
+                counters['success'] += 1
+                if song_id is None:
+                    counters['unmatched'] += 1
+                print(f"✅ {key}: {result['key_note']} {result['scale']} "
+                      f"({result['vocal_range_min']} - {result['vocal_range_max']}, {result['tempo_bpm']:.0f} BPM)"
+                      f"{'' if song_id is not None else ' [no matching song]'}")
+    except BrokenProcessPool as e:
+        print(f"❌ Worker process crashed: {str(e)} (re-run to resume)")
+    finally:
+        conn.close()
+
+    return counters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure key/range/tempo of catalog audio and store it in the database')
+    parser.add_argument('input_dir', nargs='?', default='songs/original', help='Folder with original songs')
+    parser.add_argument('--db', default='songs.db')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--engine', default='fast_yin', help='Pitch engine (pyin, fast_yin)')
+    parser.add_argument('--sample-rate', type=int, default=16000)
+    parser.add_argument('--force', action='store_true', help='Re-extract unchanged files')
+    parser.add_argument('--retry-failed', action='store_true', help='Re-run files that failed before')
+    parser.add_argument('--dry-run', action='store_true', help='Only fill song_features, leave songs and melodies untouched')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        print(f"❌ Folder not found: {args.input_dir}")
+        return 1
+
+    print("=" * 60)
+    print("🎵 CATALOG FEATURE EXTRACTION")
+    print("=" * 60)
+
+    start = time.time()
+    counters = extract_catalog(
+        args.input_dir,
+        db_path=args.db,
+        workers=args.workers,
+        sample_rate=args.sample_rate,
+        engine=args.engine,
+        force=args.force,
+        retry_failed=args.retry_failed,
+        update_songs=not args.dry_run
+    )
+
+    print()
+    print("=" * 60)
+    print(f"✅ Done in {time.time() - start:.1f}s")
+    print(f"   ⏭️  Up to date: {counters['skipped']}")
+    print(f"   ✅ Extracted: {counters['success']} ({counters['unmatched']} without a song row)")
+    print(f"   ❌ Failed: {counters['failed']}")
+    print("=" * 60)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
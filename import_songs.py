@@ -0,0 +1,129 @@
+"""
+Song Catalog Import
+
+Import katalog lagu (JSON array, JSON Lines atau CSV) ke songs.db lewat
+DatabaseManager.bulk_upsert:
+- File dibaca streaming (tidak pernah seluruh katalog di memory)
+- Satu transaksi, executemany per batch
+- Upsert berdasarkan (title, artist): lagu yang sudah ada di-update
+  (--no-update: dibiarkan)
+
+Usage:
+    python import_songs.py songs_database.json
+    python import_songs.py catalog.csv --db songs.db --batch-size 20000
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator
+
+from database_manager import DatabaseManager
+
+READ_CHUNK = 1 << 16
+
+
+def iter_json_array(f) -> Iterator[Dict]:
+    """Yield the objects of a top-level JSON array one at a time"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+
+    while True:
+        # Skip separators between values
+        buffer = buffer.lstrip()
+        if not started and buffer:
+            if buffer[0] != '[':
+                raise ValueError("Expected a JSON array of song objects")
+            buffer = buffer[1:]
+            started = True
+            continue
+        if buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+        if buffer.startswith(']'):
+            return
+
+        if buffer:
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield value
+                buffer = buffer[end:]
+                continue
+
+        if eof:
+            if started:
+                raise ValueError("Unterminated JSON array")
+            return
+
+        chunk = f.read(READ_CHUNK)
+        eof = not chunk
+        buffer += chunk
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Song records from a .json (array), .jsonl or .csv file"""
+    extension = os.path.splitext(path)[1].lower()
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if extension == '.csv':
+            yield from csv.DictReader(f)
+        elif extension in ('.jsonl', '.ndjson'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif extension == '.json':
+            yield from iter_json_array(f)
+        else:
+            raise ValueError(f"Unsupported catalog format: {extension} (use .json, .jsonl or .csv)")
+
+
+def import_catalog(path: str, db_path: str = 'songs.db', batch_size: int = 10000,
+                   update_existing: bool = True) -> Dict[str, int]:
+    """
+    Stream a catalog file into the songs table
+
+    Returns:
+        bulk_upsert counters: {'inserted', 'existing', 'skipped'}
+    """
+    db = DatabaseManager(db_path)
+    return db.bulk_upsert(iter_records(path), batch_size=batch_size, update_existing=update_existing)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import a song catalog (JSON, JSON Lines or CSV) into the database')
+    parser.add_argument('path', help='Catalog file')
+    parser.add_argument('--db', default='songs.db')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows per executemany call')
+    parser.add_argument('--no-update', action='store_true', help='Leave songs that already exist untouched')
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.path):
+        print(f"❌ File not found: {args.path}")
+        return 1
+
+    start = time.time()
+    try:
+        counters = import_catalog(args.path, db_path=args.db, batch_size=args.batch_size,
+                                  update_existing=not args.no_update)
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        return 1
+
+    print(f"✅ Imported {args.path} in {time.time() - start:.1f}s")
+    print(f"   ➕ Inserted: {counters['inserted']}")
+    print(f"   {'⏭️  Already in database' if args.no_update else '🔄 Updated'}: {counters['existing']}")
+    print(f"   ⏭️  Skipped (no title): {counters['skipped']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
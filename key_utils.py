@@ -5,46 +5,19 @@ Support Mayor notation: C C# D D# E E# F F# G G# A A# B B#
 
 from typing import List
 
-# Major Keys Mapping (semitone 0-11)
+import numpy as np
+
+import note_table
+
+# Major Keys Mapping (semitone 0-11): sharp keys + flat keys for input compatibility
 MAJOR_KEYS = {
-    # Standard Mayor notes
-    'C': 0,
-    'C#': 1,
-    'D': 2,
-    'D#': 3,
-    'E': 4,
-    'F': 5,  # Also E# enharmonic
-    'F#': 6,
-    'G': 7,
-    'G#': 8,
-    'A': 9,
-    'A#': 10,
-    'B': 11,
-    # Flat keys for input compatibility (convert to sharp)
-    'Db': 1,  # Convert to C#
-    'Eb': 3,  # Convert to D#
-    'Fb': 4,  # Convert to E
-    'Gb': 6,  # Convert to F#
-    'Ab': 8,  # Convert to G#
-    'Bb': 10,  # Convert to A#
-    'Cb': 11,  # Convert to B
+    name: semitone
+    for name, semitone in note_table.SPELLING_TO_SEMITONE.items()
+    if name[0].isupper() and '♯' not in name and '♭' not in name
 }
 
 # Preferred output notation (sharp only, Mayor format)
-SEMITONE_TO_KEY = {
-    0: 'C',
-    1: 'C#',
-    2: 'D',
-    3: 'D#',
-    4: 'E',
-    5: 'F',
-    6: 'F#',
-    7: 'G',
-    8: 'G#',
-    9: 'A',
-    10: 'A#',
-    11: 'B'
-}
+SEMITONE_TO_KEY = dict(enumerate(note_table.NOTE_NAMES))
 
 # Alias for backward compatibility
 KEY_SEMITONE_MAP = MAJOR_KEYS
@@ -60,33 +33,12 @@ def normalize_key_name(key_input: str) -> str:
     Returns:
         Normalized key in Mayor notation (e.g., 'A#', 'F#', 'D#')
     """
-    # Remove 'major', 'minor', whitespace
-    key = key_input.strip()
-    key = key.replace(' major', '').replace(' Major', '')
-    key = key.replace(' minor', '').replace(' Minor', '')
-    key = key.strip()
-    
-    # Capitalize properly
-    if len(key) > 1:
-        key = key[0].upper() + key[1].lower()
-    else:
-        key = key.upper()
+    normalized = note_table.normalize_key(key_input)
+    if normalized is not None:
+        return normalized
     
-    # Convert flat to sharp (Mayor notation)
-    flat_to_sharp = {
-        'Db': 'C#',
-        'Eb': 'D#',
-        'Fb': 'E',
-        'Gb': 'F#',
-        'Ab': 'G#',
-        'Bb': 'A#',
-        'Cb': 'B'
-    }
-    
-    if key in flat_to_sharp:
-        key = flat_to_sharp[key]
-    
-    return key
+    # Unknown key: return cleaned input (get_key_semitone() rejects it)
+    return key_input.strip()
 
 
 def get_key_semitone(key_str: str) -> int:
@@ -99,12 +51,12 @@ def get_key_semitone(key_str: str) -> int:
     Returns:
         Semitone value (0-11)
     """
-    normalized = normalize_key_name(key_str)
+    semitone = note_table.key_to_semitone(key_str)
     
-    if normalized not in MAJOR_KEYS:
-        raise ValueError(f"Invalid key: {key_str} (normalized: {normalized})")
+    if semitone is None:
+        raise ValueError(f"Invalid key: {key_str} (normalized: {normalize_key_name(key_str)})")
     
-    return MAJOR_KEYS[normalized]
+    return semitone
 
 
 def get_nearby_keys(detected_note: str, semitone_range: int = 1) -> List[str]:
@@ -126,14 +78,9 @@ def get_nearby_keys(detected_note: str, semitone_range: int = 1) -> List[str]:
         print(f"[key_utils WARNING] Invalid key '{detected_note}', using 'C' as fallback")
         base_semitone = 0
     
-    # Calculate range
-    nearby_semitones = []
-    for offset in range(-semitone_range, semitone_range + 1):
-        semitone = (base_semitone + offset) % 12
-        nearby_semitones.append(semitone)
-    
-    # Convert to Mayor notation
-    nearby_keys = [SEMITONE_TO_KEY[s] for s in nearby_semitones]
+    # Offsets -range..+range, wrapped and named in one table lookup (Mayor notation)
+    offsets = np.arange(-semitone_range, semitone_range + 1)
+    nearby_keys = note_table.semitone_to_key(base_semitone + offsets).tolist()
     
     return nearby_keys
 
@@ -182,7 +129,7 @@ def semitone_to_mayor_note(semitone: int) -> str:
     Returns:
         Note in Mayor format (e.g., 'C#', 'F#')
     """
-    return SEMITONE_TO_KEY.get(semitone % 12, 'C')
+    return note_table.NOTE_NAMES[semitone % 12]
 
 
 def get_all_major_keys() -> List[str]:
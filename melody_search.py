@@ -0,0 +1,494 @@
+"""
+Melody Search (Query-by-Humming)
+
+Cari lagu dari humming:
+1. Melody lagu katalog disimpan di tabel song_melodies (semitone contour 10 Hz)
+2. Shortlist via inverted index interval n-gram (transposition-invariant)
+3. Re-rank dengan banded DTW (Sakoe-Chiba) atas window lagu seukuran query,
+   dengan LB_Keogh lower bound untuk pruning (DTW hanya dihitung bila
+   lower bound masih bisa mengalahkan hasil ke-k)
+
+Usage:
+    python melody_search.py build               # extract melodies of songs with audio
+    python melody_search.py query humming.wav   # identify a hum from the CLI
+"""
+
+import argparse
+import heapq
+import math
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+import note_table
+from pitch_engines import njit
+from pitch_track import PitchTrack
+
+FRAME_RATE = 10.0           # Contour samples per second
+NGRAM_SIZE = 3              # Intervals per n-gram
+MAX_INTERVAL = 12           # Intervals are clipped to ±1 octave
+MIN_NOTE_SAMPLES = 2        # Shorter runs are glides, not notes
+
+
+# ===== CONTOURS =====
+
+def melody_from_track(track: PitchTrack, frame_rate: float = FRAME_RATE) -> np.ndarray:
+    """
+    Voiced pitch track -> semitone contour at frame_rate (unvoiced gaps removed)
+
+    Returns:
+        float32 MIDI values (absolute; callers center them as needed)
+    """
+    midi = note_table.hz_to_midi(track.voiced_pitches())
+    if len(midi) == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    # Block median: track frame rate -> contour frame rate
+    track_rate = track.sample_rate / track.hop_length
+    block = max(1, int(round(track_rate / frame_rate)))
+    usable = len(midi) // block * block
+    if usable == 0:
+        return np.array([np.median(midi)], dtype=np.float32)
+    return np.median(midi[:usable].reshape(-1, block), axis=1).astype(np.float32)
+
+
+def melody_notes(contour: np.ndarray) -> np.ndarray:
+    """
+    Collapse a contour into a note sequence (rounded semitones, short glides dropped)
+
+    Notes are rounded relative to the singer's own tuning (circular mean of the
+    fractional semitone), so a hum that is a quarter tone flat still lands on
+    the same intervals.
+    """
+    if len(contour) == 0:
+        return np.zeros(0, dtype=np.int16)
+
+    contour = np.asarray(contour, dtype=np.float64)
+    tuning = np.angle(np.mean(np.exp(2j * np.pi * contour))) / (2 * np.pi)
+    rounded = np.rint(contour - tuning)
+    rounded = (rounded - np.median(rounded)).astype(np.int16)
+
+    # 3-point median filter: single-frame octave errors / noise spikes
+    if len(rounded) >= 3:
+        padded = np.pad(rounded, 1, mode='edge')
+        rounded = np.median(np.lib.stride_tricks.sliding_window_view(padded, 3), axis=1).astype(np.int16)
+
+    change = np.flatnonzero(np.diff(rounded)) + 1
+    starts = np.concatenate([[0], change])
+    lengths = np.diff(np.concatenate([starts, [len(rounded)]]))
+    notes = rounded[starts[lengths >= MIN_NOTE_SAMPLES]]
+
+    # Merge repeats left behind by dropped glides
+    if len(notes) > 1:
+        notes = notes[np.concatenate([[True], np.diff(notes) != 0])]
+    return notes
+
+
+def interval_ngrams(contour: np.ndarray, n: int = NGRAM_SIZE) -> set:
+    """Distinct interval n-grams of a contour (transposition invariant)"""
+    intervals = np.clip(np.diff(melody_notes(contour)), -MAX_INTERVAL, MAX_INTERVAL)
+    if len(intervals) < n:
+        return set()
+    windows = np.lib.stride_tricks.sliding_window_view(intervals, n)
+    return set(map(tuple, windows.tolist()))
+
+
+# ===== DTW =====
+
+@njit(cache=True)
+def _banded_dtw(query, candidate, offset, band, best_so_far):
+    """
+    Squared-error DTW of query vs (candidate - offset) with a Sakoe-Chiba band
+
+    Abandons early once every cell of a row exceeds best_so_far (returns inf).
+    """
+    n = len(query)
+    m = len(candidate)
+    inf = np.inf
+    previous = np.full(m + 1, inf)
+    current = np.full(m + 1, inf)
+    previous[0] = 0.0
+
+    for i in range(1, n + 1):
+        current[:] = inf
+        lo = max(1, i - band)
+        hi = min(m, i + band)
+        row_min = inf
+        for j in range(lo, hi + 1):
+            cost = (query[i - 1] - candidate[j - 1] + offset) ** 2
+            best = previous[j - 1]
+            if previous[j] < best:
+                best = previous[j]
+            if current[j - 1] < best:
+                best = current[j - 1]
+            current[j] = cost + best
+            if current[j] < row_min:
+                row_min = current[j]
+        if row_min >= best_so_far:
+            return inf
+        previous, current = current, previous
+
+    return previous[m]
+
+
+@njit(cache=True)
+def _window_bounds(contours, song_offsets, length, hop, lower, upper):
+    """
+    LB_Keogh of every window (length, every hop samples) of every song
+
+    contours holds the candidate songs back to back (song_offsets, CSR style).
+    Windows are mean-centered before comparing against the query envelope.
+
+    Returns:
+        (slots, starts, means, bounds) per window; starts index into contours
+    """
+    n_songs = len(song_offsets) - 1
+    total = 0
+    for slot in range(n_songs):
+        size = song_offsets[slot + 1] - song_offsets[slot]
+        if size >= length:
+            total += (size - length) // hop + 1
+
+    slots = np.empty(total, dtype=np.int64)
+    starts = np.empty(total, dtype=np.int64)
+    means = np.empty(total)
+    bounds = np.empty(total)
+
+    w = 0
+    for slot in range(n_songs):
+        begin = song_offsets[slot]
+        end = song_offsets[slot + 1]
+        for start in range(begin, end - length + 1, hop):
+            mean = 0.0
+            for i in range(length):
+                mean += contours[start + i]
+            mean /= length
+
+            bound = 0.0
+            for i in range(length):
+                value = contours[start + i] - mean
+                if value > upper[i]:
+                    bound += (value - upper[i]) ** 2
+                elif value < lower[i]:
+                    bound += (lower[i] - value) ** 2
+
+            slots[w] = slot
+            starts[w] = start
+            means[w] = mean
+            bounds[w] = bound / length
+            w += 1
+
+    return slots, starts, means, bounds
+
+
+@njit(cache=True)
+def _dtw_cascade(query, contours, slots, starts, means, bounds, band, top_k,
+                 scale_index, best, best_start, best_scale):
+    """
+    Banded DTW over candidate windows in increasing LB_Keogh order
+
+    best / best_start / best_scale (one entry per shortlisted song) are updated
+    in place. Stops as soon as the next lower bound cannot beat the k-th best
+    song; single windows are abandoned early against their song's best.
+
+    Returns:
+        Number of DTW computations
+    """
+    n = len(query)
+    kth = np.inf
+    if len(best) >= top_k:
+        kth = np.sort(best)[top_k - 1]
+
+    computed = 0
+    for w in np.argsort(bounds):
+        if bounds[w] >= kth:
+            break
+        slot = slots[w]
+        if bounds[w] >= best[slot]:
+            continue
+
+        limit = min(kth, best[slot]) * n
+        window = contours[starts[w]:starts[w] + n]
+        distance = _banded_dtw(query, window, means[w], band, limit) / n
+        computed += 1
+
+        if distance < best[slot]:
+            best[slot] = distance
+            best_start[slot] = starts[w]
+            best_scale[slot] = scale_index
+            if len(best) >= top_k:
+                kth = np.sort(best)[top_k - 1]
+
+    return computed
+
+
+def _keogh_envelope(query: np.ndarray, band: int):
+    """Running min/max of the query over ±band (LB_Keogh envelope)"""
+    padded = np.pad(query, band, mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * band + 1)
+    return windows.min(axis=1), windows.max(axis=1)
+
+
+def _center(windows: np.ndarray) -> np.ndarray:
+    """Remove the key: subtract each window's mean (the L2-optimal offset)"""
+    return windows - windows.mean(axis=-1, keepdims=True)
+
+
+# ===== INDEX =====
+
+class MelodyIndex:
+    def __init__(self, db_path: str = "songs.db", shortlist: int = 100, band_ratio: float = 0.1,
+                 window_hop: int = 4, tempo_scales=(1.0, 0.8, 1.25)):
+        """
+        Initialize MelodyIndex
+
+        Args:
+            db_path: SQLite database (songs + song_melodies)
+            shortlist: Songs kept after the n-gram stage for DTW re-ranking
+            band_ratio: Sakoe-Chiba band as a fraction of the query length
+            window_hop: Hop (contour samples) between candidate windows in a song (capped at the band)
+            tempo_scales: Query time-stretch factors tried against every window (most likely first)
+        """
+        self.db_path = db_path
+        self.shortlist = shortlist
+        self.band_ratio = band_ratio
+        self.window_hop = window_hop
+        self.tempo_scales = tempo_scales
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._data_version = None
+
+        self.contours: Dict[int, np.ndarray] = {}
+        self.postings: Dict[tuple, List[int]] = {}
+
+        self._init_table()
+
+    def _init_table(self):
+        with self._lock:
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS song_melodies (
+                    song_id INTEGER PRIMARY KEY,
+                    frame_rate REAL NOT NULL,
+                    contour BLOB NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+
+                CREATE TRIGGER IF NOT EXISTS songs_melody_ad AFTER DELETE ON songs
+                BEGIN
+                    DELETE FROM song_melodies WHERE song_id = old.id;
+                END;
+            ''')
+            self._conn.commit()
+
+    def __len__(self):
+        self.refresh()
+        return len(self.contours)
+
+    # ===== LOADING =====
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload contours + inverted index when the database changed"""
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if not force and version == self._data_version:
+                return False
+
+            contours = {}
+            postings = defaultdict(list)
+            for song_id, blob in self._conn.execute("SELECT song_id, contour FROM song_melodies ORDER BY song_id"):
+                contour = np.frombuffer(blob, dtype=np.float32)
+                contours[song_id] = contour
+                for gram in interval_ngrams(contour):
+                    postings[gram].append(song_id)
+
+            self.contours = contours
+            self.postings = dict(postings)
+            self._data_version = version
+            print(f"[MelodyIndex] Loaded {len(contours)} melodies, {len(postings)} n-grams")
+            return True
+
+    def add_melody(self, song_id: int, contour: np.ndarray, frame_rate: float = FRAME_RATE):
+        """Store (or replace) the melody contour of a song"""
+        contour = np.asarray(contour, dtype=np.float32)
+        with self._lock:
+            self._conn.execute(
+                '''INSERT OR REPLACE INTO song_melodies (song_id, frame_rate, contour, updated_at)
+                   VALUES (?, ?, ?, CURRENT_TIMESTAMP)''',
+                (song_id, frame_rate, contour.tobytes())
+            )
+            self._conn.commit()
+            # Own commits do not bump data_version on this connection
+            self._data_version = None
+
+    def add_track(self, song_id: int, track: PitchTrack) -> int:
+        """Store the melody of a song from its PitchTrack; returns contour length"""
+        contour = melody_from_track(track)
+        if len(contour):
+            self.add_melody(song_id, contour)
+        return len(contour)
+
+    # ===== SEARCH =====
+
+    def _shortlist(self, query: np.ndarray) -> List[int]:
+        """Songs sharing the most (idf-weighted) interval n-grams with the query"""
+        grams = interval_ngrams(query)
+        if not grams:
+            return list(self.contours)
+
+        total = max(len(self.contours), 1)
+        scores = defaultdict(float)
+        for gram in grams:
+            songs = self.postings.get(gram)
+            if not songs:
+                continue
+            idf = math.log(1.0 + total / len(songs))
+            for song_id in songs:
+                scores[song_id] += idf
+
+        if not scores:
+            return list(self.contours)
+        return heapq.nlargest(self.shortlist, scores, key=scores.get)
+
+    def search(self, query: np.ndarray, top_k: int = 5) -> Dict:
+        """
+        Identify a hummed contour
+
+        Args:
+            query: Semitone contour at FRAME_RATE (melody_from_track output)
+            top_k: Number of songs to return
+
+        Returns:
+            {'matches': [{'song_id', 'distance', 'score', 'offset_seconds', 'tempo_scale'}], 'stats': {...}}
+        """
+        start = time.perf_counter()
+        self.refresh()
+
+        query = np.asarray(query, dtype=np.float64)
+        stats = {'songs': len(self.contours), 'shortlisted': 0, 'windows': 0, 'dtw_computed': 0}
+        if len(query) < 4 or not self.contours:
+            stats['elapsed_ms'] = (time.perf_counter() - start) * 1000
+            return {'matches': [], 'stats': stats}
+
+        candidates = self._shortlist(query)
+        stats['shortlisted'] = len(candidates)
+
+        # Candidate songs back to back (CSR layout) for the kernels
+        contours = np.concatenate([self.contours[song_id] for song_id in candidates]).astype(np.float64)
+        song_offsets = np.concatenate([[0], np.cumsum([len(self.contours[song_id]) for song_id in candidates])])
+
+        best = np.full(len(candidates), np.inf)
+        best_start = np.zeros(len(candidates), dtype=np.int64)
+        best_scale = np.zeros(len(candidates), dtype=np.int64)
+
+        for scale_index, scale in enumerate(self.tempo_scales):
+            length = max(4, int(round(len(query) * scale)))
+            scaled = _center(np.interp(np.linspace(0, len(query) - 1, length), np.arange(len(query)), query))
+            band = max(1, int(round(length * self.band_ratio)))
+            lower, upper = _keogh_envelope(scaled, band)
+
+            slots, starts, means, bounds = _window_bounds(
+                contours, song_offsets, length, max(1, min(self.window_hop, band)), lower, upper
+            )
+            stats['windows'] += len(bounds)
+            stats['dtw_computed'] += int(_dtw_cascade(
+                scaled, contours, slots, starts, means, bounds, band, top_k,
+                scale_index, best, best_start, best_scale
+            ))
+
+        ranked = [slot for slot in np.argsort(best, kind='stable')[:top_k] if np.isfinite(best[slot])]
+        stats['elapsed_ms'] = (time.perf_counter() - start) * 1000
+
+        return {
+            'matches': [
+                {
+                    'song_id': int(candidates[slot]),
+                    'distance': float(best[slot]),
+                    'score': float(1.0 / (1.0 + best[slot])),
+                    'offset_seconds': float((best_start[slot] - song_offsets[slot]) / FRAME_RATE),
+                    'tempo_scale': float(self.tempo_scales[best_scale[slot]])
+                }
+                for slot in ranked
+            ],
+            'stats': stats
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ===== CLI =====
+
+def build(db_path: str = "songs.db", engine: str = 'fast_yin', force: bool = False) -> int:
+    """Extract and store melodies for songs with an audio file"""
+    import os
+    from pitch_detector import PitchDetector
+
+    index = MelodyIndex(db_path)
+    detector = PitchDetector(engine=engine)
+
+    with index._lock:
+        rows = index._conn.execute('''
+            SELECT songs.id, songs.title, songs.audio_path FROM songs
+            LEFT JOIN song_melodies ON song_melodies.song_id = songs.id
+            WHERE songs.audio_path IS NOT NULL AND (? OR song_melodies.song_id IS NULL)
+        ''', (force,)).fetchall()
+
+    added = 0
+    for song_id, title, audio_path in rows:
+        if not os.path.exists(audio_path):
+            print(f"⏭️  {title}: missing {audio_path}")
+            continue
+        result = detector.detect_pitch(audio_path)
+        if not result['success']:
+            print(f"❌ {title}: {result['error']}")
+            continue
+        length = index.add_track(song_id, result['track'])
+        print(f"✅ {title}: {length} contour samples")
+        added += 1
+
+    print(f"Done: {added} melodies added")
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query-by-humming melody index')
+    parser.add_argument('--db', default='songs.db')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Extract melodies for songs with audio')
+    build_parser.add_argument('--engine', default='fast_yin')
+    build_parser.add_argument('--force', action='store_true', help='Re-extract existing melodies')
+
+    query_parser = subparsers.add_parser('query', help='Identify a hummed recording')
+    query_parser.add_argument('audio')
+    query_parser.add_argument('--top', type=int, default=5)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        build(args.db, engine=args.engine, force=args.force)
+        return 0
+
+    from pitch_detector import PitchDetector
+    result = PitchDetector().detect_pitch(args.audio)
+    if not result['success']:
+        print(f"❌ {result['error']}")
+        return 1
+
+    index = MelodyIndex(args.db)
+    found = index.search(melody_from_track(result['track']), top_k=args.top)
+    for match in found['matches']:
+        print(f"  song {match['song_id']}: score {match['score']:.3f} @ {match['offset_seconds']:.1f}s")
+    print(found['stats'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Note Table
+
+Tabel note/MIDI/semitone yang dihitung sekali saat import dan dipakai bersama
+oleh VocalAnalyzer, key_utils dan transpose_audio:
+- Konversi Hz <-> MIDI dan MIDI -> nama note untuk scalar maupun array
+- Nama note selalu Mayor notation (sharp only, ASCII '#'): C C# D D# E F F# G G# A A# B
+- Parsing key/note (flat, unicode ♯/♭, E#/B#, suffix major/minor) lewat dict lookup
+"""
+
+import re
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+# Pitch class -> name (Mayor notation, sharp only)
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+NOTE_NAMES_ARRAY = np.array(NOTE_NAMES)
+
+A4_HZ = 440.0
+A4_MIDI = 69
+MIDI_MIN = 0
+MIDI_MAX = 127
+
+# MIDI number -> note name with octave ('C-1' ... 'G9')
+MIDI_NOTE_NAMES = np.array([
+    f"{NOTE_NAMES[midi % 12]}{midi // 12 - 1}" for midi in range(MIDI_MIN, MIDI_MAX + 1)
+])
+
+# MIDI number -> frequency (Hz)
+MIDI_HZ = A4_HZ * 2.0 ** ((np.arange(MIDI_MIN, MIDI_MAX + 1) - A4_MIDI) / 12.0)
+
+
+_NATURALS = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+_ACCIDENTALS = {'': 0, '#': 1, '♯': 1, 'b': -1, '♭': -1}
+_SCALE_SUFFIXES = {
+    '': None,
+    ' major': 'major', ' Major': 'major', ' maj': 'major', 'maj': 'major', 'M': 'major',
+    ' minor': 'minor', ' Minor': 'minor', ' min': 'minor', 'min': 'minor', 'm': 'minor'
+}
+
+# Spelling -> offset from C of the same octave ('Cb' = -1, 'B#' = 12)
+_SPELLING_OFFSETS = {
+    letter_case + accidental: base + offset
+    for letter, base in _NATURALS.items()
+    for letter_case in (letter, letter.lower())
+    for accidental, offset in _ACCIDENTALS.items()
+}
+
+# 'Bb' / 'A#' / 'a♯' -> 10
+SPELLING_TO_SEMITONE = {name: offset % 12 for name, offset in _SPELLING_OFFSETS.items()}
+
+# 'Bb major' / 'Am' / 'F#' -> (semitone, scale or None)
+_KEY_LOOKUP = {}
+for _name, _semitone in SPELLING_TO_SEMITONE.items():
+    for _suffix, _scale in _SCALE_SUFFIXES.items():
+        _KEY_LOOKUP.setdefault(_name + _suffix, (_semitone, _scale))
+
+# 'C#4' / 'Db4' / 'C♯4' -> 61 ('Cb4' = B3, 'B#3' = C4)
+NOTE_TO_MIDI = {
+    f"{name}{octave}": (octave + 1) * 12 + offset
+    for name, offset in _SPELLING_OFFSETS.items()
+    for octave in range(-1, 10)
+    if MIDI_MIN <= (octave + 1) * 12 + offset <= MIDI_MAX
+}
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+# ===== FREQUENCY / MIDI =====
+
+def hz_to_midi(hz):
+    """Hz -> fractional MIDI (scalar or array; non-positive -> NaN)"""
+    hz = np.asarray(hz, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        midi = 12.0 * np.log2(np.where(hz > 0, hz, np.nan) / A4_HZ) + A4_MIDI
+    return midi if midi.ndim else float(midi)
+
+
+def midi_to_hz(midi):
+    """Fractional MIDI -> Hz (scalar or array)"""
+    hz = A4_HZ * 2.0 ** ((np.asarray(midi, dtype=np.float64) - A4_MIDI) / 12.0)
+    return hz if hz.ndim else float(hz)
+
+
+def _midi_index(midi) -> np.ndarray:
+    return np.clip(np.rint(np.asarray(midi, dtype=np.float64)), MIDI_MIN, MIDI_MAX).astype(int)
+
+
+# ===== NAMES =====
+
+def midi_to_note(midi) -> Union[str, np.ndarray]:
+    """MIDI (rounded to nearest note) -> 'C#4' (scalar or array of names)"""
+    names = MIDI_NOTE_NAMES[_midi_index(midi)]
+    return str(names) if names.ndim == 0 else names
+
+
+def hz_to_note(hz) -> Union[str, np.ndarray]:
+    """Hz -> nearest note name (scalar or array)"""
+    return midi_to_note(hz_to_midi(hz))
+
+
+def pitch_class(midi):
+    """MIDI -> pitch class 0-11 of the nearest note (scalar or array)"""
+    classes = np.mod(np.rint(np.asarray(midi, dtype=np.float64)), 12).astype(int)
+    return classes if classes.ndim else int(classes)
+
+
+def semitone_to_key(semitone) -> Union[str, np.ndarray]:
+    """Semitone (any integer, wrapped mod 12) -> key name (scalar or array)"""
+    names = NOTE_NAMES_ARRAY[np.mod(np.asarray(semitone, dtype=int), 12)]
+    return str(names) if names.ndim == 0 else names
+
+
+# ===== PARSING =====
+
+def _clean(text: str) -> str:
+    return _WHITESPACE.sub(' ', text.strip())
+
+
+def parse_key(key_input: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Parse a key name
+
+    Args:
+        key_input: e.g. 'Bb major', 'F#', 'C♯ minor', 'Am', 'E#'
+
+    Returns:
+        (semitone 0-11, scale 'major'/'minor'/None), (None, None) if unknown
+    """
+    return _KEY_LOOKUP.get(_clean(key_input), (None, None))
+
+
+def key_to_semitone(key_input: str) -> Optional[int]:
+    """Key name -> semitone 0-11 (None if unknown)"""
+    return parse_key(key_input)[0]
+
+
+def normalize_key(key_input: str) -> Optional[str]:
+    """Key name -> Mayor notation ('Bb major' -> 'A#'), None if unknown"""
+    semitone = key_to_semitone(key_input)
+    return None if semitone is None else NOTE_NAMES[semitone]
+
+
+def note_to_midi(note: str) -> Optional[int]:
+    """Note with octave -> MIDI ('C#4' / 'Db4' -> 61), None if unknown"""
+    return NOTE_TO_MIDI.get(_clean(note))
+
+
+def normalize_note(note: str) -> str:
+    """Note with octave -> Mayor notation ('Db5' -> 'C#5'), unchanged if unknown"""
+    midi = note_to_midi(note)
+    return note if midi is None else str(MIDI_NOTE_NAMES[midi])
@@ -0,0 +1,182 @@
+"""
+Parallel Pitch Shift
+
+Satu transpose dikerjakan di semua core, bukan satu core saja:
+- Sinyal hasil decode disalin sekali ke shared memory; worker membaca
+  segmennya langsung dari situ (audio input tidak di-pickle per task)
+- Segmen overlap di-shift paralel di process pool (spawn) bersama konteks
+  kiri/kanan yang dibuang setelah shift, sama seperti streaming_shifter
+- Hasil disambung berurutan dengan equal-power crossfade
+- Pool dibuat sekali per proses dan dipakai ulang antar render; hanya dipakai
+  dari proses dengan entry module ringan (transpose_worker.py, benchmark),
+  karena proses spawn meng-import ulang __main__ proses induk
+- Akurasi vs render serial: benchmark_transpose.py
+"""
+
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from streaming_shifter import OverlapAdd, plan_segments, shift_segment
+from transpose_audio import engine_of, shift_pitch
+
+SEGMENTS_PER_WORKER = 2         # a little slack for uneven segment times
+MIN_SEGMENT_SECONDS = 5.0       # fewer, longer segments = fewer joins
+CONTEXT_SECONDS = 0.5           # extra input shifted on each side, then discarded
+CROSSFADE_SECONDS = 0.1         # overlap between consecutive segments
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def plan_parallel_segments(total: int, sr: int, workers: int, segment_seconds: Optional[float] = None,
+                           crossfade_seconds: float = CROSSFADE_SECONDS) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Segments parallel_shift_pitch() renders for a signal of total samples
+
+    Returns:
+        (segments from plan_segments(), crossfade samples)
+    """
+    if segment_seconds is None:
+        segment_seconds = max(MIN_SEGMENT_SECONDS, total / sr / (workers * SEGMENTS_PER_WORKER))
+    block = max(1, int(segment_seconds * sr))
+    crossfade = min(int(crossfade_seconds * sr), block)
+    return plan_segments(total, block, crossfade), crossfade
+
+
+def _shift_task(shm_name: str, total: int, lo: int, hi: int, lead: int, length: int, sr: int,
+                semitone_shift: int, preserve_formant: bool) -> Tuple[np.ndarray, str]:
+    """Shift samples [lo, hi) of the shared signal, keep [lo + lead, lo + lead + length) (runs in worker)"""
+    # Pool processes share the parent's resource tracker: attaching here
+    # doesn't add a second owner, the parent's unlink() cleans up
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        y = np.ndarray((total,), dtype=np.float32, buffer=shm.buf)[lo:hi].copy()
+    finally:
+        shm.close()
+    return shift_segment(y, lead, length, sr, semitone_shift, preserve_formant)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """This process's render pool (recreated when the size changes)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: pool processes must not inherit Flask/SQLite state. Spawn
+            # re-imports the parent's __main__, so never call this from app.py:
+            # job workers run from transpose_worker.py for exactly this reason
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+            print(f"[ParallelShift] Started render pool ({workers} processes)")
+        return _pool
+
+
+def shutdown_pool(wait: bool = False):
+    """
+    Stop this process's render pool (pending segments are cancelled)
+
+    Call with wait=True before a multiprocessing child returns: its exit
+    joins the pool processes before the atexit hooks would stop them.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+
+atexit.register(shutdown_pool)
+
+
+def parallel_shift_pitch(
+    y: np.ndarray,
+    sr: int,
+    semitone_shift: int,
+    preserve_formant: bool = True,
+    workers: Optional[int] = None,
+    segment_seconds: Optional[float] = None,
+    context_seconds: float = CONTEXT_SECONDS,
+    crossfade_seconds: float = CROSSFADE_SECONDS
+) -> Tuple[np.ndarray, str]:
+    """
+    shift_pitch() split over a process pool
+
+    Falls back to shift_pitch() for short signals (one segment), a single
+    worker, or daemonic processes (which may not start a pool).
+
+    Args:
+        y: Mono signal
+        sr: Sample rate
+        semitone_shift: Shift in semitones
+        preserve_formant: Formant preservation (same as shift_pitch)
+        workers: Pool processes (default: CPU count)
+        segment_seconds: Segment length (default: spread evenly, SEGMENTS_PER_WORKER
+            per worker, at least MIN_SEGMENT_SECONDS)
+        context_seconds: Extra input shifted on each side of a segment
+        crossfade_seconds: Overlap between consecutive segments
+
+    Returns:
+        (shifted_signal, method_used) - same length as y
+    """
+    workers = workers or multiprocessing.cpu_count()
+    y = np.ascontiguousarray(y, dtype=np.float32)
+    total = len(y)
+
+    segments, crossfade = plan_parallel_segments(total, sr, workers, segment_seconds, crossfade_seconds)
+    context = int(context_seconds * sr)
+
+    if workers <= 1 or len(segments) <= 1:
+        return shift_pitch(y, sr, semitone_shift, preserve_formant)
+    if multiprocessing.current_process().daemon:
+        print("⚠️ Daemonic process cannot start a render pool, shifting serially")
+        return shift_pitch(y, sr, semitone_shift, preserve_formant)
+
+    shm = shared_memory.SharedMemory(create=True, size=y.nbytes)
+    try:
+        np.ndarray(y.shape, dtype=np.float32, buffer=shm.buf)[:] = y
+
+        pool = _get_pool(workers)
+        futures = []
+        for start, stop in segments:
+            lo = max(0, start - context)
+            hi = min(total, stop + context)
+            futures.append(pool.submit(
+                _shift_task, shm.name, total, lo, hi, start - lo, stop - start,
+                sr, semitone_shift, preserve_formant
+            ))
+
+        # Join in order as segments finish (later ones keep rendering meanwhile)
+        joiner = OverlapAdd(crossfade)
+        output = np.empty(total, dtype=np.float32)
+        position = 0
+        method = None
+        for i, future in enumerate(futures):
+            shifted, segment_method = future.result()
+            # A segment that fell back to librosa makes the whole render a librosa one
+            if method is None or engine_of(segment_method) == 'librosa':
+                method = segment_method
+            part = joiner.push(shifted, last=i == len(futures) - 1)
+            output[position:position + len(part)] = part
+            position += len(part)
+    except BrokenProcessPool as e:
+        print(f"⚠️ Render pool crashed ({e}), shifting serially")
+        shutdown_pool()
+        return shift_pitch(y, sr, semitone_shift, preserve_formant)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    method_used = f"{method} ({len(segments)} segments, {workers} processes)"
+    print(f"   ✅ Using {method_used}")
+    return output, method_used
+
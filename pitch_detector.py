@@ -1,12 +1,18 @@
 """
 Pitch Detector using pYIN algorithm
+(engine lain bisa dipilih lewat pitch_engines, e.g. 'fast_yin')
 """
 
 import librosa
 import numpy as np
+import scipy.signal
+
+from pitch_engines import get_pitch_engine
+from pitch_track import PitchTrack
 
 class PitchDetector:
-    def __init__(self, sample_rate=16000, fmin=65.4, fmax=2093.0):
+    def __init__(self, sample_rate=16000, fmin=65.4, fmax=2093.0, engine='pyin', use_vad=True,
+                 adaptive_range=True):
         """
         Initialize PitchDetector
         
@@ -14,35 +20,82 @@ class PitchDetector:
             sample_rate: Target sample rate (default: 16000 Hz)
             fmin: Minimum frequency (default: 65.4 Hz = C2)
             fmax: Maximum frequency (default: 2093.0 Hz = C7)
+            engine: Default pitch engine ('pyin' or 'fast_yin')
+            use_vad: Skip silent regions (RMS/ZCR pre-pass) before pitch detection
+            adaptive_range: Narrow fmin/fmax to the singer's register (coarse first pass)
         """
         self.sample_rate = sample_rate
         self.fmin = fmin
         self.fmax = fmax
         self.frame_length = 2048
+        self.engine = get_pitch_engine(engine)
+        self.use_vad = use_vad
+        
+        # VAD settings (frames use the same hop as pitch detection)
+        self.vad_peak_db = -45.0        # Relative to loudest frame
+        self.vad_floor_ratio = 3.0      # x noise floor (10th percentile RMS)
+        self.vad_max_zcr = 0.35         # Above this = noise / fricatives
+        self.vad_min_gap = 5            # Merge regions separated by fewer frames
+        self.vad_min_region = 3         # Drop shorter regions (clicks)
+        self.vad_pad = 4                # Context frames on both sides of a region
+        
+        # Adaptive range settings (coarse autocorrelation pass)
+        self.adaptive_range = adaptive_range
+        self.range_margin = 5.0         # Semitones added below/above the coarse register
+        self.range_min_width = 24.0     # Never narrower than two octaves
+        self.range_min_frames = 5       # Voiced coarse frames needed to trust the estimate
         
         print("✅ PitchDetector initialized")
-        print(f"   - Algorithm: pYIN")
+        print(f"   - Algorithm: {self.engine.label}")
         print(f"   - Frequency range: {fmin} Hz - {fmax} Hz")
         print(f"   - Sample rate: {sample_rate} Hz")
+        print(f"   - VAD pre-pass: {'on' if use_vad else 'off'}")
+        print(f"   - Adaptive range: {'on' if adaptive_range else 'off'}")
     
-    def detect_pitch(self, audio_path):
+    def detect_pitch(self, audio_path, engine=None):
         """
         Detect pitch from audio file using pYIN algorithm
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file (or binary file object)
+            engine: Pitch engine name (default: engine set in __init__)
         
         Returns:
             dict with pitch detection results
         """
+        # Load audio
+        try:
+            y, sr = librosa.load(audio_path, sr=self.sample_rate, mono=True)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Failed to load audio file: {str(e)}'
+            }
+        
+        return self.detect_pitch_array(y, sr, engine=engine)
+    
+    def detect_pitch_array(self, y, sr, engine=None, use_vad=None, adaptive_range=None):
+        """
+        Detect pitch from already decoded audio
+        
+        Args:
+            y: Mono audio signal
+            sr: Sample rate of y
+            engine: Pitch engine name (default: engine set in __init__)
+            use_vad: Override VAD pre-pass (default: setting from __init__)
+            adaptive_range: Override adaptive fmin/fmax (default: setting from __init__)
+        
+        Returns:
+            dict with pitch detection results:
+            {'success': True, 'track': PitchTrack, 'metadata': {...}}
+        """
         try:
-            # Load audio
             try:
-                y, sr = librosa.load(audio_path, sr=self.sample_rate, mono=True)
-            except Exception as e:
+                pitch_engine = get_pitch_engine(engine) if engine else self.engine
+            except ValueError as e:
                 return {
                     'success': False,
-                    'error': f'Failed to load audio file: {str(e)}'
+                    'error': str(e)
                 }
             
             # Check if audio is too short
@@ -53,51 +106,69 @@ class PitchDetector:
                     'error': f'Audio too short: {duration:.2f}s (minimum 0.5s required)'
                 }
             
-            # Detect pitch using pYIN
+            if use_vad is None:
+                use_vad = self.use_vad
+            if adaptive_range is None:
+                adaptive_range = self.adaptive_range
+            
+            # Pass 1: coarse register estimate -> narrower fmin/fmax
+            if adaptive_range:
+                frequency_window = self._estimate_register(y, sr)
+            else:
+                frequency_window = {'fmin': self.fmin, 'fmax': self.fmax, 'adaptive': False}
+            fmin = frequency_window['fmin']
+            fmax = frequency_window['fmax']
+            
+            # Pass 2: pitch detection (pYIN by default), only inside voiced regions
             try:
-                pitches, voiced_flags, voiced_probs = librosa.pyin(
-                    y,
-                    fmin=self.fmin,
-                    fmax=self.fmax,
-                    sr=sr,
-                    frame_length=self.frame_length
-                )
+                if use_vad:
+                    pitches, voiced_flags, voiced_probs, vad_info = self._estimate_with_vad(
+                        pitch_engine, y, sr, fmin, fmax
+                    )
+                else:
+                    pitches, voiced_flags, voiced_probs = pitch_engine.estimate(
+                        y,
+                        sr=sr,
+                        fmin=fmin,
+                        fmax=fmax,
+                        frame_length=self.frame_length
+                    )
+                    vad_info = None
             except Exception as e:
                 return {
                     'success': False,
                     'error': f'Pitch detection failed: {str(e)}'
                 }
             
-            # Remove NaN values
-            valid_pitches = pitches[~np.isnan(pitches)]
+            track = PitchTrack(
+                pitches,
+                voiced_flags=voiced_flags,
+                voiced_probs=voiced_probs,
+                sample_rate=sr,
+                hop_length=self.frame_length // 4
+            )
+            valid_frames = track.valid_count
             
-            if len(valid_pitches) == 0:
+            if valid_frames == 0:
                 return {
                     'success': False,
                     'error': 'No pitch detected (audio might be noise or instrumental)'
                 }
             
-            # Calculate timestamps
-            hop_length = self.frame_length // 4
-            timestamps = librosa.frames_to_time(
-                np.arange(len(pitches)),
-                sr=sr,
-                hop_length=hop_length
-            )
-            
-            # Success
+            # Success (arrays stay in the PitchTrack; lists only via track.to_dict())
             return {
                 'success': True,
-                'pitches': pitches.tolist(),
-                'timestamps': timestamps.tolist(),
-                'voiced_flags': voiced_flags.tolist() if voiced_flags is not None else [],
-                'voiced_probs': voiced_probs.tolist() if voiced_probs is not None else [],
+                'track': track,
                 'metadata': {
                     'duration': duration,
                     'sample_rate': sr,
-                    'total_frames': len(pitches),
-                    'valid_frames': len(valid_pitches),
-                    'voiced_percentage': (len(valid_pitches) / len(pitches)) * 100
+                    'engine': pitch_engine.name,
+                    'algorithm': pitch_engine.label,
+                    'total_frames': len(track),
+                    'valid_frames': valid_frames,
+                    'voiced_percentage': (valid_frames / len(track)) * 100,
+                    'vad': vad_info,
+                    'frequency_window': frequency_window
                 }
             }
         
@@ -108,3 +179,193 @@ class PitchDetector:
                 'error': f'Unexpected error: {str(e)}',
                 'traceback': traceback.format_exc()
             }
+    
+    def _find_voiced_regions(self, y, sr):
+        """
+        Cheap RMS / zero-crossing VAD on the pitch frame grid
+        
+        Returns:
+            (regions, n_frames) where regions = [(start_frame, end_frame), ...]
+        """
+        hop_length = self.frame_length // 4
+        
+        rms = librosa.feature.rms(y=y, frame_length=self.frame_length, hop_length=hop_length)[0]
+        zcr = librosa.feature.zero_crossing_rate(y, frame_length=self.frame_length, hop_length=hop_length)[0]
+        n_frames = len(rms)
+        
+        peak = float(np.max(rms)) if n_frames else 0.0
+        if peak <= 0.0:
+            return [], n_frames
+        
+        noise_floor = float(np.percentile(rms, 10))
+        threshold = max(
+            peak * 10.0 ** (self.vad_peak_db / 20.0),
+            noise_floor * self.vad_floor_ratio,
+            1e-4
+        )
+        # Never reject the loudest part of the clip
+        threshold = min(threshold, peak * 0.5)
+        
+        active = (rms >= threshold) & (zcr <= self.vad_max_zcr)
+        
+        # Active frames -> [start, end) runs
+        edges = np.diff(np.concatenate([[0], active.astype(np.int8), [0]]))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        
+        regions = []
+        for start, end in zip(starts, ends):
+            if regions and start - regions[-1][1] < self.vad_min_gap:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((start, end))
+        
+        # Drop clicks, add context, merge overlaps
+        padded = []
+        for start, end in regions:
+            if end - start < self.vad_min_region:
+                continue
+            start = max(0, start - self.vad_pad)
+            end = min(n_frames, end + self.vad_pad)
+            if padded and start <= padded[-1][1]:
+                padded[-1] = (padded[-1][0], end)
+            else:
+                padded.append((start, end))
+        
+        return padded, n_frames
+    
+    def _estimate_with_vad(self, pitch_engine, y, sr, fmin, fmax):
+        """
+        Run the pitch engine only on voiced regions and stitch the
+        results back onto the full frame timeline
+        """
+        hop_length = self.frame_length // 4
+        regions, n_frames = self._find_voiced_regions(y, sr)
+        analyzed_frames = sum(end - start for start, end in regions)
+        
+        vad_info = {
+            'regions': len(regions),
+            'analyzed_frames': int(analyzed_frames),
+            'skipped_percentage': float((1 - analyzed_frames / n_frames) * 100) if n_frames else 0.0
+        }
+        
+        # Mostly voiced: one pass over the whole clip is cheaper
+        if analyzed_frames >= 0.9 * n_frames:
+            pitches, voiced_flags, voiced_probs = pitch_engine.estimate(
+                y, sr=sr, fmin=fmin, fmax=fmax, frame_length=self.frame_length
+            )
+            vad_info['analyzed_frames'] = int(len(pitches))
+            vad_info['skipped_percentage'] = 0.0
+            return pitches, voiced_flags, voiced_probs, vad_info
+        
+        pitches = np.full(n_frames, np.nan)
+        voiced_flags = np.zeros(n_frames, dtype=bool)
+        voiced_probs = np.zeros(n_frames)
+        
+        for start, end in regions:
+            # Frame i of the segment is centered on global frame start + i
+            segment = y[start * hop_length:end * hop_length]
+            if len(segment) < self.frame_length // 2:
+                continue
+            
+            seg_pitches, seg_flags, seg_probs = pitch_engine.estimate(
+                segment, sr=sr, fmin=fmin, fmax=fmax, frame_length=self.frame_length
+            )
+            count = min(end - start, len(seg_pitches))
+            pitches[start:start + count] = seg_pitches[:count]
+            voiced_flags[start:start + count] = seg_flags[:count]
+            voiced_probs[start:start + count] = seg_probs[:count]
+        
+        return pitches, voiced_flags, voiced_probs, vad_info
+    
+    def _estimate_register(self, y, sr):
+        """
+        Coarse first pass: decimated audio + normalized autocorrelation
+        to estimate the singer's register
+        
+        Returns:
+            dict with fmin/fmax for the second pass
+        """
+        full_window = {'fmin': self.fmin, 'fmax': self.fmax, 'adaptive': False}
+        
+        # Decimate to ~8 kHz (enough for a register estimate up to C7)
+        factor = max(1, int(sr // 8000))
+        if factor > 1:
+            y_coarse = scipy.signal.decimate(y, factor, ftype='fir', zero_phase=True)
+        else:
+            y_coarse = np.asarray(y)
+        sr_coarse = sr / factor
+        
+        frame_length = 1024
+        hop_length = 512
+        if len(y_coarse) < frame_length:
+            return full_window
+        
+        frames = librosa.util.frame(y_coarse, frame_length=frame_length, hop_length=hop_length).T
+        frames = frames - frames.mean(axis=1, keepdims=True)
+        
+        # Skip quiet frames (silence / breaths)
+        energy = np.sum(frames ** 2, axis=1)
+        loud = energy >= 0.05 * np.max(energy) if len(energy) else energy
+        frames = frames[loud]
+        if len(frames) < self.range_min_frames:
+            return full_window
+        
+        # Autocorrelation of all frames at once via FFT
+        n_fft = 2 * frame_length
+        spectrum = np.fft.rfft(frames, n=n_fft, axis=1)
+        acf = np.fft.irfft(np.abs(spectrum) ** 2, n=n_fft, axis=1)[:, :frame_length]
+        acf = acf / (acf[:, :1] + 1e-12)
+        
+        lag_min = max(2, int(np.floor(sr_coarse / self.fmax)))
+        lag_max = min(frame_length - 1, int(np.ceil(sr_coarse / self.fmin)))
+        if lag_max <= lag_min:
+            return full_window
+        
+        # Ignore the main lobe around lag 0 (up to the first zero crossing)
+        first_negative = np.argmax(acf < 0, axis=1)
+        lag_index = np.arange(frame_length)
+        candidates = np.where(
+            (lag_index >= np.maximum(first_negative, lag_min)[:, None]) & (lag_index < lag_max),
+            acf,
+            -np.inf
+        )
+        
+        # First lag reaching 90% of the best peak (avoids sub-octave errors)
+        peaks = np.max(candidates, axis=1)
+        lags = np.argmax(candidates >= 0.9 * peaks[:, None], axis=1)
+        voiced = (first_negative > 0) & (peaks >= 0.5)
+        if np.count_nonzero(voiced) < self.range_min_frames:
+            return full_window
+        
+        midi = librosa.hz_to_midi(sr_coarse / lags[voiced])
+        lo = float(np.percentile(midi, 5)) - self.range_margin
+        hi = float(np.percentile(midi, 95)) + self.range_margin
+        
+        # Keep at least range_min_width semitones around the register
+        if hi - lo < self.range_min_width:
+            center = (hi + lo) / 2
+            lo = center - self.range_min_width / 2
+            hi = center + self.range_min_width / 2
+        
+        # Slide the window back inside [self.fmin, self.fmax] instead of cutting it
+        midi_min = float(librosa.hz_to_midi(self.fmin))
+        midi_max = float(librosa.hz_to_midi(self.fmax))
+        if lo < midi_min:
+            hi += midi_min - lo
+            lo = midi_min
+        if hi > midi_max:
+            lo -= hi - midi_max
+            hi = midi_max
+        
+        fmin = max(self.fmin, float(librosa.midi_to_hz(lo)))
+        fmax = min(self.fmax, float(librosa.midi_to_hz(hi)))
+        if fmax <= fmin:
+            return full_window
+        
+        return {
+            'fmin': fmin,
+            'fmax': fmax,
+            'adaptive': True,
+            'coarse_median_hz': float(librosa.midi_to_hz(np.median(midi)))
+        }
@@ -0,0 +1,221 @@
+"""
+Pitch Engines
+
+Pluggable pitch estimation backends for PitchDetector.
+Every engine returns the same contract as librosa.pyin:
+    (pitches, voiced_flags, voiced_probs)
+with one frame per hop (center=True framing) and NaN for unvoiced frames.
+
+Engines:
+- 'pyin'     : librosa.pyin (HMM over the full fmin..fmax grid, most robust)
+- 'fast_yin' : numba-jitted probabilistic YIN (per-frame, several times faster)
+"""
+
+import librosa
+import numpy as np
+import scipy.stats
+from typing import Dict, Tuple
+
+# Try import numba (installed together with librosa)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    print("⚠️  numba not installed. fast_yin engine will run in pure Python (slow).")
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return decorator
+
+
+class PitchEngine:
+    """Base class for pitch estimation engines"""
+
+    name = 'base'
+    label = 'base'
+
+    def estimate(
+        self,
+        y: np.ndarray,
+        sr: int,
+        fmin: float,
+        fmax: float,
+        frame_length: int = 2048,
+        hop_length: int = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Estimate pitch for every frame
+
+        Returns:
+            (pitches, voiced_flags, voiced_probs)
+        """
+        raise NotImplementedError
+
+
+class PyinEngine(PitchEngine):
+    """librosa.pyin (reference engine)"""
+
+    name = 'pyin'
+    label = 'pYIN'
+
+    def estimate(self, y, sr, fmin, fmax, frame_length=2048, hop_length=None):
+        return librosa.pyin(
+            y,
+            fmin=fmin,
+            fmax=fmax,
+            sr=sr,
+            frame_length=frame_length,
+            hop_length=hop_length
+        )
+
+
+@njit(cache=True)
+def _fast_yin_kernel(y_padded, n_frames, frame_length, hop_length, win_length,
+                     tau_min, tau_max, thresholds, beta_probs, no_trough_prob):
+    """
+    Probabilistic YIN per frame
+
+    For each frame the cumulative mean normalized difference (CMND) is
+    computed directly over [1, tau_max]. Every threshold of the beta prior
+    votes for the first trough below it (pYIN stage 1); the trough with
+    the highest accumulated probability is the pitch candidate.
+    """
+    periods = np.zeros(n_frames)
+    voiced_probs = np.zeros(n_frames)
+    diff = np.zeros(tau_max + 1)
+    cmnd = np.ones(tau_max + 1)
+    trough_probs = np.zeros(tau_max + 1)
+
+    for f in range(n_frames):
+        start = f * hop_length
+
+        # Difference function
+        for tau in range(1, tau_max + 1):
+            acc = 0.0
+            for j in range(win_length):
+                d = y_padded[start + j] - y_padded[start + j + tau]
+                acc += d * d
+            diff[tau] = acc
+
+        # Cumulative mean normalized difference
+        running = 0.0
+        for tau in range(1, tau_max + 1):
+            running += diff[tau]
+            if running > 0.0:
+                cmnd[tau] = diff[tau] * tau / running
+            else:
+                cmnd[tau] = 1.0
+
+        # Threshold votes for the first trough below each threshold
+        for tau in range(tau_max + 1):
+            trough_probs[tau] = 0.0
+
+        global_min_tau = tau_min
+        for tau in range(tau_min, tau_max + 1):
+            if cmnd[tau] < cmnd[global_min_tau]:
+                global_min_tau = tau
+
+        for i in range(len(beta_probs)):
+            threshold = thresholds[i + 1]
+            found = -1
+            for tau in range(tau_min, tau_max + 1):
+                is_trough = True
+                if tau > tau_min and cmnd[tau] > cmnd[tau - 1]:
+                    is_trough = False
+                if tau < tau_max and cmnd[tau] > cmnd[tau + 1]:
+                    is_trough = False
+                if is_trough and cmnd[tau] < threshold:
+                    found = tau
+                    break
+            if found >= 0:
+                trough_probs[found] += beta_probs[i]
+            else:
+                trough_probs[global_min_tau] += beta_probs[i] * no_trough_prob
+
+        best_tau = tau_min
+        total = 0.0
+        for tau in range(tau_min, tau_max + 1):
+            total += trough_probs[tau]
+            if trough_probs[tau] > trough_probs[best_tau]:
+                best_tau = tau
+
+        # Parabolic interpolation around the chosen trough
+        period = float(best_tau)
+        if best_tau > tau_min and best_tau < tau_max:
+            a = cmnd[best_tau - 1]
+            b = cmnd[best_tau]
+            c = cmnd[best_tau + 1]
+            denom = a - 2.0 * b + c
+            if denom > 0.0:
+                period = best_tau + 0.5 * (a - c) / denom
+
+        periods[f] = period
+        voiced_probs[f] = min(total, 1.0)
+
+    return periods, voiced_probs
+
+
+class FastYinEngine(PitchEngine):
+    """numba-jitted probabilistic YIN (no HMM)"""
+
+    name = 'fast_yin'
+    label = 'fast YIN (numba)'
+
+    def __init__(self, n_thresholds: int = 100, beta_parameters=(2, 18),
+                 no_trough_prob: float = 0.01, voicing_threshold: float = 0.5):
+        self.no_trough_prob = no_trough_prob
+        self.voicing_threshold = voicing_threshold
+
+        # Beta prior over YIN thresholds (same as librosa.pyin)
+        self.thresholds = np.linspace(0, 1, n_thresholds + 1)
+        beta_cdf = scipy.stats.beta.cdf(self.thresholds, beta_parameters[0], beta_parameters[1])
+        self.beta_probs = np.diff(beta_cdf)
+
+    def estimate(self, y, sr, fmin, fmax, frame_length=2048, hop_length=None):
+        if hop_length is None:
+            hop_length = frame_length // 4
+
+        win_length = frame_length // 2
+        tau_min = max(1, int(np.floor(sr / fmax)))
+        tau_max = min(frame_length - win_length, int(np.ceil(sr / fmin)))
+
+        # center=True framing, identical frame count to librosa.pyin
+        y_padded = np.pad(np.asarray(y, dtype=np.float64), frame_length // 2, mode='constant')
+        n_frames = 1 + (len(y_padded) - frame_length) // hop_length
+
+        periods, voiced_probs = _fast_yin_kernel(
+            y_padded, n_frames, frame_length, hop_length, win_length,
+            tau_min, tau_max, self.thresholds, self.beta_probs, self.no_trough_prob
+        )
+
+        voiced_flags = voiced_probs >= self.voicing_threshold
+        pitches = np.where(voiced_flags, sr / periods, np.nan)
+
+        return pitches, voiced_flags, voiced_probs
+
+
+# ===== ENGINE REGISTRY =====
+
+PITCH_ENGINES: Dict[str, PitchEngine] = {
+    'pyin': PyinEngine(),
+    'fast_yin': FastYinEngine(),
+}
+
+
+def get_pitch_engine(name: str) -> PitchEngine:
+    """
+    Get pitch engine by name
+
+    Args:
+        name: Engine name ('pyin', 'fast_yin')
+
+    Returns:
+        PitchEngine instance
+    """
+    if name not in PITCH_ENGINES:
+        raise ValueError(f"Unknown pitch engine: {name} (available: {', '.join(PITCH_ENGINES)})")
+    return PITCH_ENGINES[name]
@@ -0,0 +1,126 @@
+"""
+PitchTrack
+
+Compact per-frame pitch data shared by PitchDetector, VocalAnalyzer and
+the batch/streaming pipelines without converting to Python lists.
+Lists are only produced by to_dict() at the API boundary.
+"""
+
+import json
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class PitchTrack:
+    __slots__ = ('pitches', 'voiced_flags', 'voiced_probs', 'sample_rate', 'hop_length', '_timestamps')
+
+    def __init__(
+        self,
+        pitches,
+        voiced_flags=None,
+        voiced_probs=None,
+        sample_rate: int = 16000,
+        hop_length: int = 512
+    ):
+        """
+        Args:
+            pitches: f0 per frame in Hz (NaN = unvoiced)
+            voiced_flags: Voicing decision per frame (default: not NaN)
+            voiced_probs: Voicing probability per frame (default: flags as 0/1)
+            sample_rate: Sample rate used for framing
+            hop_length: Hop between frames (samples)
+        """
+        # float32 / bool; np.asarray does not copy when dtype already matches
+        self.pitches = np.asarray(pitches, dtype=np.float32)
+
+        if voiced_flags is None:
+            voiced_flags = ~np.isnan(self.pitches)
+        self.voiced_flags = np.asarray(voiced_flags, dtype=bool)
+
+        if voiced_probs is None:
+            voiced_probs = self.voiced_flags
+        self.voiced_probs = np.asarray(voiced_probs, dtype=np.float32)
+
+        self.sample_rate = sample_rate
+        self.hop_length = hop_length
+        self._timestamps = None
+
+    def __len__(self):
+        return len(self.pitches)
+
+    def __repr__(self):
+        return f"PitchTrack(frames={len(self)}, voiced={self.valid_count}, sr={self.sample_rate})"
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Frame center times in seconds (computed on first access)"""
+        if self._timestamps is None:
+            self._timestamps = np.arange(len(self.pitches), dtype=np.float32) * np.float32(
+                self.hop_length / self.sample_rate
+            )
+        return self._timestamps
+
+    @property
+    def valid_mask(self) -> np.ndarray:
+        """Voiced frames with a pitch value"""
+        return self.voiced_flags & ~np.isnan(self.pitches)
+
+    @property
+    def valid_count(self) -> int:
+        return int(np.count_nonzero(self.valid_mask))
+
+    def voiced_pitches(self) -> np.ndarray:
+        """f0 of voiced frames only (single boolean-index copy)"""
+        return self.pitches[self.valid_mask]
+
+    # ===== SERIALIZATION (API boundary only) =====
+
+    def to_dict(self) -> Dict:
+        """JSON-ready dict (lists, NaN -> None)"""
+        pitches = self.pitches.astype(object)
+        pitches[np.isnan(self.pitches)] = None
+        return {
+            'pitches': pitches.tolist(),
+            'timestamps': self.timestamps.tolist(),
+            'voiced_flags': self.voiced_flags.tolist(),
+            'voiced_probs': self.voiced_probs.tolist(),
+            'sample_rate': self.sample_rate,
+            'hop_length': self.hop_length
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: Dict, sample_rate: Optional[int] = None, hop_length: int = 512) -> 'PitchTrack':
+        """
+        Build from a dict with 'pitches' (or 'f0') and optional voicing keys
+        (legacy PitchDetector output, to_dict() output)
+        """
+        if 'pitches' in data:
+            pitches = data['pitches']
+            voiced_flags = data.get('voiced_flags')
+        elif 'f0' in data:
+            pitches = data['f0']
+            voiced_flags = data.get('voiced_flag')
+        else:
+            raise ValueError("No pitch data found (expected 'f0' or 'pitches' key)")
+
+        if isinstance(pitches, list):
+            # JSON null -> NaN
+            pitches = [np.nan if p is None else p for p in pitches]
+
+        voiced_probs = data.get('voiced_probs')
+        if voiced_flags is not None and len(voiced_flags) == 0:
+            voiced_flags = None
+        if voiced_probs is not None and len(voiced_probs) == 0:
+            voiced_probs = None
+
+        return cls(
+            pitches,
+            voiced_flags=voiced_flags,
+            voiced_probs=voiced_probs,
+            sample_rate=sample_rate or data.get('sample_rate', 16000),
+            hop_length=data.get('hop_length', hop_length)
+        )
@@ -19,9 +19,9 @@ def populate_complete_database():
             'artist': 'The Beatles',
             'key_note': 'C',  # ✅ FIXED: key_note bukan keynote
             'scale': 'major',
-            'audiopath': 'songs/original/Let_It_Be_The_Beatles.mp3',
-            'vocalrangemin': 'C3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Let_It_Be_The_Beatles.mp3',
+            'vocal_range_min': 'C3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Easy',
             'genre': 'Rock'
         },
@@ -30,9 +30,9 @@ def populate_complete_database():
             'artist': 'John Lennon',
             'key_note': 'C',
             'scale': 'major',
-            'audiopath': 'songs/original/Imagine_John_Lennon.mp3',
-            'vocalrangemin': 'C3',
-            'vocalrangemax': 'A4',
+            'audio_path': 'songs/original/Imagine_John_Lennon.mp3',
+            'vocal_range_min': 'C3',
+            'vocal_range_max': 'A4',
             'difficulty': 'Easy',
             'genre': 'Pop'
         },
@@ -41,9 +41,9 @@ def populate_complete_database():
             'artist': 'Justin Bieber',
             'key_note': 'C',
             'scale': 'major',
-            'audiopath': 'songs/original/Love_Yourself_Justin_Bieber.mp3',
-            'vocalrangemin': 'E3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Love_Yourself_Justin_Bieber.mp3',
+            'vocal_range_min': 'E3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
@@ -54,9 +54,9 @@ def populate_complete_database():
             'artist': 'John Legend',
             'key_note': 'C#',
             'scale': 'major',
-            'audiopath': 'songs/original/All_of_Me_John_Legend.mp3',
-            'vocalrangemin': 'C#3',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/All_of_Me_John_Legend.mp3',
+            'vocal_range_min': 'C#3',
+            'vocal_range_max': 'E5',
             'difficulty': 'Hard',
             'genre': 'R&B'
         },
@@ -65,9 +65,9 @@ def populate_complete_database():
             'artist': 'A Great Big World',
             'key_note': 'C#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Say_Something_A_Great_Big_World.mp3',
-            'vocalrangemin': 'C#3',
-            'vocalrangemax': 'C#5',
+            'audio_path': 'songs/original/Say_Something_A_Great_Big_World.mp3',
+            'vocal_range_min': 'C#3',
+            'vocal_range_max': 'C#5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
@@ -76,9 +76,9 @@ def populate_complete_database():
             'artist': 'Snow Patrol',
             'key_note': 'C#',
             'scale': 'major',
-            'audiopath': 'songs/original/Chasing_Cars_Snow_Patrol.mp3',
-            'vocalrangemin': 'C#3',
-            'vocalrangemax': 'C#5',
+            'audio_path': 'songs/original/Chasing_Cars_Snow_Patrol.mp3',
+            'vocal_range_min': 'C#3',
+            'vocal_range_max': 'C#5',
             'difficulty': 'Easy',
             'genre': 'Rock'
         },
@@ -89,9 +89,9 @@ def populate_complete_database():
             'artist': 'Oasis',
             'key_note': 'D',
             'scale': 'major',
-            'audiopath': 'songs/original/Wonderwall_Oasis.mp3',
-            'vocalrangemin': 'D3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Wonderwall_Oasis.mp3',
+            'vocal_range_min': 'D3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Easy',
             'genre': 'Rock'
         },
@@ -100,9 +100,9 @@ def populate_complete_database():
             'artist': 'Eagles',
             'key_note': 'D',
             'scale': 'minor',
-            'audiopath': 'songs/original/Hotel_California_Eagles.mp3',
-            'vocalrangemin': 'B2',
-            'vocalrangemax': 'B4',
+            'audio_path': 'songs/original/Hotel_California_Eagles.mp3',
+            'vocal_range_min': 'B2',
+            'vocal_range_max': 'B4',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
@@ -111,9 +111,9 @@ def populate_complete_database():
             'artist': 'Ed Sheeran',
             'key_note': 'D',
             'scale': 'major',
-            'audiopath': 'songs/original/Thinking_Out_Loud_Ed_Sheeran.mp3',
-            'vocalrangemin': 'A2',
-            'vocalrangemax': 'D4',
+            'audio_path': 'songs/original/Thinking_Out_Loud_Ed_Sheeran.mp3',
+            'vocal_range_min': 'A2',
+            'vocal_range_max': 'D4',
             'difficulty': 'Easy',
             'genre': 'Pop'
         },
@@ -124,9 +124,9 @@ def populate_complete_database():
             'artist': 'Ed Sheeran',
             'key_note': 'D#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Shape_of_You_Ed_Sheeran.mp3',
-            'vocalrangemin': 'D#3',
-            'vocalrangemax': 'G4',
+            'audio_path': 'songs/original/Shape_of_You_Ed_Sheeran.mp3',
+            'vocal_range_min': 'D#3',
+            'vocal_range_max': 'G4',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
@@ -135,9 +135,9 @@ def populate_complete_database():
             'artist': 'Coldplay',
             'key_note': 'D#',
             'scale': 'major',
-            'audiopath': 'songs/original/Fix_You_Coldplay.mp3',
-            'vocalrangemin': 'D#3',
-            'vocalrangemax': 'G4',
+            'audio_path': 'songs/original/Fix_You_Coldplay.mp3',
+            'vocal_range_min': 'D#3',
+            'vocal_range_max': 'G4',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
@@ -146,9 +146,9 @@ def populate_complete_database():
             'artist': 'Coldplay',
             'key_note': 'D#',
             'scale': 'major',
-            'audiopath': 'songs/original/Viva_La_Vida_Coldplay.mp3',
-            'vocalrangemin': 'D#3',
-            'vocalrangemax': 'G4',
+            'audio_path': 'songs/original/Viva_La_Vida_Coldplay.mp3',
+            'vocal_range_min': 'D#3',
+            'vocal_range_max': 'G4',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
@@ -159,9 +159,9 @@ def populate_complete_database():
             'artist': 'Ben E. King',
             'key_note': 'E',
             'scale': 'major',
-            'audiopath': 'songs/original/Stand_By_Me_Ben_E_King.mp3',
-            'vocalrangemin': 'E3',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Stand_By_Me_Ben_E_King.mp3',
+            'vocal_range_min': 'E3',
+            'vocal_range_max': 'E5',
             'difficulty': 'Easy',
             'genre': 'Soul'
         },
@@ -170,9 +170,9 @@ def populate_complete_database():
             'artist': 'The Beatles',
             'key_note': 'E',
             'scale': 'major',
-            'audiopath': 'songs/original/Hey_Jude_The_Beatles.mp3',
-            'vocalrangemin': 'D3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Hey_Jude_The_Beatles.mp3',
+            'vocal_range_min': 'D3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
@@ -181,9 +181,9 @@ def populate_complete_database():
             'artist': 'Vance Joy',
             'key_note': 'E',
             'scale': 'minor',
-            'audiopath': 'songs/original/Riptide_Vance_Joy.mp3',
-            'vocalrangemin': 'E3',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Riptide_Vance_Joy.mp3',
+            'vocal_range_min': 'E3',
+            'vocal_range_max': 'E5',
             'difficulty': 'Easy',
             'genre': 'Folk'
         },
@@ -194,9 +194,9 @@ def populate_complete_database():
             'artist': 'Leonard Cohen',
             'key_note': 'F',
             'scale': 'major',
-            'audiopath': 'songs/original/Hallelujah_Leonard_Cohen.mp3',
-            'vocalrangemin': 'F3',
-            'vocalrangemax': 'F5',
+            'audio_path': 'songs/original/Hallelujah_Leonard_Cohen.mp3',
+            'vocal_range_min': 'F3',
+            'vocal_range_max': 'F5',
             'difficulty': 'Medium',
             'genre': 'Folk'
         },
@@ -205,9 +205,9 @@ def populate_complete_database():
             'artist': 'Ed Sheeran',
             'key_note': 'F',
             'scale': 'major',
-            'audiopath': 'songs/original/Perfect_Ed_Sheeran.mp3',
-            'vocalrangemin': 'F3',
-            'vocalrangemax': 'Bb4',
+            'audio_path': 'songs/original/Perfect_Ed_Sheeran.mp3',
+            'vocal_range_min': 'F3',
+            'vocal_range_max': 'Bb4',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
@@ -216,9 +216,9 @@ def populate_complete_database():
             'artist': 'Elvis Presley',
             'key_note': 'F',
             'scale': 'major',
-            'audiopath': 'songs/original/Cant_Help_Falling_In_Love_Elvis_Presley.mp3',
-            'vocalrangemin': 'F3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Cant_Help_Falling_In_Love_Elvis_Presley.mp3',
+            'vocal_range_min': 'F3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Easy',
             'genre': 'Pop'
         },
@@ -229,9 +229,9 @@ def populate_complete_database():
             'artist': 'The Weeknd',
             'key_note': 'F#',
             'scale': 'major',
-            'audiopath': 'songs/original/Blinding_Lights_The_Weeknd.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'C#5',
+            'audio_path': 'songs/original/Blinding_Lights_The_Weeknd.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'C#5',
             'difficulty': 'Hard',
             'genre': 'Synthpop'
         },
@@ -240,9 +240,9 @@ def populate_complete_database():
             'artist': 'Bruno Mars',
             'key_note': 'F#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Uptown_Funk_Bruno_Mars.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Uptown_Funk_Bruno_Mars.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Hard',
             'genre': 'Funk'
         },
@@ -251,9 +251,9 @@ def populate_complete_database():
             'artist': 'Dua Lipa',
             'key_note': 'F#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Levitating_Dua_Lipa.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'F#5',
+            'audio_path': 'songs/original/Levitating_Dua_Lipa.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'F#5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
@@ -264,9 +264,9 @@ def populate_complete_database():
             'artist': 'Adele',
             'key_note': 'G',
             'scale': 'major',
-            'audiopath': 'songs/original/Someone_Like_You_Adele.mp3',
-            'vocalrangemin': 'E3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Someone_Like_You_Adele.mp3',
+            'vocal_range_min': 'E3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
@@ -275,9 +275,9 @@ def populate_complete_database():
             'artist': 'The Beatles',
             'key_note': 'G',
             'scale': 'major',
-            'audiopath': 'songs/original/Yesterday_The_Beatles.mp3',
-            'vocalrangemin': 'G3',
-            'vocalrangemax': 'G5',
+            'audio_path': 'songs/original/Yesterday_The_Beatles.mp3',
+            'vocal_range_min': 'G3',
+            'vocal_range_max': 'G5',
             'difficulty': 'Easy',
             'genre': 'Pop'
         },
@@ -286,9 +286,9 @@ def populate_complete_database():
             'artist': 'Green Day',
             'key_note': 'G',
             'scale': 'minor',
-            'audiopath': 'songs/original/Boulevard_of_Broken_Dreams_Green_Day.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Boulevard_of_Broken_Dreams_Green_Day.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
@@ -299,9 +299,9 @@ def populate_complete_database():
             'artist': 'Lady Gaga & Bradley Cooper',
             'key_note': 'G#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Shallow_Lady_Gaga__Bradley_Cooper.mp3',
-            'vocalrangemin': 'G#3',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Shallow_Lady_Gaga__Bradley_Cooper.mp3',
+            'vocal_range_min': 'G#3',
+            'vocal_range_max': 'E5',
             'difficulty': 'Hard',
             'genre': 'Pop'
         },
@@ -310,9 +310,9 @@ def populate_complete_database():
             'artist': 'Lady Gaga',
             'key_note': 'G#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Poker_Face_Lady_Gaga.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'C#5',
+            'audio_path': 'songs/original/Poker_Face_Lady_Gaga.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'C#5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
@@ -321,9 +321,9 @@ def populate_complete_database():
             'artist': 'Lady Gaga',
             'key_note': 'G#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Bad_Romance_Lady_Gaga.mp3',
-            'vocalrangemin': 'G#3',
-            'vocalrangemax': 'F5',
+            'audio_path': 'songs/original/Bad_Romance_Lady_Gaga.mp3',
+            'vocal_range_min': 'G#3',
+            'vocal_range_max': 'F5',
             'difficulty': 'Hard',
             'genre': 'Pop'
         },
@@ -334,9 +334,9 @@ def populate_complete_database():
             'artist': 'Radiohead',
             'key_note': 'A',
             'scale': 'major',
-            'audiopath': 'songs/original/Creep_Radiohead.mp3',
-            'vocalrangemin': 'A2',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Creep_Radiohead.mp3',
+            'vocal_range_min': 'A2',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
@@ -345,9 +345,9 @@ def populate_complete_database():
             'artist': 'Bob Marley',
             'key_note': 'A',
             'scale': 'major',
-            'audiopath': 'songs/original/No_Woman_No_Cry_Bob_Marley.mp3',
-            'vocalrangemin': 'A2',
-            'vocalrangemax': 'A4',
+            'audio_path': 'songs/original/No_Woman_No_Cry_Bob_Marley.mp3',
+            'vocal_range_min': 'A2',
+            'vocal_range_max': 'A4',
             'difficulty': 'Easy',
             'genre': 'Reggae'
         },
@@ -356,9 +356,9 @@ def populate_complete_database():
             'artist': 'Nirvana',
             'key_note': 'A',
             'scale': 'minor',
-            'audiopath': 'songs/original/Smells_Like_Teen_Spirit_Nirvana.mp3',
-            'vocalrangemin': 'F3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Smells_Like_Teen_Spirit_Nirvana.mp3',
+            'vocal_range_min': 'F3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Grunge'
         },
@@ -369,9 +369,9 @@ def populate_complete_database():
             'artist': 'Adele',
             'key_note': 'A#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Rolling_in_the_Deep_Adele.mp3',
-            'vocalrangemin': 'A#3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Rolling_in_the_Deep_Adele.mp3',
+            'vocal_range_min': 'A#3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Hard',
             'genre': 'Soul'
         },
@@ -380,9 +380,9 @@ def populate_complete_database():
             'artist': 'Sam Smith',
             'key_note': 'A#',
             'scale': 'major',
-            'audiopath': 'songs/original/Stay_With_Me_Sam_Smith.mp3',
-            'vocalrangemin': 'A#2',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Stay_With_Me_Sam_Smith.mp3',
+            'vocal_range_min': 'A#2',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Soul'
         },
@@ -391,9 +391,9 @@ def populate_complete_database():
             'artist': 'Miley Cyrus',
             'key_note': 'A#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Wrecking_Ball_Miley_Cyrus.mp3',
-            'vocalrangemin': 'A#3',
-            'vocalrangemax': 'F5',
+            'audio_path': 'songs/original/Wrecking_Ball_Miley_Cyrus.mp3',
+            'vocal_range_min': 'A#3',
+            'vocal_range_max': 'F5',
             'difficulty': 'Hard',
             'genre': 'Pop'
         },
@@ -404,9 +404,9 @@ def populate_complete_database():
             'artist': 'Queen',
             'key_note': 'B',
             'scale': 'major',
-            'audiopath': 'songs/original/Bohemian_Rhapsody_Various_Artist.mp3',
-            'vocalrangemin': 'B2',
-            'vocalrangemax': 'B4',
+            'audio_path': 'songs/original/Bohemian_Rhapsody_Various_Artist.mp3',
+            'vocal_range_min': 'B2',
+            'vocal_range_max': 'B4',
             'difficulty': 'Hard',
             'genre': 'Rock'
         },
@@ -415,9 +415,9 @@ def populate_complete_database():
             'artist': 'Journey',
             'key_note': 'B',
             'scale': 'major',
-            'audiopath': 'songs/original/Dont_Stop_Believin_Journey.mp3',
-            'vocalrangemin': 'B2',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Dont_Stop_Believin_Journey.mp3',
+            'vocal_range_min': 'B2',
+            'vocal_range_max': 'E5',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
@@ -426,9 +426,9 @@ def populate_complete_database():
             'artist': 'Bon Jovi',
             'key_note': 'B',
             'scale': 'minor',
-            'audiopath': 'songs/original/Livin_on_a_Prayer_Bon_Jovi.mp3',
-            'vocalrangemin': 'B2',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Livin_on_a_Prayer_Bon_Jovi.mp3',
+            'vocal_range_min': 'B2',
+            'vocal_range_max': 'E5',
             'difficulty': 'Hard',
             'genre': 'Rock'
         },
@@ -442,33 +442,18 @@ def populate_complete_database():
     
     # Statistics
     keys_count = {}
-    added_count = 0
-    skipped_count = 0
-    
     for song in complete_songs:
-        # Track key statistics
         key = song['key_note']  # ✅ FIXED
         keys_count[key] = keys_count.get(key, 0) + 1
-        
-        # Check if song already exists
-        existing = db.get_song_by_title(song['title'])
-        if existing:
-            print(f"⏭️  Skipped: {song['title']} - already exists")
-            skipped_count += 1
-        else:
-            try:
-                song_id = db.add_song(**song)
-                print(f"✅ Added: {song['title']} by {song['artist']} (Key: {song['key_note']}) - ID: {song_id}")
-                added_count += 1
-            except Exception as e:
-                print(f"❌ Error adding {song['title']}: {str(e)}")
     
-    print()
+    # One transaction; songs already in the database (same title + artist) are left as is
+    counts = db.bulk_upsert(complete_songs, update_existing=False)
+    
     print("=" * 70)
     print("📊 DATABASE STATISTICS")
     print("=" * 70)
-    print(f"✅ Songs added: {added_count}")
-    print(f"⏭️  Songs skipped: {skipped_count}")
+    print(f"✅ Songs added: {counts['inserted']}")
+    print(f"⏭️  Songs skipped: {counts['existing']} (already exist)")
     print()
     
     # Songs per key
@@ -17,33 +17,33 @@ def populate_complete_database():
         {
             'title': 'Let It Be',
             'artist': 'The Beatles',
-            'keynote': 'C',
+            'key_note': 'C',
             'scale': 'major',
-            'audiopath': 'songs/original/Let_It_Be_The_Beatles.mp3',
-            'vocalrangemin': 'C3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Let_It_Be_The_Beatles.mp3',
+            'vocal_range_min': 'C3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Easy',
             'genre': 'Rock'
         },
         {
             'title': 'Imagine',
             'artist': 'John Lennon',
-            'keynote': 'C',
+            'key_note': 'C',
             'scale': 'major',
-            'audiopath': 'songs/original/Imagine_John_Lennon.mp3',
-            'vocalrangemin': 'C3',
-            'vocalrangemax': 'A4',
+            'audio_path': 'songs/original/Imagine_John_Lennon.mp3',
+            'vocal_range_min': 'C3',
+            'vocal_range_max': 'A4',
             'difficulty': 'Easy',
             'genre': 'Pop'
         },
         {
             'title': 'Love Yourself',
             'artist': 'Justin Bieber',
-            'keynote': 'C',
+            'key_note': 'C',
             'scale': 'major',
-            'audiopath': 'songs/original/Love_Yourself_Justin_Bieber.mp3',
-            'vocalrangemin': 'E3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Love_Yourself_Justin_Bieber.mp3',
+            'vocal_range_min': 'E3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
@@ -52,33 +52,33 @@ def populate_complete_database():
         {
             'title': 'All of Me',
             'artist': 'John Legend',
-            'keynote': 'C#',
+            'key_note': 'C#',
             'scale': 'major',
-            'audiopath': 'songs/original/All_of_Me_John_Legend.mp3',
-            'vocalrangemin': 'C#3',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/All_of_Me_John_Legend.mp3',
+            'vocal_range_min': 'C#3',
+            'vocal_range_max': 'E5',
             'difficulty': 'Hard',
             'genre': 'R&B'
         },
         {
             'title': 'Say Something',
             'artist': 'A Great Big World',
-            'keynote': 'C#',
+            'key_note': 'C#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Say_Something_A_Great_Big_World.mp3',
-            'vocalrangemin': 'C#3',
-            'vocalrangemax': 'C#5',
+            'audio_path': 'songs/original/Say_Something_A_Great_Big_World.mp3',
+            'vocal_range_min': 'C#3',
+            'vocal_range_max': 'C#5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
         {
             'title': 'Chasing Cars',
             'artist': 'Snow Patrol',
-            'keynote': 'C#',
+            'key_note': 'C#',
             'scale': 'major',
-            'audiopath': 'songs/original/Chasing_Cars_Snow_Patrol.mp3',
-            'vocalrangemin': 'C#3',
-            'vocalrangemax': 'C#5',
+            'audio_path': 'songs/original/Chasing_Cars_Snow_Patrol.mp3',
+            'vocal_range_min': 'C#3',
+            'vocal_range_max': 'C#5',
             'difficulty': 'Easy',
             'genre': 'Rock'
         },
@@ -87,33 +87,33 @@ def populate_complete_database():
         {
             'title': 'Wonderwall',
             'artist': 'Oasis',
-            'keynote': 'D',
+            'key_note': 'D',
             'scale': 'major',
-            'audiopath': 'songs/original/Wonderwall_Oasis.mp3',
-            'vocalrangemin': 'D3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Wonderwall_Oasis.mp3',
+            'vocal_range_min': 'D3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Easy',
             'genre': 'Rock'
         },
         {
             'title': 'Hotel California',
             'artist': 'Eagles',
-            'keynote': 'D',
+            'key_note': 'D',
             'scale': 'minor',
-            'audiopath': 'songs/original/Hotel_California_Eagles.mp3',
-            'vocalrangemin': 'B2',
-            'vocalrangemax': 'B4',
+            'audio_path': 'songs/original/Hotel_California_Eagles.mp3',
+            'vocal_range_min': 'B2',
+            'vocal_range_max': 'B4',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
         {
             'title': 'Thinking Out Loud',
             'artist': 'Ed Sheeran',
-            'keynote': 'D',
+            'key_note': 'D',
             'scale': 'major',
-            'audiopath': 'songs/original/Thinking_Out_Loud_Ed_Sheeran.mp3',
-            'vocalrangemin': 'A2',
-            'vocalrangemax': 'D4',
+            'audio_path': 'songs/original/Thinking_Out_Loud_Ed_Sheeran.mp3',
+            'vocal_range_min': 'A2',
+            'vocal_range_max': 'D4',
             'difficulty': 'Easy',
             'genre': 'Pop'
         },
@@ -122,33 +122,33 @@ def populate_complete_database():
         {
             'title': 'Shape of You',
             'artist': 'Ed Sheeran',
-            'keynote': 'D#',
+            'key_note': 'D#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Shape_of_You_Ed_Sheeran.mp3',
-            'vocalrangemin': 'D#3',
-            'vocalrangemax': 'G4',
+            'audio_path': 'songs/original/Shape_of_You_Ed_Sheeran.mp3',
+            'vocal_range_min': 'D#3',
+            'vocal_range_max': 'G4',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
         {
             'title': 'Fix You',
             'artist': 'Coldplay',
-            'keynote': 'D#',
+            'key_note': 'D#',
             'scale': 'major',
-            'audiopath': 'songs/original/Fix_You_Coldplay.mp3',
-            'vocalrangemin': 'D#3',
-            'vocalrangemax': 'G4',
+            'audio_path': 'songs/original/Fix_You_Coldplay.mp3',
+            'vocal_range_min': 'D#3',
+            'vocal_range_max': 'G4',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
         {
             'title': 'Viva La Vida',
             'artist': 'Coldplay',
-            'keynote': 'D#',
+            'key_note': 'D#',
             'scale': 'major',
-            'audiopath': 'songs/original/Viva_La_Vida_Coldplay.mp3',
-            'vocalrangemin': 'D#3',
-            'vocalrangemax': 'G4',
+            'audio_path': 'songs/original/Viva_La_Vida_Coldplay.mp3',
+            'vocal_range_min': 'D#3',
+            'vocal_range_max': 'G4',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
@@ -157,33 +157,33 @@ def populate_complete_database():
         {
             'title': 'Stand By Me',
             'artist': 'Ben E. King',
-            'keynote': 'E',
+            'key_note': 'E',
             'scale': 'major',
-            'audiopath': 'songs/original/Stand_By_Me_Ben_E_King.mp3',
-            'vocalrangemin': 'E3',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Stand_By_Me_Ben_E_King.mp3',
+            'vocal_range_min': 'E3',
+            'vocal_range_max': 'E5',
             'difficulty': 'Easy',
             'genre': 'Soul'
         },
         {
             'title': 'Hey Jude',
             'artist': 'The Beatles',
-            'keynote': 'E',
+            'key_note': 'E',
             'scale': 'major',
-            'audiopath': 'songs/original/Hey_Jude_The_Beatles.mp3',
-            'vocalrangemin': 'D3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Hey_Jude_The_Beatles.mp3',
+            'vocal_range_min': 'D3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
         {
             'title': 'Riptide',
             'artist': 'Vance Joy',
-            'keynote': 'E',
+            'key_note': 'E',
             'scale': 'minor',
-            'audiopath': 'songs/original/Riptide_Vance_Joy.mp3',
-            'vocalrangemin': 'E3',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Riptide_Vance_Joy.mp3',
+            'vocal_range_min': 'E3',
+            'vocal_range_max': 'E5',
             'difficulty': 'Easy',
             'genre': 'Folk'
         },
@@ -192,33 +192,33 @@ def populate_complete_database():
         {
             'title': 'Hallelujah',
             'artist': 'Leonard Cohen',
-            'keynote': 'F',
+            'key_note': 'F',
             'scale': 'major',
-            'audiopath': 'songs/original/Hallelujah_Leonard_Cohen.mp3',
-            'vocalrangemin': 'F3',
-            'vocalrangemax': 'F5',
+            'audio_path': 'songs/original/Hallelujah_Leonard_Cohen.mp3',
+            'vocal_range_min': 'F3',
+            'vocal_range_max': 'F5',
             'difficulty': 'Medium',
             'genre': 'Folk'
         },
         {
             'title': 'Perfect',
             'artist': 'Ed Sheeran',
-            'keynote': 'F',
+            'key_note': 'F',
             'scale': 'major',
-            'audiopath': 'songs/original/Perfect_Ed_Sheeran.mp3',
-            'vocalrangemin': 'F3',
-            'vocalrangemax': 'Bb4',
+            'audio_path': 'songs/original/Perfect_Ed_Sheeran.mp3',
+            'vocal_range_min': 'F3',
+            'vocal_range_max': 'Bb4',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
         {
             'title': 'Can\'t Help Falling in Love',
             'artist': 'Elvis Presley',
-            'keynote': 'F',
+            'key_note': 'F',
             'scale': 'major',
-            'audiopath': 'songs/original/Cant_Help_Falling_In_Love_Elvis_Presley.mp3',
-            'vocalrangemin': 'F3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Cant_Help_Falling_In_Love_Elvis_Presley.mp3',
+            'vocal_range_min': 'F3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Easy',
             'genre': 'Pop'
         },
@@ -227,33 +227,33 @@ def populate_complete_database():
         {
             'title': 'Blinding Lights',
             'artist': 'The Weeknd',
-            'keynote': 'F#',
+            'key_note': 'F#',
             'scale': 'major',
-            'audiopath': 'songs/original/Blinding_Lights_The_Weeknd.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'C#5',
+            'audio_path': 'songs/original/Blinding_Lights_The_Weeknd.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'C#5',
             'difficulty': 'Hard',
             'genre': 'Synthpop'
         },
         {
             'title': 'Uptown Funk',
             'artist': 'Bruno Mars',
-            'keynote': 'F#',
+            'key_note': 'F#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Uptown_Funk_Bruno_Mars.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Uptown_Funk_Bruno_Mars.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Hard',
             'genre': 'Funk'
         },
         {
             'title': 'Levitating',
             'artist': 'Dua Lipa',
-            'keynote': 'F#',
+            'key_note': 'F#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Levitating_Dua_Lipa.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'F#5',
+            'audio_path': 'songs/original/Levitating_Dua_Lipa.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'F#5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
@@ -262,33 +262,33 @@ def populate_complete_database():
         {
             'title': 'Someone Like You',
             'artist': 'Adele',
-            'keynote': 'G',
+            'key_note': 'G',
             'scale': 'major',
-            'audiopath': 'songs/original/Someone_Like_You_Adele.mp3',
-            'vocalrangemin': 'E3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Someone_Like_You_Adele.mp3',
+            'vocal_range_min': 'E3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
         {
             'title': 'Yesterday',
             'artist': 'The Beatles',
-            'keynote': 'G',
+            'key_note': 'G',
             'scale': 'major',
-            'audiopath': 'songs/original/Yesterday_The_Beatles.mp3',
-            'vocalrangemin': 'G3',
-            'vocalrangemax': 'G5',
+            'audio_path': 'songs/original/Yesterday_The_Beatles.mp3',
+            'vocal_range_min': 'G3',
+            'vocal_range_max': 'G5',
             'difficulty': 'Easy',
             'genre': 'Pop'
         },
         {
             'title': 'Boulevard of Broken Dreams',
             'artist': 'Green Day',
-            'keynote': 'G',
+            'key_note': 'G',
             'scale': 'minor',
-            'audiopath': 'songs/original/Boulevard_of_Broken_Dreams_Green_Day.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Boulevard_of_Broken_Dreams_Green_Day.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
@@ -297,33 +297,33 @@ def populate_complete_database():
         {
             'title': 'Shallow',
             'artist': 'Lady Gaga & Bradley Cooper',
-            'keynote': 'G#',
+            'key_note': 'G#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Shallow_Lady_Gaga__Bradley_Cooper.mp3',
-            'vocalrangemin': 'G#3',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Shallow_Lady_Gaga__Bradley_Cooper.mp3',
+            'vocal_range_min': 'G#3',
+            'vocal_range_max': 'E5',
             'difficulty': 'Hard',
             'genre': 'Pop'
         },
         {
             'title': 'Poker Face',
             'artist': 'Lady Gaga',
-            'keynote': 'G#',
+            'key_note': 'G#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Poker_Face_Lady_Gaga.mp3',
-            'vocalrangemin': 'F#3',
-            'vocalrangemax': 'C#5',
+            'audio_path': 'songs/original/Poker_Face_Lady_Gaga.mp3',
+            'vocal_range_min': 'F#3',
+            'vocal_range_max': 'C#5',
             'difficulty': 'Medium',
             'genre': 'Pop'
         },
         {
             'title': 'Bad Romance',
             'artist': 'Lady Gaga',
-            'keynote': 'G#',
+            'key_note': 'G#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Bad_Romance_Lady_Gaga.mp3',
-            'vocalrangemin': 'G#3',
-            'vocalrangemax': 'F5',
+            'audio_path': 'songs/original/Bad_Romance_Lady_Gaga.mp3',
+            'vocal_range_min': 'G#3',
+            'vocal_range_max': 'F5',
             'difficulty': 'Hard',
             'genre': 'Pop'
         },
@@ -332,33 +332,33 @@ def populate_complete_database():
         {
             'title': 'Creep',
             'artist': 'Radiohead',
-            'keynote': 'A',
+            'key_note': 'A',
             'scale': 'major',
-            'audiopath': 'songs/original/Creep_Radiohead.mp3',
-            'vocalrangemin': 'A2',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Creep_Radiohead.mp3',
+            'vocal_range_min': 'A2',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
         {
             'title': 'No Woman No Cry',
             'artist': 'Bob Marley',
-            'keynote': 'A',
+            'key_note': 'A',
             'scale': 'major',
-            'audiopath': 'songs/original/No_Woman_No_Cry_Bob_Marley.mp3',
-            'vocalrangemin': 'A2',
-            'vocalrangemax': 'A4',
+            'audio_path': 'songs/original/No_Woman_No_Cry_Bob_Marley.mp3',
+            'vocal_range_min': 'A2',
+            'vocal_range_max': 'A4',
             'difficulty': 'Easy',
             'genre': 'Reggae'
         },
         {
             'title': 'Smells Like Teen Spirit',
             'artist': 'Nirvana',
-            'keynote': 'A',
+            'key_note': 'A',
             'scale': 'minor',
-            'audiopath': 'songs/original/Smells_Like_Teen_Spirit_Nirvana.mp3',
-            'vocalrangemin': 'F3',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Smells_Like_Teen_Spirit_Nirvana.mp3',
+            'vocal_range_min': 'F3',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Grunge'
         },
@@ -367,33 +367,33 @@ def populate_complete_database():
         {
             'title': 'Rolling in the Deep',
             'artist': 'Adele',
-            'keynote': 'A#',
+            'key_note': 'A#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Rolling_in_the_Deep_Adele.mp3',
-            'vocalrangemin': 'A#3',
-            'vocalrangemax': 'D5',
+            'audio_path': 'songs/original/Rolling_in_the_Deep_Adele.mp3',
+            'vocal_range_min': 'A#3',
+            'vocal_range_max': 'D5',
             'difficulty': 'Hard',
             'genre': 'Soul'
         },
         {
             'title': 'Stay With Me',
             'artist': 'Sam Smith',
-            'keynote': 'A#',
+            'key_note': 'A#',
             'scale': 'major',
-            'audiopath': 'songs/original/Stay_With_Me_Sam_Smith.mp3',
-            'vocalrangemin': 'A#2',
-            'vocalrangemax': 'C5',
+            'audio_path': 'songs/original/Stay_With_Me_Sam_Smith.mp3',
+            'vocal_range_min': 'A#2',
+            'vocal_range_max': 'C5',
             'difficulty': 'Medium',
             'genre': 'Soul'
         },
         {
             'title': 'Wrecking Ball',
             'artist': 'Miley Cyrus',
-            'keynote': 'A#',
+            'key_note': 'A#',
             'scale': 'minor',
-            'audiopath': 'songs/original/Wrecking_Ball_Miley_Cyrus.mp3',
-            'vocalrangemin': 'A#3',
-            'vocalrangemax': 'F5',
+            'audio_path': 'songs/original/Wrecking_Ball_Miley_Cyrus.mp3',
+            'vocal_range_min': 'A#3',
+            'vocal_range_max': 'F5',
             'difficulty': 'Hard',
             'genre': 'Pop'
         },
@@ -402,33 +402,33 @@ def populate_complete_database():
         {
             'title': 'Bohemian Rhapsody',
             'artist': 'Queen',
-            'keynote': 'B',
+            'key_note': 'B',
             'scale': 'major',
-            'audiopath': 'songs/original/Bohemian_Rhapsody_Various_Artist.mp3',
-            'vocalrangemin': 'B2',
-            'vocalrangemax': 'B4',
+            'audio_path': 'songs/original/Bohemian_Rhapsody_Various_Artist.mp3',
+            'vocal_range_min': 'B2',
+            'vocal_range_max': 'B4',
             'difficulty': 'Hard',
             'genre': 'Rock'
         },
         {
             'title': 'Don\'t Stop Believin\'',
             'artist': 'Journey',
-            'keynote': 'B',
+            'key_note': 'B',
             'scale': 'major',
-            'audiopath': 'songs/original/Dont_Stop_Believin_Journey.mp3',
-            'vocalrangemin': 'B2',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Dont_Stop_Believin_Journey.mp3',
+            'vocal_range_min': 'B2',
+            'vocal_range_max': 'E5',
             'difficulty': 'Medium',
             'genre': 'Rock'
         },
         {
             'title': 'Livin\' on a Prayer',
             'artist': 'Bon Jovi',
-            'keynote': 'B',
+            'key_note': 'B',
             'scale': 'minor',
-            'audiopath': 'songs/original/Livin_on_a_Prayer_Bon_Jovi.mp3',
-            'vocalrangemin': 'B2',
-            'vocalrangemax': 'E5',
+            'audio_path': 'songs/original/Livin_on_a_Prayer_Bon_Jovi.mp3',
+            'vocal_range_min': 'B2',
+            'vocal_range_max': 'E5',
             'difficulty': 'Hard',
             'genre': 'Rock'
         },
@@ -442,33 +442,18 @@ def populate_complete_database():
     
     # Statistics
     keys_count = {}
-    added_count = 0
-    skipped_count = 0
-    
     for song in complete_songs:
-        # Track key statistics
-        key = song['keynote']
+        key = song['key_note']
         keys_count[key] = keys_count.get(key, 0) + 1
-        
-        # Check if song already exists
-        existing = db.getsongbytitle(song['title'])
-        if existing:
-            print(f"⏭️  Skipped: {song['title']} - already exists")
-            skipped_count += 1
-        else:
-            try:
-                song_id = db.addsong(**song)
-                print(f"✅ Added: {song['title']} by {song['artist']} (Key: {song['keynote']}) - ID: {song_id}")
-                added_count += 1
-            except Exception as e:
-                print(f"❌ Error adding {song['title']}: {str(e)}")
     
-    print()
+    # One transaction; songs already in the database (same title + artist) are left as is
+    counts = db.bulk_upsert(complete_songs, update_existing=False)
+    
     print("=" * 70)
     print("📊 DATABASE STATISTICS")
     print("=" * 70)
-    print(f"✅ Songs added: {added_count}")
-    print(f"⏭️  Songs skipped: {skipped_count}")
+    print(f"✅ Songs added: {counts['inserted']}")
+    print(f"⏭️  Songs skipped: {counts['existing']} (already exist)")
     print()
     
     # Songs per key
@@ -482,7 +467,7 @@ def populate_complete_database():
     print()
     
     # Total songs in database
-    all_songs = db.getallsongs()
+    all_songs = db.get_all_songs()
     print(f"📀 Total songs in database: {len(all_songs)}")
     print("=" * 70)
     print()
@@ -5,13 +5,10 @@ Jalankan sekali untuk populate database dengan sample songs
 """
 
 from database_manager import db_manager
-from database_models import Song
 
 def seed_songs():
     """Populate database dengan sample songs"""
     
-    session = db_manager.get_session()
-    
     # Sample songs data
     sample_songs = [
         {
@@ -96,15 +93,11 @@ def seed_songs():
         }
     ]
     
-    # Add songs to database
-    for song_data in sample_songs:
-        song = Song(**song_data)
-        session.add(song)
-    
-    session.commit()
-    session.close()
+    # Add songs to database (one transaction; fields without a songs column are ignored)
+    counts = db_manager.bulk_upsert(sample_songs)
     
-    print(f"✅ Successfully seeded {len(sample_songs)} songs to database")
+    print(f"✅ Successfully seeded {len(sample_songs)} songs to database "
+          f"({counts['inserted']} new, {counts['existing']} updated)")
     print("   Database file: songs.db")
 
 if __name__ == '__main__':
@@ -0,0 +1,266 @@
+"""
+Single-Flight Request Coalescing
+
+Request identik yang datang bersamaan (key sama) dihitung sekali:
+- In-process: thread pertama jadi leader, thread lain menunggu (threading.Event)
+  dan menerima hasil / exception yang sama
+- Antar proses (opsional): leader memegang lock file (O_CREAT | O_EXCL) per key,
+  proses lain menunggu lock dilepas lalu cek ulang cache-nya sendiri
+- Lock file dari proses yang mati (pid tidak ada, host sama) atau lebih tua
+  dari stale_after dianggap basi dan diambil alih; lock baru yang dibuat waiter
+  lain sementara itu tidak ikut terhapus (identitas file dicek ulang)
+"""
+
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+# (inode, mtime_ns, contents) of a lock file judged stale
+_LockIdentity = Tuple[int, int, str]
+
+STALE_AFTER = 300.0             # seconds before a lock file counts as abandoned
+POLL_INTERVAL = 0.05            # wait between lock file attempts
+
+_HOSTNAME = socket.gethostname()
+
+
+def lock_path(lock_dir: str, key: str) -> str:
+    """Lock file used for key inside lock_dir"""
+    return os.path.join(lock_dir, f"{key}.lock")
+
+
+class FileLock:
+    def __init__(self, path: str, stale_after: float = STALE_AFTER, poll_interval: float = POLL_INTERVAL,
+                 timeout: Optional[float] = None):
+        """
+        Cross-process lock backed by an exclusively created file
+
+        Args:
+            path: Lock file path (created on acquire, removed on release)
+            stale_after: Age after which a lock is taken over regardless of its owner
+            poll_interval: Sleep between attempts while another process holds it
+            timeout: Give up after this many seconds (None = wait forever)
+        """
+        self.path = path
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.waited = False
+        self.held = False
+
+    def acquire(self) -> bool:
+        """
+        Take the lock, waiting while another process holds it
+
+        Returns:
+            True if another process held the lock first (caller should
+            re-check whatever the lock protects)
+
+        Raises:
+            TimeoutError: timeout expired
+        """
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                self.waited = True
+                stale = self._stale_identity()
+                if stale is not None:
+                    self._break(stale)
+                    continue
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(self.poll_interval)
+                continue
+
+            with os.fdopen(fd, 'w') as f:
+                f.write(f"{os.getpid()} {_HOSTNAME} {time.time()}\n")
+            self.held = True
+            return self.waited
+
+    def refresh(self):
+        """Bump the lock's mtime so a long-running holder is not taken for stale (no-op unless held)"""
+        if not self.held:
+            return
+        try:
+            os.utime(self.path)
+        except OSError:
+            pass
+
+    def release(self):
+        self.held = False
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    @staticmethod
+    def _identity(path: str) -> Optional[_LockIdentity]:
+        """(inode, mtime_ns, contents) of a lock file, None if it is gone"""
+        try:
+            st = os.stat(path)
+            with open(path, 'r') as f:
+                contents = f.read()
+        except (OSError, ValueError):
+            return None
+        return st.st_ino, st.st_mtime_ns, contents
+
+    def _stale_identity(self) -> Optional[_LockIdentity]:
+        """
+        Identity of the lock file if it is abandoned, else None
+
+        Abandoned = owner process gone (same host, POSIX) or older than stale_after.
+        """
+        identity = self._identity(self.path)
+        if identity is None:
+            # Released meanwhile: just retry
+            return None
+
+        _, mtime_ns, contents = identity
+        if time.time() - mtime_ns / 1e9 > self.stale_after:
+            return identity
+
+        owner = contents.split()
+        # os.kill(pid, 0) only probes on POSIX (on Windows it would terminate the process)
+        if os.name == 'posix' and len(owner) >= 2 and owner[1] == _HOSTNAME:
+            try:
+                os.kill(int(owner[0]), 0)
+            except ProcessLookupError:
+                return identity
+            except (PermissionError, ValueError):
+                return None
+        return None
+
+    def _break(self, stale: _LockIdentity):
+        """
+        Remove the abandoned lock judged stale
+
+        Two waiters can judge the same lock stale; by the time the second one
+        acts, the first may already hold a fresh lock at this path. The file
+        is renamed away (atomic, one waiter wins) and only deleted if it is
+        still the stale one; a fresh lock moved by mistake is linked back
+        (os.link never overwrites a lock created meanwhile).
+        """
+        stale_path = f"{self.path}.stale.{os.getpid()}.{threading.get_ident()}"
+        try:
+            os.rename(self.path, stale_path)
+        except OSError:
+            return
+
+        try:
+            if self._identity(stale_path) == stale:
+                print(f"⚠️ Removed stale lock: {self.path}")
+                return
+            try:
+                os.link(stale_path, self.path)
+            except FileExistsError:
+                print(f"⚠️ Lock {self.path} was replaced while restoring it")
+            except OSError:
+                # No hard links (some filesystems): best-effort rename back
+                try:
+                    os.replace(stale_path, self.path)
+                except OSError:
+                    pass
+        finally:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    def __init__(self, lock_dir: Optional[str] = None, stale_after: float = STALE_AFTER):
+        """
+        Initialize SingleFlight
+
+        Args:
+            lock_dir: Folder for per-key lock files (None = in-process only)
+            stale_after: Lock file age treated as abandoned
+        """
+        self.lock_dir = lock_dir
+        self.stale_after = stale_after
+
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'followers': 0, 'lock_waits': 0}
+
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def lock_path(self, key: str) -> Optional[str]:
+        return lock_path(self.lock_dir, key) if self.lock_dir else None
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once per key among concurrent callers
+
+        The leader runs fn (holding the key's lock file when lock_dir is set,
+        so fn should re-check its cache first); followers block until it
+        finishes and get the same result or exception.
+
+        Returns:
+            (result, shared) - shared is True for followers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['leaders'] += 1
+            else:
+                call.followers += 1
+                self._stats['followers'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            if self.lock_dir:
+                with FileLock(self.lock_path(key), stale_after=self.stale_after) as file_lock:
+                    if file_lock.waited:
+                        with self._lock:
+                            self._stats['lock_waits'] += 1
+                    call.result = fn()
+            else:
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self) -> dict:
+        """Leader / follower / cross-process wait counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
@@ -0,0 +1,240 @@
+"""
+Song Index
+
+Katalog lagu dalam bentuk kolom NumPy untuk scoring vectorized di recommender:
+- key semitone, scale, vocal range (MIDI), popularity per lagu
+- Top-k dengan np.argpartition (O(n), urutan tie sama dengan urutan database)
+- Profile grouping: lagu dengan (key, range min, range max) sama di-score sekali,
+  top-k diambil per profile (latency tidak tumbuh dengan ukuran katalog)
+- Auto-refresh saat tabel songs berubah (PRAGMA data_version di koneksi khusus)
+- Row lengkap hanya di-fetch untuk hasil top-k
+"""
+
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import note_table
+
+SCALE_CODES = {'major': 0, 'minor': 1}
+
+
+class SongIndex:
+    def __init__(self, db_path: str = "songs.db"):
+        """
+        Initialize SongIndex (columns are loaded lazily on first use)
+
+        Args:
+            db_path: SQLite database path
+        """
+        self.db_path = db_path
+
+        # Dedicated long-lived connection: data_version only changes for
+        # commits made by *other* connections, which is exactly what we need
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._data_version = None
+
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.key_semitones = np.zeros(0, dtype=np.int8)     # -1 = unknown
+        self.scales = np.zeros(0, dtype=np.int8)            # 0 major, 1 minor, -1 unknown
+        self.range_min_midi = np.zeros(0, dtype=np.float32)  # NaN = unknown
+        self.range_max_midi = np.zeros(0, dtype=np.float32)
+        self.popularity = np.zeros(0, dtype=np.float32)
+
+        # Distinct (key, range_min, range_max) profiles and their songs (CSR layout)
+        self.profile_key_semitones = np.zeros(0, dtype=np.int8)
+        self.profile_range_min_midi = np.zeros(0, dtype=np.float32)
+        self.profile_range_max_midi = np.zeros(0, dtype=np.float32)
+        self.profile_of_song = np.zeros(0, dtype=np.int64)
+        self.profile_members = np.zeros(0, dtype=np.int64)   # song positions, grouped by profile
+        self.profile_offsets = np.zeros(1, dtype=np.int64)
+
+    def __len__(self):
+        self.refresh()
+        return len(self.ids)
+
+    # ===== LOADING =====
+
+    def _current_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload columns if the songs table changed since the last load
+
+        Returns:
+            True if the index was (re)loaded
+        """
+        with self._lock:
+            version = self._current_data_version()
+            if not force and version == self._data_version:
+                return False
+
+            self._load()
+            self._data_version = version
+            return True
+
+    def _load(self):
+        """Read the catalog columns (caller holds the lock)"""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(songs)")}
+        popularity_column = 'popularity_score' if 'popularity_score' in columns else 'NULL'
+
+        # Prefer the numeric MIDI columns, fall back to parsing note strings
+        if 'vocal_range_min_midi' in columns and 'vocal_range_max_midi' in columns:
+            range_columns = ('COALESCE(vocal_range_min_midi, vocal_range_min), '
+                             'COALESCE(vocal_range_max_midi, vocal_range_max)')
+        else:
+            range_columns = 'vocal_range_min, vocal_range_max'
+
+        rows = self._conn.execute(f'''
+            SELECT id, key_note, scale, {range_columns}, {popularity_column}
+            FROM songs ORDER BY id
+        ''').fetchall()
+
+        n = len(rows)
+        ids = np.empty(n, dtype=np.int64)
+        key_semitones = np.empty(n, dtype=np.int8)
+        scales = np.empty(n, dtype=np.int8)
+        range_min = np.empty(n, dtype=np.float32)
+        range_max = np.empty(n, dtype=np.float32)
+        popularity = np.empty(n, dtype=np.float32)
+
+        # Parse each distinct text value once (catalogs repeat keys/notes a lot)
+        key_cache = {}
+        note_cache = {}
+
+        def parse_key(value):
+            if value not in key_cache:
+                semitone = note_table.key_to_semitone(value) if value else None
+                key_cache[value] = -1 if semitone is None else semitone
+            return key_cache[value]
+
+        def parse_note(value):
+            if isinstance(value, (int, float)):
+                return float(value)
+            if value not in note_cache:
+                midi = note_table.note_to_midi(value) if value else None
+                note_cache[value] = np.nan if midi is None else float(midi)
+            return note_cache[value]
+
+        for i, row in enumerate(rows):
+            ids[i] = row[0]
+            key_semitones[i] = parse_key(row[1])
+            scales[i] = SCALE_CODES.get((row[2] or '').strip().lower(), -1)
+            range_min[i] = parse_note(row[3])
+            range_max[i] = parse_note(row[4])
+            popularity[i] = row[5] if row[5] is not None else 0.0
+
+        self.ids = ids
+        self.key_semitones = key_semitones
+        self.scales = scales
+        self.range_min_midi = range_min
+        self.range_max_midi = range_max
+        self.popularity = popularity
+        self._build_profiles()
+
+        print(f"[SongIndex] Loaded {n} songs ({len(self.profile_key_semitones)} profiles) from {self.db_path}")
+
+    def _build_profiles(self):
+        """Group songs by (key, range_min, range_max); members stay in database order"""
+        # NaN (unknown range) -> sentinel so np.unique can group it
+        sentinel = np.float32(-1000.0)
+        rows = np.stack([
+            self.key_semitones.astype(np.float32),
+            np.where(np.isnan(self.range_min_midi), sentinel, self.range_min_midi),
+            np.where(np.isnan(self.range_max_midi), sentinel, self.range_max_midi)
+        ], axis=1) if len(self.ids) else np.zeros((0, 3), dtype=np.float32)
+
+        profiles, inverse = np.unique(rows, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        self.profile_key_semitones = profiles[:, 0].astype(np.int8)
+        self.profile_range_min_midi = np.where(profiles[:, 1] == sentinel, np.nan, profiles[:, 1]).astype(np.float32)
+        self.profile_range_max_midi = np.where(profiles[:, 2] == sentinel, np.nan, profiles[:, 2]).astype(np.float32)
+        self.profile_of_song = inverse
+        self.profile_members = np.argsort(inverse, kind='stable')
+        self.profile_offsets = np.concatenate([[0], np.cumsum(np.bincount(inverse, minlength=len(profiles)))])
+
+    # ===== QUERIES =====
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Positions of the k best scores, best first
+
+        Ties keep index (database) order, same as a stable descending sort.
+
+        Args:
+            scores: Score per song
+            k: Number of results
+            mask: Optional candidate mask (False = excluded)
+        """
+        candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(scores))
+        if k <= 0 or len(candidates) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        candidate_scores = scores[candidates]
+        if len(candidates) > k:
+            # k-th best score, then everything strictly better + first ties
+            threshold = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            better = candidates[candidate_scores > threshold]
+            ties = candidates[candidate_scores == threshold][:k - len(better)]
+            candidates = np.concatenate([better, ties])
+            candidate_scores = scores[candidates]
+
+        order = np.lexsort((candidates, -candidate_scores))
+        return candidates[order]
+
+    def top_k_profiles(self, profile_scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Song positions of the k best songs when every song scores as its profile
+
+        Same result as top_k(profile_scores[profile_of_song], k) without
+        touching every song: only members of the best profiles are visited.
+        Profiles scored -inf are excluded.
+        """
+        # -inf = excluded profile
+        valid = np.flatnonzero(np.isfinite(profile_scores))
+        if k <= 0 or len(valid) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        sizes = np.diff(self.profile_offsets)
+        order = valid[np.argsort(-profile_scores[valid], kind='stable')]
+        covered = np.cumsum(sizes[order])
+
+        # Lowest score still needed to fill k slots
+        last = min(int(np.searchsorted(covered, k)), len(order) - 1)
+        threshold = profile_scores[order[last]]
+        selected = order[profile_scores[order] >= threshold]
+
+        # At most k members per profile can make it (members are in database order)
+        positions = np.concatenate([
+            self.profile_members[self.profile_offsets[p]:min(self.profile_offsets[p] + k, self.profile_offsets[p + 1])]
+            for p in selected
+        ])
+        scores = profile_scores[self.profile_of_song[positions]]
+        return positions[np.lexsort((positions, -scores))][:k]
+
+    def fetch_songs(self, positions: np.ndarray) -> List[Dict]:
+        """Full song rows for index positions (same order)"""
+        if len(positions) == 0:
+            return []
+
+        song_ids = self.ids[positions].tolist()
+        placeholders = ','.join('?' * len(song_ids))
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM songs WHERE id IN ({placeholders})", song_ids
+            ).fetchall()
+
+        by_id = {row['id']: dict(row) for row in rows}
+        return [by_id[song_id] for song_id in song_ids if song_id in by_id]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -2,20 +2,33 @@ import numpy as np
 from typing import List, Dict, Optional
 from database_manager import DatabaseManager
 
+import note_table
+from song_index import SongIndex
+
 class SongRecommenderSQLite:
     """
     Song recommender using SQLite database
     (No SQLAlchemy, pure SQLite)
     """
     
+    # Candidate transpositions, smallest first so ties prefer less shifting
+    SHIFTS = np.array([0, -1, 1, -2, 2, -3, 3, -4, 4, -5, 5, -6, 6])
+    
+    # Transposition quality penalty (subtracted from total score)
+    SHIFT_PENALTY = 0.02                # per semitone
+    SHIFT_PENALTY_EXTRA = 0.06          # per semitone beyond OPTIMAL_SHIFT
+    OPTIMAL_SHIFT = 2                   # transpose_audio.OPTIMAL_TRANSPOSE_RANGE
+    
     def __init__(self, db_path: str = "songs.db"):
         self.db_manager = DatabaseManager(db_path)
+        self.index = SongIndex(db_path)
         print("✅ SongRecommenderSQLite initialized (SQLite)")
     
     def recommend(
         self,
         vocal_analysis: Dict,
-        max_results: int = 10
+        max_results: int = 10,
+        allow_transpose: bool = True
     ) -> List[Dict]:
         """
         Recommend songs based on vocal analysis
@@ -23,9 +36,12 @@ class SongRecommenderSQLite:
         Args:
             vocal_analysis: Dict containing key, pitch_range, etc.
             max_results: Maximum number of recommendations
+            allow_transpose: Consider every song at its best shift (-6..+6);
+                False = only songs within ±1 semitone of the detected key, unshifted
         
         Returns:
-            List of recommended songs with compatibility scores
+            List of recommended songs with compatibility scores,
+            'recommended_shift' and 'recommended_key'
         """
         try:
             # Extract key info
@@ -40,36 +56,53 @@ class SongRecommenderSQLite:
             
             print(f"[Recommender] Detected key: {detected_key}, Confidence: {confidence}")
             
-            # Find compatible keys (same key + neighbors)
-            matched_keys = self._get_compatible_keys(detected_key)
-            print(f"[Recommender] Matched keys: {matched_keys}")
+            user_semitone = note_table.key_to_semitone(detected_key)
+            if user_semitone is None:
+                print(f"[Recommender] Unknown key: {detected_key}")
+                return []
             
-            # Query database
-            print(f"[Recommender] Querying database...")
-            songs = self.db_manager.get_songs_by_keys(matched_keys)
+            # Columnar catalog (reloaded only when the songs table changed)
+            self.index.refresh()
             
-            print(f"[Recommender] SQL Filter: key_note IN {matched_keys}")
-            print(f"[Recommender] Found {len(songs)} matches before sorting")
+            if allow_transpose:
+                # Songs x shifts, scored once per distinct (key, range) profile
+                profile_scores = self._score_shift_matrix(user_semitone, self._user_range(vocal_analysis))
+                positions = self.index.top_k_profiles(profile_scores['total'], max_results)
+                rows = self.index.profile_of_song[positions]
+                scores = profile_scores
+                print(f"[Recommender] Scored {len(self.index.profile_key_semitones)} profiles x "
+                      f"{len(self.SHIFTS)} shifts ({len(self.index.ids)} songs)")
+            else:
+                # Score the whole catalog at once; candidates = same key + neighbors (±1 semitone)
+                scores = self._score_catalog(user_semitone, self._user_range(vocal_analysis))
+                candidates = scores['key_distance'] <= 1
+                positions = self.index.top_k(scores['total'], max_results, mask=candidates)
+                rows = positions
+                print(f"[Recommender] Found {int(np.count_nonzero(candidates))} matches in {len(self.index.ids)} songs")
             
-            if not songs:
+            if len(positions) == 0:
                 print("[Recommender] No songs found in database")
                 return []
             
-            # Calculate compatibility scores
-            scored_songs = []
-            for song in songs:
-                score = self._calculate_compatibility(song, vocal_analysis)
-                song['compatibility_score'] = score
-                scored_songs.append(song)
+            # Full rows only for the top-k
+            results = self.index.fetch_songs(positions)
+            by_id = {int(song_id): i for i, song_id in enumerate(self.index.ids[positions])}
+            for song in results:
+                i = rows[by_id[song['id']]]
+                shift = int(scores['shift'][i])
+                song['compatibility_score'] = {
+                    'key_match': float(scores['key_match'][i]),
+                    'range_match': float(scores['range_match'][i]),
+                    'transpose_penalty': float(scores['transpose_penalty'][i]),
+                    'total': float(scores['total'][i])
+                }
+                song['recommended_shift'] = shift
+                song_semitone = note_table.key_to_semitone(song.get('key_note') or '')
+                song['recommended_key'] = (
+                    note_table.semitone_to_key(song_semitone + shift)
+                    if song_semitone is not None else song.get('key_note')
+                )
             
-            # Sort by total score
-            scored_songs.sort(
-                key=lambda x: x['compatibility_score'].get('total', 0),
-                reverse=True
-            )
-            
-            # Return top results
-            results = scored_songs[:max_results]
             print(f"[Recommender] Returning {len(results)} recommendations")
             
             return results
@@ -80,6 +113,103 @@ class SongRecommenderSQLite:
             print(traceback.format_exc())
             return []
     
+    def _score_catalog(self, user_semitone: int, user_range: Optional[tuple] = None) -> Dict[str, np.ndarray]:
+        """
+        Vectorized version of _calculate_compatibility over the whole index
+        
+        Returns:
+            Dict of arrays (one value per indexed song):
+            'key_distance', 'key_match', 'range_match', 'total'
+        """
+        song_semitones = self.index.key_semitones.astype(np.int16)
+        diff = np.abs(song_semitones - user_semitone)
+        key_distance = np.where(song_semitones < 0, 12, np.minimum(diff, 12 - diff))
+        
+        # 1. Key matching (50% weight)
+        key_match = np.where(key_distance == 0, 1.0, np.where(key_distance <= 2, 0.7, 0.3))
+        
+        # 2. Range matching (50% weight)
+        range_match = self._range_fit(self.index.range_min_midi, self.index.range_max_midi, user_range)
+        
+        return {
+            'key_distance': key_distance,
+            'key_match': key_match,
+            'range_match': range_match,
+            'shift': np.zeros(len(song_semitones), dtype=int),
+            'transpose_penalty': np.zeros(len(song_semitones)),
+            'total': key_match * 0.5 + range_match * 0.5
+        }
+    
+    @staticmethod
+    def _range_fit(song_min, song_max, user_range: Optional[tuple]) -> np.ndarray:
+        """
+        Share of each song range [song_min, song_max] (MIDI) inside the user's range
+        
+        Single-note ranges score 1/0; unknown song or user range -> neutral 0.8.
+        """
+        song_min = np.asarray(song_min, dtype=np.float64)
+        song_max = np.asarray(song_max, dtype=np.float64)
+        if user_range is None:
+            return np.full(np.broadcast(song_min, song_max).shape, 0.8)
+        
+        user_min, user_max = user_range
+        with np.errstate(invalid='ignore', divide='ignore'):
+            overlap = np.clip(np.minimum(song_max, user_max) - np.maximum(song_min, user_min), 0, None)
+            width = song_max - song_min
+            fit = np.where(width > 0, overlap / width, (song_min >= user_min) & (song_max <= user_max))
+        return np.where(np.isnan(song_min) | np.isnan(song_max), 0.8, fit)
+    
+    def _user_range(self, vocal_analysis: Dict) -> Optional[tuple]:
+        """(min_midi, max_midi) of the user's voice, None if unknown"""
+        midi = vocal_analysis.get('pitch_range', {}).get('midi', {})
+        if not isinstance(midi, dict) or midi.get('min') is None or midi.get('max') is None:
+            return None
+        return float(midi['min']), float(midi['max'])
+    
+    def _score_shift_matrix(self, user_semitone: int, user_range: Optional[tuple]) -> Dict[str, np.ndarray]:
+        """
+        Score every index profile at every shift in SHIFTS and keep the best shift
+        
+        Per shift: key match of the transposed key (same weights as
+        _calculate_compatibility), fraction of the transposed song range inside
+        the user's range, minus a transposition-quality penalty.
+        
+        Returns:
+            Dict of arrays, one value per profile:
+            'shift', 'key_match', 'range_match', 'transpose_penalty', 'total'
+        """
+        shifts = self.SHIFTS[np.newaxis, :]
+        song_semitones = self.index.profile_key_semitones.astype(np.int16)[:, np.newaxis]
+        
+        # 1. Key match after transposition (profiles x shifts)
+        diff = np.mod(song_semitones + shifts - user_semitone, 12)
+        key_distance = np.minimum(diff, 12 - diff)
+        key_match = np.where(key_distance == 0, 1.0, np.where(key_distance <= 2, 0.7, 0.3))
+        key_match = np.where(song_semitones < 0, 0.3, key_match)
+        
+        # 2. Range fit: share of the shifted song range the user can sing
+        lo = self.index.profile_range_min_midi[:, np.newaxis] + shifts
+        hi = self.index.profile_range_max_midi[:, np.newaxis] + shifts
+        range_match = self._range_fit(lo, hi, user_range)
+        
+        # 3. Transposition quality penalty
+        abs_shifts = np.abs(shifts)
+        penalty = (self.SHIFT_PENALTY * abs_shifts
+                   + self.SHIFT_PENALTY_EXTRA * np.maximum(abs_shifts - self.OPTIMAL_SHIFT, 0))
+        
+        total = key_match * 0.5 + range_match * 0.5 - penalty
+        
+        # Best shift per profile (argmax keeps the smallest shift on ties)
+        best = np.argmax(total, axis=1)
+        rows = np.arange(len(best))
+        return {
+            'shift': self.SHIFTS[best],
+            'key_match': key_match[rows, best],
+            'range_match': range_match[rows, best],
+            'transpose_penalty': np.broadcast_to(penalty, total.shape)[rows, best],
+            'total': total[rows, best]
+        }
+    
     def _get_compatible_keys(self, key: str) -> List[str]:
         """Get compatible keys including neighbors"""
         key_circle = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
@@ -135,8 +265,17 @@ class SongRecommenderSQLite:
             scores['key_match'] = 0.3
         
         # 2. Range matching (50% weight)
-        # Simple heuristic - can be improved
-        scores['range_match'] = 0.8
+        song_min = song.get('vocal_range_min_midi')
+        song_max = song.get('vocal_range_max_midi')
+        if song_min is None and song.get('vocal_range_min'):
+            song_min = note_table.note_to_midi(song['vocal_range_min'])
+        if song_max is None and song.get('vocal_range_max'):
+            song_max = note_table.note_to_midi(song['vocal_range_max'])
+        scores['range_match'] = float(self._range_fit(
+            np.nan if song_min is None else song_min,
+            np.nan if song_max is None else song_max,
+            self._user_range(vocal_analysis)
+        ))
         
         # Calculate total
         scores['total'] = (scores['key_match'] * 0.5 + scores['range_match'] * 0.5)
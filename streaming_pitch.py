@@ -0,0 +1,243 @@
+"""
+Streaming Pitch Tracker
+
+Incremental pYIN untuk live humming:
+- Menerima PCM chunks selama user masih merekam
+- Viterbi smoothing dengan fixed lag (frame terakhir ditahan sampai
+  cukup konteks, lalu di-commit)
+- Running vocal analysis (range, key) dari frame yang sudah di-commit,
+  via VocalStats accumulator (memory konstan)
+"""
+
+import librosa
+import numpy as np
+from typing import Dict, List, Optional
+
+from pitch_track import PitchTrack
+from vocal_stats import VocalStats
+
+
+class StreamingPitchTracker:
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        fmin: float = 65.4,
+        fmax: float = 2093.0,
+        frame_length: int = 2048,
+        lag_frames: int = 8,
+        context_frames: int = 8,
+        min_decode_frames: int = 8,
+        vocal_analyzer=None,
+        keep_frames: bool = True
+    ):
+        """
+        Initialize StreamingPitchTracker
+
+        Args:
+            sample_rate: Sample rate of incoming PCM (default: 16000 Hz)
+            fmin: Minimum frequency (default: 65.4 Hz = C2)
+            fmax: Maximum frequency (default: 2093.0 Hz = C7)
+            frame_length: pYIN frame length (default: 2048, same as PitchDetector)
+            lag_frames: Frames held back before commit (Viterbi fixed lag)
+            context_frames: Already committed frames re-decoded as HMM context
+            min_decode_frames: Minimum new frames before running pYIN again
+            vocal_analyzer: Optional VocalAnalyzer for running analysis
+            keep_frames: Keep committed frames for get_pitch_data()
+                (False = only the running statistics are kept)
+        """
+        self.sample_rate = sample_rate
+        self.fmin = fmin
+        self.fmax = fmax
+        self.frame_length = frame_length
+        self.hop_length = frame_length // 4
+        self.lag_frames = lag_frames
+        self.context_frames = context_frames
+        self.min_decode_frames = min_decode_frames
+        self.vocal_analyzer = vocal_analyzer
+        self.keep_frames = keep_frames
+
+        # Audio buffer (only the part still needed for decoding)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0      # Global sample index of _buffer[0]
+        self._total_samples = 0
+
+        # Committed frames (global frame index)
+        self._committed = 0
+        self._pitches: List[np.ndarray] = []
+        self._voiced_flags: List[np.ndarray] = []
+        self.stats = VocalStats()
+
+    # ===== INPUT =====
+
+    def push_pcm(self, data: bytes, sample_format: str = 'float32') -> List[Dict]:
+        """
+        Push raw PCM bytes (mono, little-endian)
+
+        Args:
+            data: Raw PCM bytes
+            sample_format: 'float32' or 'int16'
+
+        Returns:
+            List of newly committed frames
+        """
+        if sample_format == 'int16':
+            chunk = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+        elif sample_format == 'float32':
+            chunk = np.frombuffer(data, dtype='<f4').astype(np.float32)
+        else:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+
+        return self.push(chunk)
+
+    def push(self, chunk: np.ndarray) -> List[Dict]:
+        """
+        Push a chunk of float audio samples
+
+        Returns:
+            List of newly committed frames (may be empty)
+        """
+        chunk = np.asarray(chunk, dtype=np.float32).ravel()
+        if len(chunk) == 0:
+            return []
+
+        self._buffer = np.concatenate([self._buffer, chunk])
+        self._total_samples += len(chunk)
+
+        pending = self._available_frames() - self.lag_frames - self._committed
+        if pending < self.min_decode_frames:
+            return []
+
+        return self._decode(final=False)
+
+    def finish(self) -> List[Dict]:
+        """Flush all remaining frames (no lag) at the end of the stream"""
+        if self._available_frames() <= self._committed:
+            return []
+        return self._decode(final=True)
+
+    # ===== DECODING =====
+
+    def _available_frames(self) -> int:
+        """Number of complete frames in the stream so far"""
+        if self._total_samples < self.frame_length:
+            return 0
+        return 1 + (self._total_samples - self.frame_length) // self.hop_length
+
+    def _decode(self, final: bool) -> List[Dict]:
+        """
+        Run pYIN over the context window + pending frames and commit
+        everything older than the fixed lag
+        """
+        available = self._available_frames()
+        first_frame = max(0, self._committed - self.context_frames)
+        start = first_frame * self.hop_length - self._buffer_start
+        end = (available - 1) * self.hop_length + self.frame_length - self._buffer_start
+
+        pitches, voiced_flags, voiced_probs = librosa.pyin(
+            self._buffer[start:end],
+            fmin=self.fmin,
+            fmax=self.fmax,
+            sr=self.sample_rate,
+            frame_length=self.frame_length,
+            hop_length=self.hop_length,
+            center=False
+        )
+
+        commit_until = available if final else available - self.lag_frames
+        lo = self._committed - first_frame
+        hi = commit_until - first_frame
+
+        new_pitches = pitches[lo:hi]
+        new_flags = voiced_flags[lo:hi]
+        new_probs = voiced_probs[lo:hi]
+
+        frames = []
+        for i in range(len(new_pitches)):
+            frame_index = self._committed + i
+            pitch = new_pitches[i]
+            frames.append({
+                'time': float((frame_index * self.hop_length + self.frame_length // 2) / self.sample_rate),
+                'pitch': None if np.isnan(pitch) else float(pitch),
+                'voiced': bool(new_flags[i]),
+                'prob': float(new_probs[i])
+            })
+
+        self.stats.update(new_pitches[new_flags])
+        if self.keep_frames:
+            self._pitches.append(new_pitches)
+            self._voiced_flags.append(new_flags)
+        self._committed = commit_until
+
+        # Drop audio that is no longer needed as decoding context
+        keep_from = max(0, self._committed - self.context_frames) * self.hop_length
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start:]
+            self._buffer_start = keep_from
+
+        return frames
+
+    # ===== RESULTS =====
+
+    @property
+    def committed_frames(self) -> int:
+        return self._committed
+
+    @property
+    def duration(self) -> float:
+        return self._total_samples / self.sample_rate
+
+    def get_pitch_data(self) -> Dict:
+        """
+        Committed frames in the same shape as PitchDetector.detect_pitch()
+        (empty track when keep_frames=False)
+        """
+        if self._pitches:
+            pitches = np.concatenate(self._pitches)
+            voiced_flags = np.concatenate(self._voiced_flags)
+        else:
+            pitches = np.zeros(0, dtype=np.float32)
+            voiced_flags = np.zeros(0, dtype=bool)
+
+        track = PitchTrack(
+            pitches,
+            voiced_flags=voiced_flags,
+            sample_rate=self.sample_rate,
+            hop_length=self.hop_length
+        )
+        return {
+            'success': True,
+            'track': track,
+            'metadata': {
+                'duration': self.duration,
+                'sample_rate': self.sample_rate,
+                'total_frames': len(track),
+                'valid_frames': track.valid_count
+            }
+        }
+
+    def get_running_analysis(self) -> Optional[Dict]:
+        """
+        Running vocal analysis over committed frames
+
+        Returns:
+            Compact summary (range, key, vocal type) or None if nothing voiced yet
+        """
+        if self.vocal_analyzer is None:
+            return None
+
+        if self.stats.count == 0:
+            return None
+
+        analysis = self.vocal_analyzer.analyze_stats(self.stats)
+        if 'error' in analysis:
+            return None
+
+        key_info = analysis['key']
+        notes = analysis['pitch_range']['notes']
+        return {
+            'note': f"{key_info['key']} {key_info['scale']}",
+            'accuracy': float(key_info['confidence'] * 100),
+            'vocal_range': f"{notes['min']} - {notes['max']}",
+            'vocal_type': analysis['vocal_classification']['primary'],
+            'num_samples': analysis['statistics']['num_samples']
+        }
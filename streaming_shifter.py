@@ -0,0 +1,463 @@
+"""
+Streaming Pitch Shifter
+
+Transpose lagu per blok supaya audio sudah bisa diputar sebelum render selesai:
+- Input dibaca maju per segmen langsung dari file (SoundFile), memory
+  konstan terhadap panjang lagu
+- Tiap segmen di-shift bersama konteks kiri/kanan (dibuang setelah shift)
+  supaya tepi blok bersih, lalu disambung dengan equal-power crossfade
+  (overlap-add)
+- Output WAV PCM 16-bit: panjang output = panjang input, jadi header bisa
+  dikirim duluan dan chunk pertama keluar setelah satu blok (~1 detik audio)
+- Output di-tee ke TransposeCache (tmp file -> os.replace -> adopt) dengan
+  quality '<quality>-streamed': hasil per blok tidak pernah menggantikan
+  render penuh render_transposed(), tapi stream berikutnya langsung hit cache
+- Render ke cache berjalan di thread sendiri yang memegang lock key (dan
+  me-refresh-nya per blok); client hanya membaca blok yang sudah jadi, jadi
+  client lambat / putus tidak menahan lock
+- Antrian blok ke client dibatasi (STREAM_QUEUE_BLOCKS); client yang
+  tertinggal membaca sisanya dari file tee / cache, bukan dari RAM
+"""
+
+import os
+import queue
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from single_flight import FileLock, lock_path
+from transpose_audio import cached_engines, engine_of, shift_pitch, transpose_engine, transpose_quality
+
+BLOCK_SECONDS = 1.0             # audio emitted per block
+CONTEXT_SECONDS = 0.25          # extra input shifted on each side, then discarded
+CROSSFADE_SECONDS = 0.05        # overlap between consecutive blocks
+STREAMED_QUALITY = 'streamed'   # quality suffix of block-wise renderings in the cache
+FILE_CHUNK_BYTES = 64 * 1024    # chunk size when a cached file is sent instead
+STREAM_QUEUE_BLOCKS = 8         # blocks queued for a slow client before it reads from the file
+
+
+def equal_power_fades(n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(fade_out, fade_in) with fade_out**2 + fade_in**2 == 1"""
+    t = (np.arange(n, dtype=np.float32) + 0.5) / max(n, 1)
+    return np.cos(t * np.pi / 2).astype(np.float32), np.sin(t * np.pi / 2).astype(np.float32)
+
+
+def plan_segments(total: int, block: int, crossfade: int) -> List[Tuple[int, int]]:
+    """
+    Split [0, total) into segments of block + crossfade samples
+
+    Consecutive segments overlap by exactly crossfade samples; the last
+    segment ends at total and is always longer than the crossfade.
+    """
+    segments = []
+    start = 0
+    while start < total:
+        stop = min(total, start + block + crossfade)
+        segments.append((start, stop))
+        if stop == total:
+            break
+        start += block
+    return segments
+
+
+def shift_segment(y: np.ndarray, lead: int, length: int, sr: int, semitone_shift: int,
+                  preserve_formant: bool = True) -> Tuple[np.ndarray, str]:
+    """
+    Shift a segment together with its context and cut the context off again
+
+    Args:
+        y: Segment plus context samples on both sides
+        lead: Context samples before the segment
+        length: Segment samples
+
+    Returns:
+        (shifted_segment, method_used)
+    """
+    shifted, method_used = shift_pitch(y, sr, semitone_shift, preserve_formant, verbose=False)
+    shifted = librosa.util.fix_length(np.asarray(shifted, dtype=np.float32), size=len(y))
+    return shifted[lead:lead + length], method_used
+
+
+class OverlapAdd:
+    def __init__(self, crossfade: int):
+        """
+        Join shifted segments from plan_segments() in order
+
+        Args:
+            crossfade: Overlap between consecutive segments (samples)
+        """
+        self.crossfade = crossfade
+        self.fade_out, self.fade_in = equal_power_fades(crossfade)
+        self._tail = None
+
+    def push(self, segment: np.ndarray, last: bool = False) -> np.ndarray:
+        """
+        Add the next segment
+
+        Returns:
+            Samples that are final now (the overlap with the next segment is
+            held back until that segment arrives)
+        """
+        segment = np.array(segment, dtype=np.float32)
+        if self._tail is not None:
+            n = len(self._tail)
+            segment[:n] = self._tail * self.fade_out + segment[:n] * self.fade_in
+            self._tail = None
+
+        if last or self.crossfade == 0:
+            return segment
+
+        self._tail = segment[-self.crossfade:]
+        return segment[:-self.crossfade]
+
+
+class _SegmentReader:
+    """Forward-only mono reader keeping just the samples still needed"""
+
+    def __init__(self, path: str):
+        self._file = None
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._offset = 0            # global sample index of _buffer[0]
+
+        try:
+            self._file = sf.SoundFile(path)
+            self.sample_rate = self._file.samplerate
+            self.frames = self._file.frames
+        except RuntimeError:
+            # Container libsndfile can't read (m4a, ...): decode it whole instead
+            print(f"⚠️ Block reading not supported for {path}, decoding whole file")
+            self._buffer, self.sample_rate = librosa.load(path, sr=None, mono=True)
+            self.frames = len(self._buffer)
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """Samples [start, stop); start must not go back before an earlier start"""
+        # Drop what no later read needs
+        if start > self._offset:
+            self._buffer = self._buffer[start - self._offset:]
+            self._offset = start
+
+        missing = stop - (self._offset + len(self._buffer))
+        if missing > 0:
+            if self._file is not None:
+                data = self._file.read(missing, dtype='float32', always_2d=True).mean(axis=1)
+            else:
+                data = np.zeros(0, dtype=np.float32)
+            # Decoders may deliver fewer frames than announced: pad so the length stays exact
+            if len(data) < missing:
+                data = np.pad(data, (0, missing - len(data)))
+            self._buffer = np.concatenate([self._buffer, data])
+
+        return self._buffer[start - self._offset:stop - self._offset]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class StreamingShifter:
+    def __init__(
+        self,
+        source_path: str,
+        semitone_shift: int,
+        preserve_formant: bool = True,
+        block_seconds: float = BLOCK_SECONDS,
+        context_seconds: float = CONTEXT_SECONDS,
+        crossfade_seconds: float = CROSSFADE_SECONDS
+    ):
+        """
+        Initialize StreamingShifter (opens the source right away)
+
+        Args:
+            source_path: Original audio file
+            semitone_shift: Shift in semitones
+            preserve_formant: Formant preservation (same as transpose_audio)
+            block_seconds: Audio emitted per block (first-chunk latency)
+            context_seconds: Extra input shifted on each side of a block
+            crossfade_seconds: Overlap between consecutive blocks
+        """
+        self.source_path = source_path
+        self.semitone_shift = semitone_shift
+        self.preserve_formant = preserve_formant
+
+        self._reader = _SegmentReader(source_path)
+        self.sample_rate = self._reader.sample_rate
+        self.frames = self._reader.frames
+
+        self.block = max(1, int(block_seconds * self.sample_rate))
+        self.context = int(context_seconds * self.sample_rate)
+        self.crossfade = min(int(crossfade_seconds * self.sample_rate), self.block)
+        self.method = None
+        self.engine = None          # 'librosa' as soon as one block fell back to it
+
+    def blocks(self) -> Iterator[np.ndarray]:
+        """Transposed mono float32 blocks, frames samples in total"""
+        segments = plan_segments(self.frames, self.block, self.crossfade)
+        joiner = OverlapAdd(self.crossfade)
+
+        for i, (start, stop) in enumerate(segments):
+            lo = max(0, start - self.context)
+            hi = min(self.frames, stop + self.context)
+            y = self._reader.read(lo, hi)
+
+            shifted, self.method = shift_segment(
+                y, start - lo, stop - start, self.sample_rate, self.semitone_shift, self.preserve_formant
+            )
+            if self.engine is None or engine_of(self.method) == 'librosa':
+                self.engine = engine_of(self.method)
+            yield joiner.push(shifted, last=i == len(segments) - 1)
+
+    def info(self) -> Dict:
+        """Render info in the format of render_transposed()"""
+        return {
+            'method': f"{self.method} (streamed)" if self.method else None,
+            'engine': self.engine,
+            'sample_rate': int(self.sample_rate),
+            'duration_seconds': float(self.frames / self.sample_rate)
+        }
+
+    def close(self):
+        self._reader.close()
+
+
+# ===== WAV OUTPUT =====
+
+def wav_header(frames: int, sample_rate: int, channels: int = 1) -> bytes:
+    """44-byte PCM 16-bit WAV header for a stream of known length"""
+    data_size = frames * channels * 2
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, sample_rate * channels * 2, channels * 2, 16,
+        b'data', data_size
+    )
+
+
+def pcm16(y: np.ndarray) -> bytes:
+    """Float samples -> little-endian 16-bit PCM (clipped)"""
+    return (np.clip(y, -1.0, 1.0) * 32767).round().astype('<i2').tobytes()
+
+
+def stream_quality(preserve_formant: bool) -> str:
+    """Cache quality label of a streamed (block-wise) rendering"""
+    return f"{transpose_quality(preserve_formant)}-{STREAMED_QUALITY}"
+
+
+def cached_transposition(cache, source_path: str, semitone_shift: int, preserve_formant: bool = True,
+                         source_hash: Optional[str] = None) -> Optional[Dict]:
+    """
+    Best cached rendering for a stream request: the full render_transposed()
+    one, else an earlier streamed one (None if neither exists)
+    """
+    source_hash = source_hash or cache.source_hash(source_path)
+    for quality in (transpose_quality(preserve_formant), stream_quality(preserve_formant)):
+        for engine in cached_engines():
+            entry = cache.lookup(cache.make_key(source_hash, semitone_shift, engine, quality, 'wav'), 'wav')
+            if entry is not None:
+                return entry
+    return None
+
+
+def wav_stream(shifter: StreamingShifter, cache=None) -> Iterator[bytes]:
+    """
+    WAV bytes of the transposed audio, one chunk per block
+
+    With a TransposeCache, the blocks are rendered by a background thread
+    that holds the key's lock and writes them to the cache under the
+    stream_quality() key, while this generator passes them on to the client.
+    The lock is never held across client I/O, and a rendering that started is
+    finished and cached even if the client goes away; a client that falls
+    behind reads the rest from the file instead of a growing queue. If another request /
+    worker is already rendering that key, this stream is served without
+    caching; if a rendering was cached meanwhile, that file is sent instead.
+    """
+    if cache is None:
+        yield from _uncached_stream(shifter)
+        return
+
+    source_hash = cache.source_hash(shifter.source_path)
+    metadata = {
+        'source_hash': source_hash,
+        'semitone_shift': int(shifter.semitone_shift),
+        'engine': transpose_engine(),
+        'quality': stream_quality(shifter.preserve_formant)
+    }
+    key = cache.make_key(source_hash, shifter.semitone_shift, metadata['engine'], metadata['quality'], 'wav')
+
+    lock = FileLock(lock_path(cache.cache_dir, key), timeout=0)
+    try:
+        lock.acquire()
+    except TimeoutError:
+        print(f"[StreamingShifter] {key} is rendering elsewhere, streaming without cache")
+        yield from _uncached_stream(shifter)
+        return
+
+    # Finished while this request was being set up
+    entry = cached_transposition(cache, shifter.source_path, shifter.semitone_shift,
+                                 shifter.preserve_formant, source_hash)
+    if entry is not None:
+        lock.release()
+        shifter.close()
+        yield from _file_chunks(entry['path'])
+        return
+
+    tee = _StreamTee(os.path.join(cache.cache_dir, cache.tmp_filename(key, 'wav')))
+    threading.Thread(
+        target=_render_to_cache,
+        args=(shifter, cache, key, metadata, lock, tee),
+        name=f"stream-{key[:8]}",
+        daemon=True
+    ).start()
+
+    yield from tee.read()
+
+
+class _StreamTee:
+    def __init__(self, path: str, maxsize: int = STREAM_QUEUE_BLOCKS):
+        """
+        Hand-off between the render thread and the client of one cached stream
+
+        Blocks go through a bounded queue while the client keeps up. Once it
+        is full the render thread stops queueing (it never waits for the
+        client) and the client reads the rest from the tee file, which is
+        the cache file after move().
+
+        Args:
+            path: Tee file the render thread writes
+            maxsize: Blocks queued before the client falls back to the file
+        """
+        self.path = path
+        self.chunks = queue.Queue(maxsize)
+        self.cond = threading.Condition()   # guards the fields below and opening / moving path
+        self.written = 0                    # bytes flushed to path
+        self.lagging = False                # queue overflowed: the client reads from path
+        self.moved = False
+        self.done = False
+        self.error = None
+        self.reader_done = False
+
+    # ===== RENDER THREAD =====
+
+    def wrote(self, data: bytes):
+        """data was written and flushed to path"""
+        with self.cond:
+            self.written += len(data)
+            self._offer(data)
+            self.cond.notify_all()
+
+    def move(self, dest: str):
+        """Rename the finished tee file into the cache"""
+        with self.cond:
+            os.replace(self.path, dest)
+            self.path = dest
+            self.moved = True
+
+    def finish(self, error: Optional[BaseException] = None):
+        """Rendering ended; a tee file that wasn't moved goes once the client is done with it"""
+        with self.cond:
+            self.done = True
+            self.error = error
+            if not self.moved and self.reader_done:
+                self._remove()
+            self._offer(None)
+            self.cond.notify_all()
+
+    def _offer(self, item: Optional[bytes]):
+        if self.lagging or self.reader_done:
+            return
+        try:
+            self.chunks.put_nowait(item)
+        except queue.Full:
+            self.lagging = True
+
+    def _remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    # ===== CLIENT =====
+
+    def read(self) -> Iterator[bytes]:
+        """All bytes of the stream: queued blocks, then from path once the client lagged behind"""
+        offset = 0
+        try:
+            while True:
+                with self.cond:
+                    from_file = self.lagging and self.chunks.empty()
+
+                if not from_file:
+                    # Not lagging with an empty queue: the next block or the end marker is queued next
+                    data = self.chunks.get()
+                    if data is None:
+                        break
+                else:
+                    with self.cond:
+                        while offset >= self.written and not self.done:
+                            self.cond.wait()
+                        if offset >= self.written:
+                            break
+                        with open(self.path, 'rb') as f:
+                            f.seek(offset)
+                            data = f.read(min(FILE_CHUNK_BYTES, self.written - offset))
+
+                offset += len(data)
+                yield data
+
+            if self.error is not None:
+                raise self.error
+        finally:
+            with self.cond:
+                self.reader_done = True
+                if self.done and not self.moved:
+                    self._remove()
+
+
+def _render_to_cache(shifter: StreamingShifter, cache, key: str, metadata: Dict, lock: FileLock, tee: _StreamTee):
+    """Render all blocks into the cache, handing them to the client through tee (background thread)"""
+    error = None
+    try:
+        with open(tee.path, 'wb') as f:
+            for data in _wav_chunks(shifter):
+                f.write(data)
+                f.flush()
+                lock.refresh()
+                tee.wrote(data)
+
+        if shifter.engine != metadata['engine']:
+            # A block fell back to another engine: don't cache it under this engine's key
+            print(f"[StreamingShifter] Rendered with {shifter.engine}, not caching {key}")
+        else:
+            tee.move(os.path.join(cache.cache_dir, cache.entry_filename(key, 'wav')))
+            cache.adopt(key, 'wav', shifter.info(), **metadata)
+            print(f"[StreamingShifter] Cached {cache.entry_filename(key, 'wav')}")
+    except BaseException as e:
+        print(f"[StreamingShifter] Rendering {key} failed: {e}")
+        error = e
+    finally:
+        shifter.close()
+        tee.finish(error)
+        lock.release()
+
+
+def _uncached_stream(shifter: StreamingShifter) -> Iterator[bytes]:
+    try:
+        yield from _wav_chunks(shifter)
+    finally:
+        shifter.close()
+
+
+def _file_chunks(path: str) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(FILE_CHUNK_BYTES), b''):
+            yield data
+
+
+def _wav_chunks(shifter: StreamingShifter) -> Iterator[bytes]:
+    yield wav_header(shifter.frames, shifter.sample_rate)
+    for block in shifter.blocks():
+        yield pcm16(block)
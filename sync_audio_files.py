@@ -3,14 +3,15 @@ Sync audio files from songs/original folder to database
 
 This script will:
 1. Scan songs/original folder for MP3 files
-2. Update existing songs in database with audio_file_path
-3. Auto-populate missing metadata
+2. Update existing songs in database with audio_path
+3. Add songs for files without a database row (one bulk upsert)
 """
 
-import sqlite3
 import os
 import re
 
+from database_manager import DatabaseManager
+
 def get_safe_filename(title):
     """Convert title to safe filename format"""
     safe = re.sub(r'[^\w\s-]', '', title)
@@ -86,111 +87,50 @@ def sync_audio_files():
     
     print(f"\n📂 Found {len(mp3_files)} MP3 files in {songs_folder}\n")
     
-    # Connect to database
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Get column names from songs table
-    cursor.execute("PRAGMA table_info(songs)")
-    columns = [col[1] for col in cursor.fetchall()]
+    db = DatabaseManager(db_path)
     
-    print(f"📋 Database columns: {', '.join(columns)}\n")
+    # Existing songs, looked up by audio path and by title (one query)
+    by_path = {}
+    by_title = {}
+    for row in db.connection().execute("SELECT title, artist, audio_path FROM songs ORDER BY id"):
+        song = dict(row)
+        if song['audio_path']:
+            by_path.setdefault(song['audio_path'], song)
+        by_title.setdefault(song['title'].lower(), song)
     
     try:
+        records = []
         updated_count = 0
         added_count = 0
         skipped_count = 0
         
-        for filename in mp3_files:
+        for filename in sorted(mp3_files):
             # Parse filename
             title, artist = parse_filename(filename)
             audio_path = f"songs/original/{filename}"
             
-            # Get file size
-            file_size_mb = os.path.getsize(audio_path) / (1024 * 1024)
-            
             print(f"📄 Processing: {filename}")
-            print(f"   Title: {title}")
-            print(f"   Artist: {artist}")
-            print(f"   Size: {file_size_mb:.2f} MB")
             
-            # Check if song exists in database (check by title OR filename)
-            cursor.execute("""
-                SELECT id, audio_file_path 
-                FROM songs 
-                WHERE title = ? OR audio_file_path LIKE ?
-            """, (title, f"%{filename}%"))
-            existing = cursor.fetchone()
+            existing = by_path.get(audio_path) or by_title.get(title.lower())
             
-            if existing:
-                song_id, current_path = existing
-                
-                if current_path and current_path != 'None' and current_path == audio_path:
-                    print(f"   ⏭️  Already synced: {current_path}")
-                    skipped_count += 1
-                else:
-                    # Update audio_file_path
-                    cursor.execute("""
-                        UPDATE songs 
-                        SET audio_file_path = ?, 
-                            file_size_mb = ?,
-                            download_status = 'completed'
-                        WHERE id = ?
-                    """, (audio_path, file_size_mb, song_id))
-                    
-                    print(f"   ✅ Updated audio path (ID: {song_id})")
-                    updated_count += 1
+            if existing and existing['audio_path'] == audio_path:
+                print(f"   ⏭️  Already synced: {audio_path}")
+                skipped_count += 1
+            elif existing:
+                # Same (title, artist) as the existing row -> upsert updates its audio_path
+                records.append({'title': existing['title'], 'artist': existing['artist'], 'audio_path': audio_path})
+                print(f"   ✅ Update audio path: {existing['title']}")
+                updated_count += 1
             else:
-                # Add new song to database
-                # Build INSERT query based on available columns
-                
-                base_fields = {
-                    'title': title,
-                    'artist': artist,
-                    'key_note': 'C',
-                    'audio_file_path': audio_path,
-                    'file_size_mb': file_size_mb,
-                    'download_status': 'completed'
-                }
-                
-                # Add optional fields if they exist
-                if 'pitch_range_acc' in columns:
-                    base_fields['pitch_range_acc'] = 0.85  # Default accuracy
-                
-                if 'link_youtube' in columns:
-                    base_fields['link_youtube'] = ''
-                
-                if 'cover_image_url' in columns:
-                    base_fields['cover_image_url'] = ''
-                
-                if 'genre' in columns:
-                    base_fields['genre'] = 'Pop'
-                
-                if 'tempo' in columns:
-                    base_fields['tempo'] = 120
-                
-                if 'popularity_score' in columns:
-                    base_fields['popularity_score'] = 50.0
-                
-                # Build query
-                field_names = ', '.join(base_fields.keys())
-                placeholders = ', '.join(['?' for _ in base_fields])
-                values = tuple(base_fields.values())
-                
-                cursor.execute(f"""
-                    INSERT INTO songs ({field_names})
-                    VALUES ({placeholders})
-                """, values)
-                
-                song_id = cursor.lastrowid
-                print(f"   ✅ Added to database (ID: {song_id})")
+                # Key / range unknown until extract_catalog_features.py measures them
+                records.append({'title': title, 'artist': artist, 'audio_path': audio_path})
+                print(f"   ➕ New song: {title} - {artist}")
                 added_count += 1
-            
-            print()
         
-        # Commit changes
-        conn.commit()
+        # One transaction for all changes
+        db.bulk_upsert(records)
         
+        print()
         print("=" * 70)
         print(f"✅ Sync Complete!")
         print(f"   📊 Total files: {len(mp3_files)}")
@@ -202,19 +142,17 @@ def sync_audio_files():
         # Show all songs with audio
         print("\n📊 Songs in Database with Audio:\n")
         
-        cursor.execute("""
-            SELECT id, title, artist, audio_file_path, file_size_mb 
+        songs = db.connection().execute("""
+            SELECT id, title, artist, audio_path
             FROM songs 
-            WHERE audio_file_path IS NOT NULL AND audio_file_path != ''
+            WHERE audio_path IS NOT NULL AND audio_path != ''
             ORDER BY id
-        """)
-        
-        songs = cursor.fetchall()
+        """).fetchall()
         
-        for song_id, title, artist, audio_path, file_size in songs:
-            exists = "✅" if os.path.exists(audio_path or '') else "❌"
-            size_str = f"{file_size:.2f} MB" if file_size else "N/A"
-            print(f"{exists} {song_id:3}. {title:35} - {artist:20} ({size_str})")
+        for song_id, title, artist, audio_path in songs:
+            exists = os.path.exists(audio_path)
+            size_str = f"{os.path.getsize(audio_path) / (1024 * 1024):.2f} MB" if exists else "N/A"
+            print(f"{'✅' if exists else '❌'} {song_id:3}. {title:35} - {(artist or ''):20} ({size_str})")
         
         print()
         
@@ -222,9 +160,6 @@ def sync_audio_files():
         print(f"\n❌ Error: {str(e)}")
         import traceback
         print(traceback.format_exc())
-        conn.rollback()
-    finally:
-        conn.close()
 
 if __name__ == "__main__":
     sync_audio_files()
@@ -7,6 +7,11 @@ import requests
 import json
 import sys
 import os
+import io
+import math
+import random
+import struct
+import wave
 
 # ===== KONFIGURASI =====
 API_BASE_URL = "http://localhost:5000"
@@ -165,6 +170,62 @@ def test_analyze_vocal(audio_path, get_recommendations=True, max_recommendations
         traceback.print_exc()
         return False
 
+def make_test_tone(duration=2.0, sample_rate=16000):
+    """Sine 'humming' WAV with a random pitch, so its bytes were never analyzed before"""
+    frequency = random.uniform(180.0, 420.0)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b''.join(
+            struct.pack('<h', int(12000 * math.sin(2 * math.pi * frequency * i / sample_rate)))
+            for i in range(int(duration * sample_rate))
+        ))
+    return buffer.getvalue(), frequency
+
+def test_analysis_cache():
+    """Same upload twice: a fresh analysis (cached=false, one miss), then a cache hit (cached=true, one hit)"""
+    print_header("TEST 3: Analysis Cache")
+
+    audio_bytes, frequency = make_test_tone()
+    print_info(f"Generated test tone: {frequency:.1f} Hz")
+
+    try:
+        before = requests.get(f"{API_BASE_URL}/api/cache/stats").json()['analysis_cache']
+
+        flags = []
+        for attempt in range(2):
+            response = requests.post(
+                f"{API_BASE_URL}/api/analyze",
+                files={'audio': ('cache_test.wav', audio_bytes, 'audio/wav')},
+                data={'get_recommendations': 'false'}
+            )
+            if response.status_code != 200:
+                print_error(f"HTTP {response.status_code}: {response.text}")
+                return False
+            flags.append(response.json()['metadata']['cached'])
+            print_info(f"Request {attempt + 1}: cached = {flags[-1]}")
+
+        if flags != [False, True]:
+            print_error(f"Expected cached = [False, True], got {flags}")
+            return False
+
+        # One lookup per request: a miss, then a hit
+        after = requests.get(f"{API_BASE_URL}/api/cache/stats").json()['analysis_cache']
+        counted = (after['misses'] - before['misses'], after['hits'] - before['hits'])
+        print_info(f"Cache stats: +{counted[0]} misses, +{counted[1]} hits")
+        if counted != (1, 1):
+            print_error(f"Expected +1 miss and +1 hit, got {counted}")
+            return False
+
+        print_success("First request analyzed, second served from cache")
+        return True
+
+    except Exception as e:
+        print_error(f"Error: {str(e)}")
+        return False
+
 def run_all_tests(audio_path=None):
     """Run all tests"""
     print(f"{Colors.BOLD}{Colors.HEADER}")
@@ -187,6 +248,9 @@ def run_all_tests(audio_path=None):
         print_info(f"Usage: python test_client.py <path_to_audio_file>")
         results.append(("Analyze Vocal", None))
 
+    # Test 3: Analysis cache (generated audio, no file needed)
+    results.append(("Analysis Cache", test_analysis_cache()))
+
     # Summary
     print_header("TEST SUMMARY")
 
@@ -6,12 +6,16 @@ Transpose audio file dari satu key ke key lain dengan preserving formant
 IMPROVED: High quality with formant preservation
 """
 
+import shutil
+
 import librosa
 import soundfile as sf
 import numpy as np
-from typing import Tuple, Optional
+from typing import Callable, Tuple, Optional
 import warnings
 
+import note_table
+
 # Try import pyrubberband
 try:
     import pyrubberband as pyrb
@@ -22,19 +26,14 @@ except ImportError:
     print("   For best quality: pip install pyrubberband")
 
 # ===== MAJOR KEYS DICTIONARY =====
+# Natural, sharp (incl. E#/B#) and flat keys -> semitone (shared note table)
 MAJOR_KEYS = {
-    # Natural keys
-    'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11,
-    # Sharp keys
-    'C#': 1, 'D#': 3, 'E#': 5, 'F#': 6, 'G#': 8, 'A#': 10, 'B#': 0,
-    # Flat keys (enharmonic)
-    'Db': 1, 'Eb': 3, 'Fb': 4, 'Gb': 6, 'Ab': 8, 'Bb': 10, 'Cb': 11,
+    name: semitone
+    for name, semitone in note_table.SPELLING_TO_SEMITONE.items()
+    if name[0].isupper() and '♯' not in name and '♭' not in name
 }
 
-SEMITONE_TO_KEY = {
-    0: 'C', 1: 'C#', 2: 'D', 3: 'D#', 4: 'E', 5: 'F',
-    6: 'F#', 7: 'G', 8: 'G#', 9: 'A', 10: 'A#', 11: 'B'
-}
+SEMITONE_TO_KEY = dict(enumerate(note_table.NOTE_NAMES))
 
 OPTIMAL_TRANSPOSE_RANGE = 2  # ±2 semitones (optimal quality)
 MAXIMUM_TRANSPOSE_RANGE = 6  # ±6 semitones (maximum acceptable)
@@ -42,16 +41,8 @@ MAXIMUM_TRANSPOSE_RANGE = 6  # ±6 semitones (maximum acceptable)
 # ===== HELPER FUNCTIONS =====
 
 def normalize_key_name(key_input):
-    """Normalize key name dari berbagai format"""
-    key = key_input.strip().replace(' major', '').replace(' Major', '').replace('M', '')
-    key = key.strip()
-    
-    if len(key) > 1:
-        key = key[0].upper() + key[1].lower()
-    else:
-        key = key.upper()
-    
-    return key
+    """Normalize key name dari berbagai format (Mayor notation, unknown -> stripped input)"""
+    return note_table.normalize_key(key_input) or key_input.strip()
 
 
 def calculate_semitone_shift(original_key: str, target_key: str) -> int:
@@ -59,15 +50,15 @@ def calculate_semitone_shift(original_key: str, target_key: str) -> int:
     Hitung perbedaan semitone antara keys
     Formula: semitone_shift = MAJOR_KEYS[target] - MAJOR_KEYS[original]
     """
-    orig_key = normalize_key_name(original_key)
-    targ_key = normalize_key_name(target_key)
+    orig_semitone = note_table.key_to_semitone(original_key)
+    targ_semitone = note_table.key_to_semitone(target_key)
     
-    if orig_key not in MAJOR_KEYS:
+    if orig_semitone is None:
         raise ValueError(f"Invalid original key: {original_key}")
-    if targ_key not in MAJOR_KEYS:
+    if targ_semitone is None:
         raise ValueError(f"Invalid target key: {target_key}")
     
-    semitone_shift = MAJOR_KEYS[targ_key] - MAJOR_KEYS[orig_key]
+    semitone_shift = targ_semitone - orig_semitone
     
     # Shortest path (e.g., B to C = +1, not +11)
     if semitone_shift > 6:
@@ -111,6 +102,168 @@ def get_transpose_recommendation(semitone_shift: int) -> dict:
     return recommendation
 
 
+# ===== RENDERING =====
+
+# Set once pyrubberband fails in this process; later renders go straight to librosa
+_rubberband_failed = False
+
+
+def transpose_engine() -> str:
+    """
+    Engine shift_pitch will use in this process (part of the transpose cache key)
+
+    pyrubberband only wraps the rubberband command line tool, so the binary
+    has to be on PATH too (checked per call: app.py extends PATH at startup).
+    """
+    if PYRUBBERBAND_AVAILABLE and not _rubberband_failed and shutil.which('rubberband'):
+        return 'pyrubberband'
+    return 'librosa'
+
+
+def cached_engines() -> Tuple[str, ...]:
+    """
+    Engines whose cached renderings serve a request here, preferred first
+
+    A worker process whose pyrubberband failed stores its output under the
+    librosa key while this process still resolves transpose_engine() to
+    pyrubberband; looking that key up too keeps such renders reusable.
+    """
+    engine = transpose_engine()
+    return (engine,) if engine == 'librosa' else (engine, 'librosa')
+
+
+def engine_of(method_used: str) -> str:
+    """Engine name of a shift_pitch() method_used string"""
+    return 'pyrubberband' if method_used and method_used.startswith('pyrubberband') else 'librosa'
+
+
+def transpose_quality(preserve_formant: bool) -> str:
+    """Quality label of a rendering (part of the transpose cache key)"""
+    return 'formant' if preserve_formant else 'plain'
+
+
+def shift_pitch(y: np.ndarray, sr: int, semitone_shift: int, preserve_formant: bool = True,
+                verbose: bool = True) -> Tuple[np.ndarray, str]:
+    """
+    Pitch shift a mono signal, pyrubberband first with librosa fallback
+    
+    A pyrubberband failure switches this process to librosa for good, so
+    transpose_engine() (and the cache key) follows what actually renders.
+    
+    Args:
+        verbose: Log the method used (off for per-block calls of the streaming shifter)
+    
+    Returns:
+        (shifted_signal, method_used) - engine_of(method_used) is the engine that ran
+    """
+    global _rubberband_failed
+    
+    # ===== HYBRID APPROACH: Try pyrubberband first, fallback to librosa advanced =====
+    if transpose_engine() == 'pyrubberband':
+        try:
+            # ✅ BEST METHOD - Pyrubberband with formant preservation
+            rbargs = {'--formant': 'preserved'} if preserve_formant else {}
+            y_transposed = pyrb.pitch_shift(y, sr, semitone_shift, rbargs=rbargs)
+            method_used = "pyrubberband (high quality)"
+            if verbose:
+                print(f"   ✅ Using {method_used}")
+            return y_transposed, method_used
+        except Exception as e:
+            _rubberband_failed = True
+            print(f"   ⚠️  Pyrubberband failed, using librosa from now on: {e}")
+    
+    # Fallback to librosa advanced
+    if verbose:
+        print("   ⚠️  Using librosa advanced (fallback)...")
+    
+    # High quality pitch shift
+    y_transposed = librosa.effects.pitch_shift(
+        y=y,
+        sr=sr,
+        n_steps=semitone_shift,
+        bins_per_octave=12 * 8,  # Higher resolution (was 12*4)
+        res_type='kaiser_best',  # Best quality resampling
+    )
+    
+    if preserve_formant:
+        # Manual formant preservation via time stretching
+        stretch_factor = 2.0 ** (semitone_shift / 12.0)
+        y_stretched = librosa.effects.time_stretch(
+            y_transposed, 
+            rate=1.0 / stretch_factor
+        )
+        
+        # Trim or pad to match original length
+        target_length = len(y)
+        if len(y_stretched) > target_length:
+            y_transposed = y_stretched[:target_length]
+        else:
+            y_transposed = np.pad(
+                y_stretched, 
+                (0, target_length - len(y_stretched)),
+                mode='constant'
+            )
+        
+        method_used = "librosa advanced (formant preserved)"
+    else:
+        method_used = "librosa advanced (no formant preservation)"
+    
+    if verbose:
+        print(f"   ✅ Using {method_used}")
+    return y_transposed, method_used
+
+
+def render_transposed(
+    audio_file: str,
+    semitone_shift: int,
+    output_file: str,
+    preserve_formant: bool = True,
+    progress: Optional[Callable[[str, float], None]] = None,
+    workers: int = 0
+) -> dict:
+    """
+    Load audio_file, shift it and write output_file (format from the extension)
+    
+    Shared by transpose_audio(), the song transpose endpoints and the
+    transpose job workers; pass it to TransposeCache.get_or_render as the
+    render callback.
+    
+    Args:
+        progress: Optional progress(stage, fraction) callback
+        workers: > 1 shifts overlapping segments in that many processes
+            (parallel_shift); 0 / 1 = one shift_pitch() call
+    
+    Returns:
+        {'method', 'engine', 'sample_rate', 'duration_seconds'} - engine is
+        the one that actually rendered (may differ from transpose_engine()
+        before the call)
+    """
+    report = progress or (lambda stage, fraction: None)
+    
+    print(f"[1/3] Loading audio: {audio_file}")
+    report('loading', 0.05)
+    y, sr = librosa.load(audio_file, sr=None, mono=True)
+    
+    print(f"[2/3] Transposing by {semitone_shift} semitones...")
+    report('shifting', 0.2)
+    if workers > 1:
+        from parallel_shift import parallel_shift_pitch
+        y_transposed, method_used = parallel_shift_pitch(y, sr, semitone_shift, preserve_formant, workers=workers)
+    else:
+        y_transposed, method_used = shift_pitch(y, sr, semitone_shift, preserve_formant)
+    
+    print(f"[3/3] Saving to: {output_file}")
+    report('saving', 0.9)
+    sf.write(output_file, y_transposed, sr)
+    
+    return {
+        'method': method_used,
+        'engine': engine_of(method_used),
+        'sample_rate': int(sr),
+        'duration_seconds': float(len(y) / sr)
+    }
+
+
 # ===== MAIN TRANSPOSE FUNCTION =====
 
 def transpose_audio(
@@ -118,7 +271,9 @@ def transpose_audio(
     original_key: str,
     target_key: str,
     output_file: Optional[str] = None,
-    preserve_formant: bool = True
+    preserve_formant: bool = True,
+    cache=None,
+    workers: int = 0
 ) -> Tuple[str, dict]:
     """
     Transpose audio file dengan formant preservation untuk natural sound
@@ -129,6 +284,8 @@ def transpose_audio(
         target_key: Key target (e.g., 'D', 'A')
         output_file: Output path (auto-generate if None)
         preserve_formant: Preserve formant untuk naturalness (RECOMMENDED: True)
+        cache: Optional TransposeCache; used when output_file is None
+        workers: Render processes for one transposition (see render_transposed)
     
     Returns:
         (output_file_path, transpose_info_dict)
@@ -151,75 +308,28 @@ def transpose_audio(
     if not recommendation['is_optimal']:
         warnings.warn(recommendation['quality_warning'], UserWarning)
     
-    # Load audio
-    print(f"[1/4] Loading audio: {audio_file}")
-    y, sr = librosa.load(audio_file, sr=None, mono=True)
-    duration = len(y) / sr
-    
-    # Transpose with improved quality
-    print(f"[2/4] Transposing by {semitone_shift} semitones...")
-    
-    # ===== HYBRID APPROACH: Try pyrubberband first, fallback to librosa advanced =====
-    method_used = None
-    
-    if PYRUBBERBAND_AVAILABLE:
-        try:
-            # ✅ BEST METHOD - Pyrubberband with formant preservation
-            rbargs = {'--formant': 'preserved'} if preserve_formant else {}
-            y_transposed = pyrb.pitch_shift(y, sr, semitone_shift, rbargs=rbargs)
-            method_used = "pyrubberband (high quality)"
-            print(f"   ✅ Using {method_used}")
-        except Exception as e:
-            print(f"   ⚠️  Pyrubberband failed: {e}")
-            method_used = None
-    
-    if method_used is None:
-        # Fallback to librosa advanced
-        print("   ⚠️  Using librosa advanced (fallback)...")
-        
-        # High quality pitch shift
-        y_transposed = librosa.effects.pitch_shift(
-            y=y,
-            sr=sr,
-            n_steps=semitone_shift,
-            bins_per_octave=12 * 8,  # Higher resolution (was 12*4)
-            res_type='kaiser_best',  # Best quality resampling
+    cached = False
+    if output_file is None and cache is not None:
+        entry = cache.get_or_render(
+            audio_file,
+            semitone_shift,
+            lambda path: render_transposed(audio_file, semitone_shift, path, preserve_formant, workers=workers),
+            engine=transpose_engine(),
+            quality=transpose_quality(preserve_formant)
         )
+        output_file = entry['path']
+        render_info = entry['info']
+        cached = entry['hit']
+    else:
+        # Auto-generate output filename
+        if output_file is None:
+            import os
+            base, ext = os.path.splitext(audio_file)
+            output_file = f"{base}_transposed_{target_key.replace('#', 'sharp')}{ext}"
         
-        if preserve_formant:
-            # Manual formant preservation via time stretching
-            stretch_factor = 2.0 ** (semitone_shift / 12.0)
-            y_stretched = librosa.effects.time_stretch(
-                y_transposed, 
-                rate=1.0 / stretch_factor
-            )
-            
-            # Trim or pad to match original length
-            target_length = len(y)
-            if len(y_stretched) > target_length:
-                y_transposed = y_stretched[:target_length]
-            else:
-                y_transposed = np.pad(
-                    y_stretched, 
-                    (0, target_length - len(y_stretched)),
-                    mode='constant'
-                )
-            
-            method_used = "librosa advanced (formant preserved)"
-        else:
-            method_used = "librosa advanced (no formant preservation)"
-        
-        print(f"   ✅ Using {method_used}")
+        render_info = render_transposed(audio_file, semitone_shift, output_file, preserve_formant, workers=workers)
     
-    # Auto-generate output filename
-    if output_file is None:
-        import os
-        base, ext = os.path.splitext(audio_file)
-        output_file = f"{base}_transposed_{target_key.replace('#', 'sharp')}{ext}"
-    
-    # Save
-    print(f"[3/4] Saving to: {output_file}")
-    sf.write(output_file, y_transposed, sr)
+    method_used = render_info.get('method')
     
     # Transpose info
     transpose_info = {
@@ -230,9 +340,10 @@ def transpose_audio(
         'direction': 'up' if semitone_shift > 0 else ('down' if semitone_shift < 0 else 'none'),
         'method': method_used,
         'preserve_formant': preserve_formant,
+        'cached': cached,
         'audio_info': {
-            'duration_seconds': float(duration),
-            'sample_rate': int(sr),
+            'duration_seconds': render_info.get('duration_seconds'),
+            'sample_rate': render_info.get('sample_rate'),
             'original_file': audio_file,
             'output_file': output_file
         },
@@ -244,7 +355,7 @@ def transpose_audio(
         }
     }
     
-    print(f"[4/4] Complete! Shift: {semitone_shift} semitones ({transpose_info['direction']})")
+    print(f"✅ Complete! Shift: {semitone_shift} semitones ({transpose_info['direction']})")
     print(f"      Method: {method_used}")
     print(f"      Output: {output_file}")
     
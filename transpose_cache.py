@@ -0,0 +1,510 @@
+"""
+Transposition Cache
+
+Cache file audio hasil transpose, dipakai bersama oleh semua endpoint transpose:
+- Key = hash isi file sumber + shift + engine + quality + format output
+  (rename / upload ulang file yang sama tetap hit)
+- Budget ukuran disk total dengan eviction LRU atau LFU
+- Write atomic: render ke file .tmp lalu os.replace
+- Manifest JSON (metadata + access time + hits) yang di-rebuild dari isi
+  folder saat startup; file lama tanpa metadata ikut dihitung dan bisa di-evict
+- Manifest dipakai bersama antar proses: tiap write di-merge dengan isi file
+  (di bawah lock file manifest.lock), entry proses lain tidak hilang
+- Engine di key = engine yang benar-benar me-render (fallback librosa
+  disimpan dengan key librosa, bukan key pyrubberband)
+- Nama file = key, jadi file yang di-render proses lain (transpose_jobs
+  worker) langsung dikenali (adopt) tanpa berbagi state in-memory
+- Satu render per key (SingleFlight + lock file {key}.lock di cache_dir):
+  request bersamaan menunggu hasil leader
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from single_flight import FileLock, SingleFlight, lock_path
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_LOCK = 'manifest'               # lock_path(cache_dir, MANIFEST_LOCK) guards read-merge-write
+MANIFEST_FLUSH_INTERVAL = 30.0          # seconds between access-time flushes
+SOURCE_HASH_MEMO = 4096                 # (path, size, mtime) -> hash entries kept
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.ogg')
+_TMP_FILE = re.compile(r'\.tmp(\.\w+)?$')
+_KEY_FILE = re.compile(r'^([0-9a-f]{32})\.(\w+)$')
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class TransposeCache:
+    POLICIES = ('lru', 'lfu')
+
+    def __init__(self, cache_dir: str = 'songs/transposed', max_bytes: int = 2 * 1024 * 1024 * 1024,
+                 policy: str = 'lru'):
+        """
+        Initialize TransposeCache (manifest is rebuilt from cache_dir)
+
+        Args:
+            cache_dir: Folder holding the transposed files (served as-is)
+            max_bytes: Total size budget of cache_dir
+            policy: Eviction policy ('lru' or 'lfu')
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy} (use {', '.join(self.POLICIES)})")
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+
+        self._entries = {}              # key -> entry dict
+        self._by_file = {}              # filename -> key
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._source_hashes = OrderedDict()
+        self._manifest_saved_at = 0.0
+        self._manifest_dirty = False
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'coalesced': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._flights = SingleFlight(lock_dir=cache_dir)
+        self.rebuild_manifest()
+
+        print("✅ TransposeCache initialized")
+        print(f"   - Folder: {cache_dir} ({len(self._entries)} files, {self._total_bytes / (1024 * 1024):.1f} MB)")
+        print(f"   - Budget: {max_bytes / (1024 * 1024):.0f} MB, policy: {policy}")
+
+    # ===== KEYS =====
+
+    def source_hash(self, path: str) -> str:
+        """SHA-256 of the file contents (memoized per path + size + mtime)"""
+        st = os.stat(path)
+        memo_key = (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+
+        with self._lock:
+            digest = self._source_hashes.get(memo_key)
+            if digest is not None:
+                self._source_hashes.move_to_end(memo_key)
+                return digest
+
+        digest = file_sha256(path)
+
+        with self._lock:
+            self._source_hashes[memo_key] = digest
+            while len(self._source_hashes) > SOURCE_HASH_MEMO:
+                self._source_hashes.popitem(last=False)
+
+        return digest
+
+    @staticmethod
+    def make_key(source_hash: str, semitone_shift: int, engine: str, quality: str, output_format: str) -> str:
+        """Cache key for one rendering of one source"""
+        params = json.dumps([source_hash, int(semitone_shift), engine, quality, output_format.lower()])
+        return hashlib.sha256(params.encode('utf-8')).hexdigest()[:32]
+
+    @staticmethod
+    def entry_filename(key: str, output_format: str) -> str:
+        """File name of a rendering inside cache_dir"""
+        return f"{key}.{output_format.lower()}"
+
+    @staticmethod
+    def tmp_filename(key: str, output_format: str) -> str:
+        """Per process/thread temporary name for an in-progress rendering"""
+        return f"{key}.{os.getpid()}.{threading.get_ident()}.tmp.{output_format.lower()}"
+
+    # ===== LOOKUP / RENDER =====
+
+    def lookup(self, key: str, output_format: Optional[str] = None) -> Optional[Dict]:
+        """
+        Entry for key (and count it as an access) or None
+
+        With output_format, a file rendered by another process under this
+        key is adopted first.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and output_format:
+                self.adopt(key, output_format)
+                entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            path = os.path.join(self.cache_dir, entry['file'])
+            if not os.path.exists(path):
+                # Deleted behind our back
+                self._drop(key)
+                return None
+
+            self._touch(entry)
+            return self._result(key, entry, hit=True)
+
+    def get_or_render(
+        self,
+        source_path: str,
+        semitone_shift: int,
+        render: Callable[[str], Optional[Dict]],
+        engine: str,
+        quality: str,
+        output_format: str = 'wav',
+        source_hash: Optional[str] = None
+    ) -> Dict:
+        """
+        Cached rendering of source_path, rendered on a miss
+
+        Args:
+            source_path: Original audio file
+            semitone_shift: Shift in semitones
+            render: render(output_path) writes the transposed audio and
+                returns optional info (method, sample_rate, ...) kept in the manifest;
+                info['engine'] names the engine that actually ran
+            engine: Engine name expected to render (part of the key)
+            quality: Quality setting (part of the key)
+            output_format: Output file extension / format (part of the key)
+            source_hash: Precomputed content hash of source_path
+
+        Returns:
+            {'key', 'file', 'path', 'size', 'hit', 'info'} - key / file belong
+            to the engine that rendered, which differs from engine after a fallback
+        """
+        source_hash = source_hash or self.source_hash(source_path)
+        key = self.make_key(source_hash, semitone_shift, engine, quality, output_format)
+
+        cached = self.lookup(key, output_format)
+        if cached is not None:
+            with self._lock:
+                self._stats['hits'] += 1
+            print(f"⚡ TransposeCache hit: {cached['file']}")
+            return cached
+
+        # One render per key: concurrent requests here wait for the leader,
+        # other processes wait on the key's lock file
+        result, shared = self._flights.do(
+            key,
+            lambda: self._render_locked(key, source_hash, semitone_shift, render, engine, quality, output_format)
+        )
+        if shared:
+            with self._lock:
+                self._stats['coalesced'] += 1
+            return dict(result, hit=True, info=dict(result['info']))
+        return result
+
+    def _render_locked(self, key: str, source_hash: str, semitone_shift: int, render: Callable[[str], Optional[Dict]],
+                       engine: str, quality: str, output_format: str) -> Dict:
+        """Render into the cache (leader only, holding the key's lock file)"""
+        # Another process may have rendered it while we waited for the lock
+        cached = self.lookup(key, output_format)
+        if cached is not None:
+            with self._lock:
+                self._stats['hits'] += 1
+            return cached
+
+        filename = self.entry_filename(key, output_format)
+        path = os.path.join(self.cache_dir, filename)
+        tmp_path = os.path.join(self.cache_dir, self.tmp_filename(key, output_format))
+
+        try:
+            info = render(tmp_path) or {}
+            if info.get('engine', engine) != engine:
+                # Fallback engine ran: never store its output under the requested engine's key
+                print(f"⚠️ TransposeCache: rendered with {info['engine']} instead of {engine}")
+                engine = info['engine']
+                key = self.make_key(source_hash, semitone_shift, engine, quality, output_format)
+                filename = self.entry_filename(key, output_format)
+                path = os.path.join(self.cache_dir, filename)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove_file(tmp_path)
+            raise
+
+        now = time.time()
+        entry = {
+            'file': filename,
+            'size': os.path.getsize(path),
+            'created_at': now,
+            'last_access': now,
+            'hits': 0,
+            'source_hash': source_hash,
+            'semitone_shift': int(semitone_shift),
+            'engine': engine,
+            'quality': quality,
+            'format': output_format.lower(),
+            'info': info
+        }
+
+        with self._lock:
+            self._stats['misses'] += 1
+            self._add(key, entry)
+            self._evict(protect=key)
+            self._save_manifest()
+            return self._result(key, entry, hit=False)
+
+    def adopt(self, key: str, output_format: str, info: Optional[Dict] = None, **metadata) -> Optional[Dict]:
+        """
+        Register a rendering another process already moved into cache_dir
+
+        Args:
+            key: Cache key (make_key)
+            output_format: Output format of the file
+            info: Render info (method, sample_rate, ...)
+            **metadata: Extra manifest fields (source_hash, semitone_shift, ...)
+
+        Returns:
+            Result dict like get_or_render, None if the file does not exist
+        """
+        filename = self.entry_filename(key, output_format)
+        path = os.path.join(self.cache_dir, filename)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if info and not entry.get('info'):
+                    entry['info'] = info
+                    self._manifest_dirty = True
+                return self._result(key, entry, hit=True)
+
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+
+            now = time.time()
+            entry = dict(metadata)
+            entry.update({
+                'file': filename,
+                'size': st.st_size,
+                'created_at': st.st_mtime,
+                'last_access': now,
+                'hits': 0,
+                'format': output_format.lower(),
+                'info': info or {}
+            })
+            self._add(key, entry)
+            self._evict(protect=key)
+            self._save_manifest()
+            return self._result(key, entry, hit=True)
+
+    def touch(self, filename: str):
+        """Count a direct download of filename as an access"""
+        with self._lock:
+            key = self._by_file.get(filename)
+            if key is not None:
+                self._touch(self._entries[key])
+
+    def _touch(self, entry: Dict):
+        """Update access stats (caller holds the lock)"""
+        entry['last_access'] = time.time()
+        entry['hits'] += 1
+        self._manifest_dirty = True
+        if time.monotonic() - self._manifest_saved_at >= MANIFEST_FLUSH_INTERVAL:
+            self._save_manifest()
+
+    def _result(self, key: str, entry: Dict, hit: bool) -> Dict:
+        return {
+            'key': key,
+            'file': entry['file'],
+            'path': os.path.join(self.cache_dir, entry['file']),
+            'size': entry['size'],
+            'hit': hit,
+            'info': dict(entry.get('info') or {})
+        }
+
+    # ===== BOOKKEEPING =====
+
+    def _add(self, key: str, entry: Dict):
+        if key in self._entries:
+            self._total_bytes -= self._entries[key]['size']
+        self._entries[key] = entry
+        self._by_file[entry['file']] = key
+        self._total_bytes += entry['size']
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._by_file.pop(entry['file'], None)
+        self._total_bytes -= entry['size']
+        self._manifest_dirty = True
+
+    def _evict(self, protect: Optional[str] = None):
+        """Remove entries by policy until the folder fits max_bytes (caller holds the lock)"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        if self.policy == 'lfu':
+            rank = lambda item: (item[1]['hits'], item[1]['last_access'])
+        else:
+            rank = lambda item: item[1]['last_access']
+
+        for key, entry in sorted(self._entries.items(), key=rank):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if key == protect:
+                continue
+            self._remove_file(os.path.join(self.cache_dir, entry['file']))
+            self._drop(key)
+            self._stats['evictions'] += 1
+            print(f"🗑️  TransposeCache evicted: {entry['file']} ({entry['size'] / (1024 * 1024):.1f} MB)")
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # ===== MANIFEST =====
+
+    def _rendering(self, tmp_name: str) -> bool:
+        """Whether a live render holds the lock of tmp_name's key (tmp_filename() names)"""
+        lock = FileLock(lock_path(self.cache_dir, tmp_name.split('.', 1)[0]), timeout=0)
+        try:
+            lock.acquire()
+        except TimeoutError:
+            return True
+        lock.release()
+        return False
+
+    def rebuild_manifest(self):
+        """
+        Reconcile the manifest with the files actually in cache_dir
+
+        Entries whose file is gone are dropped, leftover .tmp files from
+        interrupted renders are deleted (unless their key's lock is held:
+        every process sharing cache_dir builds its manifest on startup while
+        others may be rendering), and audio files without an entry
+        (older filename-based cache, other processes) are adopted so they
+        count towards the budget and can be evicted.
+        """
+        with self._lock:
+            saved = self._read_manifest()
+            saved_by_file = {entry.get('file'): (key, entry) for key, entry in saved.items()
+                             if isinstance(entry, dict)}
+
+            self._entries = {}
+            self._by_file = {}
+            self._total_bytes = 0
+
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if _TMP_FILE.search(name):
+                    if not self._rendering(name):
+                        self._remove_file(path)
+                    continue
+                if not name.lower().endswith(AUDIO_EXTENSIONS):
+                    continue
+
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+
+                key, entry = saved_by_file.get(name, (None, None))
+                if entry is None:
+                    # Unknown file: content-addressed name -> its key, anything
+                    # else is keyed by filename so it is never hit again
+                    match = _KEY_FILE.match(name)
+                    key = match.group(1) if match else f"file:{name}"
+                    entry = {
+                        'file': name,
+                        'created_at': st.st_mtime,
+                        'last_access': st.st_atime,
+                        'hits': 0
+                    }
+                entry['size'] = st.st_size
+                self._add(key, entry)
+
+            self._evict()
+            self._save_manifest()
+
+    def _read_manifest(self) -> Dict:
+        """Entries of the manifest on disk ({} if missing or unreadable)"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f).get('entries', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+        return saved if isinstance(saved, dict) else {}
+
+    def _merge_manifest(self, saved: Dict):
+        """
+        Fold entries other processes wrote into this view (caller holds the lock)
+
+        Unknown entries are added while their file exists (files this process
+        evicted or saw deleted are gone, so they stay dropped); for shared
+        entries the newer access time, the larger hit count and any missing
+        metadata win.
+        """
+        for key, entry in saved.items():
+            if not isinstance(entry, dict) or 'file' not in entry:
+                continue
+
+            mine = self._entries.get(key)
+            if mine is not None:
+                mine['last_access'] = max(mine.get('last_access', 0), entry.get('last_access', 0))
+                mine['hits'] = max(mine.get('hits', 0), entry.get('hits', 0))
+                for field, value in entry.items():
+                    if not mine.get(field) and value:
+                        mine[field] = value
+                continue
+
+            if entry['file'] in self._by_file:
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, entry['file']))
+            except OSError:
+                continue
+            entry['size'] = st.st_size
+            entry.setdefault('hits', 0)
+            entry.setdefault('last_access', st.st_mtime)
+            self._add(key, entry)
+
+    def _save_manifest(self):
+        """Merge with the manifest on disk and write it atomically (caller holds the lock)"""
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # Read-merge-write under a lock file: concurrent processes keep each other's entries
+            with FileLock(lock_path(self.cache_dir, MANIFEST_LOCK)):
+                self._merge_manifest(self._read_manifest())
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': 1, 'entries': self._entries}, f)
+                os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"⚠️ TransposeCache: failed to write {self.manifest_path}: {e}")
+            self._remove_file(tmp_path)
+            return
+
+        self._manifest_saved_at = time.monotonic()
+        self._manifest_dirty = False
+
+    def flush(self):
+        """Persist pending access-time updates"""
+        with self._lock:
+            if self._manifest_dirty:
+                self._save_manifest()
+
+    # ===== STATS =====
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters and disk usage"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._total_bytes
+        stats['single_flight'] = self._flights.stats()
+
+        # Coalesced requests waited for another request's render instead of rendering
+        lookups = stats['hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_rate'] = (stats['hits'] + stats['coalesced']) / lookups if lookups else 0.0
+        stats['max_bytes'] = self.max_bytes
+        stats['policy'] = self.policy
+        return stats
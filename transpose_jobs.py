@@ -0,0 +1,461 @@
+"""
+Transpose Job Queue
+
+Transpose lagu penuh (puluhan detik) dipindah dari request thread ke worker process:
+- Endpoint hanya enqueue job (atau langsung menjawab jika TransposeCache hit)
+- Job disimpan di SQLite terpisah (default transpose_jobs.db, WAL) sehingga
+  tetap ada setelah restart; update status tidak mengubah data_version songs.db
+- Worker process (subprocess transpose_worker.py, bukan multiprocessing spawn
+  yang meng-import ulang app.py) claim job secara atomic (BEGIN IMMEDIATE), render
+  langsung ke folder TransposeCache (nama file = cache key) dan update
+  stage/progress + heartbeat
+- Job 'running' dengan heartbeat basi (worker mati) di-requeue, maksimal MAX_ATTEMPTS
+- Request identik yang masih queued/running memakai job yang sama
+- Opsional: tiap worker me-render satu lagu dengan beberapa proses
+  (render_workers, lihat parallel_shift)
+"""
+
+import atexit
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from single_flight import FileLock, lock_path
+from transpose_cache import TransposeCache
+
+POLL_INTERVAL = 0.5             # idle worker sleep between claims (seconds)
+HEARTBEAT_INTERVAL = 5.0        # running job heartbeat period
+STALE_AFTER = 60.0              # running job without heartbeat this long -> requeued
+MAX_ATTEMPTS = 3                # claims per job before it is marked failed
+BUSY_TIMEOUT_MS = 5000
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transpose_worker.py')
+
+ACTIVE_STATUSES = ('queued', 'running')
+FINAL_STATUSES = ('done', 'failed')
+
+_JSON_COLUMNS = ('context', 'result')
+
+
+class TransposeJobQueue:
+    def __init__(self, db_path: str = 'transpose_jobs.db', cache_dir: str = 'songs/transposed',
+                 workers: int = 2, render_workers: int = 0):
+        """
+        Initialize TransposeJobQueue (workers start on first enqueue or resume())
+
+        Args:
+            db_path: SQLite file for the job table
+            cache_dir: TransposeCache folder the workers render into
+            workers: Worker processes (0 = enqueue only, e.g. inside a worker)
+            render_workers: Processes each worker uses for one rendering
+                (> 1 = parallel_shift pool per worker, 0 = serial)
+        """
+        self.db_path = db_path
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.render_workers = render_workers
+
+        self._local = threading.local()
+        self._processes = []
+        self._processes_lock = threading.Lock()
+        self._stop_at_exit = False
+
+        self.init_database()
+
+    # ===== DATABASE =====
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection (not reused across fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def init_database(self):
+        conn = self.connection()
+        conn.execute("PRAGMA journal_mode = WAL")
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS transpose_jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    stage TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    cache_key TEXT NOT NULL,
+                    source_path TEXT NOT NULL,
+                    source_hash TEXT,
+                    semitone_shift INTEGER NOT NULL,
+                    preserve_formant INTEGER NOT NULL DEFAULT 1,
+                    engine TEXT,
+                    quality TEXT,
+                    output_format TEXT NOT NULL DEFAULT 'wav',
+                    context TEXT,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker_pid INTEGER,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    heartbeat_at REAL,
+                    finished_at REAL,
+                    adopted INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(transpose_jobs)")}
+            if 'adopted' not in columns:
+                conn.execute("ALTER TABLE transpose_jobs ADD COLUMN adopted INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transpose_jobs_status ON transpose_jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transpose_jobs_cache_key ON transpose_jobs (cache_key, status)")
+
+    @staticmethod
+    def _job(row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] else None
+        job['preserve_formant'] = bool(job['preserve_formant'])
+        job['adopted'] = bool(job['adopted'])
+        return job
+
+    # ===== PRODUCER (request threads) =====
+
+    def submit(self, cache: TransposeCache, source_path: str, semitone_shift: int,
+               preserve_formant: bool = True, context: Optional[Dict] = None,
+               output_format: str = 'wav') -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Cached rendering if there is one, otherwise a (new or shared) job
+
+        Args:
+            cache: TransposeCache the workers render into
+            source_path: Original audio file
+            semitone_shift: Shift in semitones
+            preserve_formant: Formant preservation (part of the cache key)
+            context: JSON-serializable data returned with the job (song, keys, ...)
+            output_format: Output format
+
+        Returns:
+            (cache_entry, None) on a cache hit, else (None, job)
+        """
+        from transpose_audio import cached_engines, transpose_engine, transpose_quality
+
+        source_hash = cache.source_hash(source_path)
+        engine = transpose_engine()
+        quality = transpose_quality(preserve_formant)
+        key = cache.make_key(source_hash, semitone_shift, engine, quality, output_format)
+
+        # Also under the fallback engine's key: run_job stores it there when a worker's pyrubberband failed
+        for cached_engine in cached_engines():
+            entry = cache.lookup(
+                cache.make_key(source_hash, semitone_shift, cached_engine, quality, output_format), output_format
+            )
+            if entry is not None:
+                return entry, None
+
+        job = self.enqueue(
+            cache_key=key,
+            source_path=source_path,
+            source_hash=source_hash,
+            semitone_shift=semitone_shift,
+            preserve_formant=preserve_formant,
+            engine=engine,
+            quality=quality,
+            output_format=output_format,
+            context=context
+        )
+        return None, job
+
+    def enqueue(self, cache_key: str, source_path: str, semitone_shift: int, preserve_formant: bool = True,
+                engine: Optional[str] = None, quality: Optional[str] = None, output_format: str = 'wav',
+                source_hash: Optional[str] = None, context: Optional[Dict] = None) -> Dict:
+        """Add a job (or return the queued/running job with the same cache key)"""
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(f'''
+                SELECT * FROM transpose_jobs
+                WHERE cache_key = ? AND status IN ({','.join('?' * len(ACTIVE_STATUSES))})
+                ORDER BY created_at LIMIT 1
+            ''', (cache_key,) + ACTIVE_STATUSES).fetchone()
+
+            if row is None:
+                job_id = uuid.uuid4().hex
+                conn.execute('''
+                    INSERT INTO transpose_jobs
+                        (id, status, stage, cache_key, source_path, source_hash, semitone_shift,
+                         preserve_formant, engine, quality, output_format, context, created_at)
+                    VALUES (?, 'queued', 'queued', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    job_id, cache_key, source_path, source_hash, int(semitone_shift),
+                    int(bool(preserve_formant)), engine, quality, output_format.lower(),
+                    json.dumps(context) if context is not None else None, time.time()
+                ))
+                row = conn.execute("SELECT * FROM transpose_jobs WHERE id = ?", (job_id,)).fetchone()
+                print(f"[TransposeJobs] Queued {job_id}: {source_path} ({semitone_shift:+d})")
+
+        self.start_workers()
+        return self._job(row)
+
+    def mark_adopted(self, job_id: str) -> bool:
+        """
+        Claim registering a finished job's rendering in the cache
+
+        Returns:
+            True for exactly one caller per job, across processes
+        """
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE transpose_jobs SET adopted = 1 WHERE id = ? AND status = 'done' AND adopted = 0",
+                (job_id,)
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job dict by id (None if unknown)"""
+        row = self.connection().execute("SELECT * FROM transpose_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row)
+
+    def pending_count(self) -> int:
+        """Queued + running jobs"""
+        return self.connection().execute(
+            f"SELECT COUNT(*) FROM transpose_jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+            ACTIVE_STATUSES
+        ).fetchone()[0]
+
+    def purge(self, older_than: float = 7 * 24 * 3600) -> int:
+        """Delete finished jobs older than older_than seconds"""
+        with self.connection() as conn:
+            return conn.execute(
+                f"DELETE FROM transpose_jobs WHERE status IN ({','.join('?' * len(FINAL_STATUSES))}) AND finished_at < ?",
+                FINAL_STATUSES + (time.time() - older_than,)
+            ).rowcount
+
+    # ===== WORKER PROCESSES =====
+
+    def resume(self):
+        """Start workers if jobs were left queued/running by a previous run"""
+        if self.workers <= 0:
+            return
+
+        pending = self.pending_count()
+        if pending:
+            print(f"[TransposeJobs] Resuming {pending} unfinished jobs")
+            self.start_workers()
+
+    def start_workers(self):
+        """
+        Start (or replace dead) worker processes
+
+        Workers run transpose_worker.py in a fresh interpreter: a multiprocessing
+        spawn child would re-import this process's __main__ (app.py) and build
+        the whole app again. They exit on their own once this process is gone.
+        """
+        if self.workers <= 0:
+            return
+
+        with self._processes_lock:
+            self._processes = [process for process in self._processes if process.poll() is None]
+            if not self._stop_at_exit:
+                atexit.register(self.stop_workers)
+                self._stop_at_exit = True
+            while len(self._processes) < self.workers:
+                process = subprocess.Popen([
+                    sys.executable, WORKER_SCRIPT, self.db_path, self.cache_dir,
+                    '--render-workers', str(self.render_workers),
+                    '--parent-pid', str(os.getpid())
+                ])
+                self._processes.append(process)
+                print(f"[TransposeJobs] Started worker pid {process.pid}")
+
+    def stop_workers(self, timeout: float = 5.0):
+        """Terminate worker processes (running jobs are requeued by heartbeat)"""
+        with self._processes_lock:
+            processes, self._processes = self._processes, []
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    # ===== CONSUMER (worker side) =====
+
+    def claim(self, worker_pid: int) -> Optional[Dict]:
+        """
+        Atomically take the oldest queued job
+
+        Jobs whose worker stopped sending heartbeats are requeued first
+        (or failed after MAX_ATTEMPTS claims).
+        """
+        conn = self.connection()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute('''
+                UPDATE transpose_jobs
+                SET status = 'failed', stage = 'failed', finished_at = ?,
+                    error = 'Worker stopped responding (max attempts reached)'
+                WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?
+            ''', (now, now - STALE_AFTER, MAX_ATTEMPTS))
+            conn.execute('''
+                UPDATE transpose_jobs
+                SET status = 'queued', stage = 'requeued', progress = 0, worker_pid = NULL
+                WHERE status = 'running' AND heartbeat_at < ?
+            ''', (now - STALE_AFTER,))
+
+            row = conn.execute(
+                "SELECT id FROM transpose_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute('''
+                UPDATE transpose_jobs
+                SET status = 'running', stage = 'starting', progress = 0, attempts = attempts + 1,
+                    worker_pid = ?, started_at = ?, heartbeat_at = ?
+                WHERE id = ?
+            ''', (worker_pid, now, now, row['id']))
+            job = conn.execute("SELECT * FROM transpose_jobs WHERE id = ?", (row['id'],)).fetchone()
+
+        return self._job(job)
+
+    def heartbeat(self, job_id: str, stage: Optional[str] = None, progress: Optional[float] = None):
+        """Refresh a running job's heartbeat (and stage / progress)"""
+        with self.connection() as conn:
+            conn.execute('''
+                UPDATE transpose_jobs
+                SET heartbeat_at = ?, stage = COALESCE(?, stage), progress = COALESCE(?, progress)
+                WHERE id = ? AND status = 'running' AND worker_pid = ?
+            ''', (time.time(), stage, progress, job_id, os.getpid()))
+
+    def finish(self, job_id: str, result: Dict):
+        with self.connection() as conn:
+            conn.execute('''
+                UPDATE transpose_jobs
+                SET status = 'done', stage = 'done', progress = 1, result = ?, error = NULL, finished_at = ?
+                WHERE id = ? AND worker_pid = ?
+            ''', (json.dumps(result), time.time(), job_id, os.getpid()))
+
+    def fail(self, job_id: str, error: str):
+        with self.connection() as conn:
+            conn.execute('''
+                UPDATE transpose_jobs
+                SET status = 'failed', stage = 'failed', error = ?, finished_at = ?
+                WHERE id = ? AND worker_pid = ?
+            ''', (error, time.time(), job_id, os.getpid()))
+
+    def run_job(self, job: Dict):
+        """
+        Render one claimed job into the cache folder
+
+        If the render fell back to another engine than the job's, the file is
+        stored under that engine's key; the result names the key and engine.
+        """
+        from transpose_audio import render_transposed
+
+        job_id = job['id']
+        key = job['cache_key']
+        engine = job['engine']
+        filename = TransposeCache.entry_filename(key, job['output_format'])
+        path = os.path.join(self.cache_dir, filename)
+        tmp_path = os.path.join(self.cache_dir, TransposeCache.tmp_filename(job['cache_key'], job['output_format']))
+
+        # Same per-key lock file as TransposeCache: never render a key twice at once
+        lock = FileLock(lock_path(self.cache_dir, key))
+
+        # Keep the heartbeat (and the key's lock, once held) fresh while a long
+        # render has no progress to report; otherwise the lock looks stale after
+        # single_flight.STALE_AFTER and another process renders the same key
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                self.heartbeat(job_id)
+                lock.refresh()
+
+        heartbeat_thread = threading.Thread(target=beat, daemon=True)
+        heartbeat_thread.start()
+
+        start = time.time()
+        try:
+            info = {}
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with lock:
+                if not os.path.exists(path):
+                    info = render_transposed(
+                        job['source_path'],
+                        job['semitone_shift'],
+                        tmp_path,
+                        job['preserve_formant'],
+                        progress=lambda stage, fraction: self.heartbeat(job_id, stage, fraction),
+                        workers=self.render_workers
+                    )
+                    if info.get('engine', engine) != engine:
+                        engine = info['engine']
+                        key = TransposeCache.make_key(
+                            job['source_hash'], job['semitone_shift'], engine, job['quality'], job['output_format']
+                        )
+                        filename = TransposeCache.entry_filename(key, job['output_format'])
+                        path = os.path.join(self.cache_dir, filename)
+                        print(f"[TransposeJobs] {job_id} rendered with {engine}, cached as {filename}")
+                    os.replace(tmp_path, path)
+
+            self.finish(job_id, {
+                'file': filename, 'key': key, 'engine': engine, 'size': os.path.getsize(path), 'info': info
+            })
+            print(f"[TransposeJobs] Done {job_id} in {time.time() - start:.1f}s: {filename}")
+        except Exception as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            self.fail(job_id, str(e))
+            print(f"[TransposeJobs] Failed {job_id}: {e}")
+        finally:
+            stop.set()
+            heartbeat_thread.join()
+
+
+def run_worker(db_path: str, cache_dir: str, render_workers: int = 0, parent_pid: Optional[int] = None):
+    """
+    Worker process loop: claim, render, repeat (see transpose_worker.py)
+
+    Args:
+        db_path: SQLite file for the job table
+        cache_dir: TransposeCache folder to render into
+        render_workers: Processes for one rendering (> 1 = parallel_shift pool)
+        parent_pid: Exit once this process (the app) is gone
+    """
+    # terminate() -> SystemExit, so a render pool is shut down with the worker
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    queue = TransposeJobQueue(db_path, cache_dir, workers=0, render_workers=render_workers)
+    pid = os.getpid()
+
+    try:
+        while True:
+            job = queue.claim(pid)
+            if job is None:
+                if parent_pid is not None and os.getppid() != parent_pid:
+                    print(f"[TransposeJobs] Parent {parent_pid} gone, worker {pid} exiting")
+                    return
+                time.sleep(POLL_INTERVAL)
+                continue
+            queue.run_job(job)
+    finally:
+        if render_workers > 1:
+            from parallel_shift import shutdown_pool
+            shutdown_pool(wait=True)
@@ -0,0 +1,37 @@
+"""
+Transpose Worker
+
+Entry point worker process TransposeJobQueue (dijalankan sebagai subprocess):
+- Multiprocessing spawn meng-import ulang __main__ di setiap child; dengan
+  app.py sebagai __main__, tiap worker (dan tiap proses render pool-nya) ikut
+  membangun Flask app, database, cache dan job queue
+- File ini hanya meng-import transpose_jobs, jadi worker dan render pool-nya
+  tetap ringan
+
+Usage (normalnya dijalankan oleh TransposeJobQueue.start_workers):
+    python transpose_worker.py transpose_jobs.db songs/transposed
+    python transpose_worker.py transpose_jobs.db songs/transposed --render-workers 4
+"""
+
+import argparse
+import sys
+
+from transpose_jobs import run_worker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render queued transpose jobs')
+    parser.add_argument('db_path', help='SQLite file with the transpose_jobs table')
+    parser.add_argument('cache_dir', help='TransposeCache folder to render into')
+    parser.add_argument('--render-workers', type=int, default=0,
+                        help='Processes per rendering (> 1 = parallel_shift pool)')
+    parser.add_argument('--parent-pid', type=int, default=None,
+                        help='Exit once this process is gone')
+    args = parser.parse_args(argv)
+
+    run_worker(args.db_path, args.cache_dir, args.render_workers, args.parent_pid)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
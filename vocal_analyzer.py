@@ -8,20 +8,36 @@ Menganalisis karakteristik vokal dari pitch data:
 - Support Mayor notation: C C# D D# E E# F F# G G# A A# B B#
 """
 
-import librosa
 import numpy as np
 from collections import Counter
 
+import note_table
+from pitch_track import PitchTrack
+
 class VocalAnalyzer:
     # Mayor notation (sharp only)
     MAJOR_NOTES = ['C', 'C#', 'D', 'D#', 'E', 'E#', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B', 'B#']
     
+    # Key names by pitch class (sharp only)
+    KEY_NAMES = list(note_table.NOTE_NAMES)
+    
     def __init__(self):
         """Initialize Vocal Analyzer"""
         # Key profiles (Krumhansl-Schmuckler algorithm)
         self.major_profile = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
         self.minor_profile = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
         
+        # 24x12 z-scored profile matrix, rows: C major, C minor, C# major, C# minor, ...
+        # (row for key k = profile rotated so its tonic weight sits on pitch class k)
+        self.key_candidates = [
+            (key, scale) for key in self.KEY_NAMES for scale in ('major', 'minor')
+        ]
+        profiles = np.array([
+            np.roll(self.major_profile if scale == 'major' else self.minor_profile, shift)
+            for shift in range(12) for scale in ('major', 'minor')
+        ])
+        self.key_profile_matrix = self._zscore(profiles)
+        
         # Vocal range classifications (in MIDI notes)
         self.vocal_ranges = {
             'Bass': (40, 64),       # E2-E4
@@ -39,24 +55,21 @@ class VocalAnalyzer:
         Analyze vocal characteristics from pitch data
         
         Args:
-            pitch_data: Output from PitchDetector.detect_pitch()
+            pitch_data: Output from PitchDetector.detect_pitch() (or a PitchTrack)
         
         Returns:
             dict with vocal analysis results
         """
-        # Support both 'f0' and 'pitches' keys
-        if 'f0' in pitch_data:
-            f0 = np.array(pitch_data['f0'])
-            voiced_flag = pitch_data.get('voiced_flag', np.ones(len(f0), dtype=bool))
-        elif 'pitches' in pitch_data:
-            f0 = np.array(pitch_data['pitches'])
-            voiced_flag = pitch_data.get('voiced_flags', np.ones(len(f0), dtype=bool))
+        # PitchTrack (PitchDetector output) or legacy 'f0' / 'pitches' keys
+        if isinstance(pitch_data, PitchTrack):
+            track = pitch_data
+        elif 'track' in pitch_data:
+            track = pitch_data['track']
         else:
-            raise ValueError("No pitch data found (expected 'f0' or 'pitches' key)")
+            track = PitchTrack.from_dict(pitch_data)
         
-        # Filter only voiced frames
-        f0_voiced = f0[voiced_flag]
-        f0_voiced = f0_voiced[~np.isnan(f0_voiced)]
+        # Voiced frames only (float64 for the statistics below)
+        f0_voiced = track.voiced_pitches().astype(np.float64)
         
         if len(f0_voiced) == 0:
             return {
@@ -88,60 +101,61 @@ class VocalAnalyzer:
             'melody_contour': self._extract_melody_contour(f0_voiced)
         }
     
-    def _normalize_note_to_major(self, note_name):
+    def analyze_stats(self, stats):
         """
-        Normalize note to Mayor notation (sharp only)
+        Vocal analysis from a running VocalStats accumulator
+        
+        Same output shape as analyze(); median comes from the quantile sketch
+        and the contour from the accumulator's decimated samples.
         
         Args:
-            note_name: Note name (e.g., 'C4', 'Db5', 'F#3')
+            stats: vocal_stats.VocalStats
         
         Returns:
-            Normalized note in Mayor notation
+            dict with vocal analysis results
         """
-        if len(note_name) == 0:
-            return note_name
-        
-        # Remove octave number
-        note_only = ''.join([c for c in note_name if not c.isdigit() and c != '-'])
-        octave = ''.join([c for c in note_name if c.isdigit() or c == '-'])
-        
-        # Convert flat to sharp (Mayor notation)
-        flat_to_sharp = {
-            'Db': 'C#',
-            'Eb': 'D#',
-            'Fb': 'E',
-            'Gb': 'F#',
-            'Ab': 'G#',
-            'Bb': 'A#',
-            'Cb': 'B'
-        }
+        if stats.count == 0:
+            return {
+                'error': 'No valid pitch detected'
+            }
         
-        if note_only in flat_to_sharp:
-            note_only = flat_to_sharp[note_only]
+        snapshot = stats.snapshot()
+        
+        pitch_range = self._pitch_range_from_values(
+            snapshot['min_hz'], snapshot['max_hz'], snapshot['mean_hz'], snapshot['median_hz']
+        )
+        key_info = self.detect_key_batch(stats.pitch_class_counts[np.newaxis, :])[0]
+        statistics = self._statistics_from_values(
+            snapshot['mean_hz'], snapshot['median_hz'], snapshot['std_hz'],
+            snapshot['min_hz'], snapshot['max_hz'], snapshot['count']
+        )
+        statistics['percentiles_hz'] = snapshot['percentiles_hz']
+        vocal_type = self._classify_vocal_range(pitch_range['midi']['min'], pitch_range['midi']['max'])
         
-        return note_only + octave
+        return {
+            'pitch_range': pitch_range,
+            'key': key_info,
+            'statistics': statistics,
+            'vocal_classification': vocal_type,
+            'melody_contour': self._contour_from_hz(snapshot['contour_hz'])
+        }
     
     def _analyze_pitch_range(self, f0_voiced):
         """Calculate pitch range in Hz, MIDI, and note names (Mayor notation)"""
-        min_hz = float(np.min(f0_voiced))
-        max_hz = float(np.max(f0_voiced))
-        mean_hz = float(np.mean(f0_voiced))
-        median_hz = float(np.median(f0_voiced))
-        
+        return self._pitch_range_from_values(
+            float(np.min(f0_voiced)),
+            float(np.max(f0_voiced)),
+            float(np.mean(f0_voiced)),
+            float(np.median(f0_voiced))
+        )
+    
+    def _pitch_range_from_values(self, min_hz, max_hz, mean_hz, median_hz):
+        """Pitch range dict from summary values (shared by analyze / analyze_stats)"""
         # Convert to MIDI
-        min_midi = float(librosa.hz_to_midi(min_hz))
-        max_midi = float(librosa.hz_to_midi(max_hz))
-        mean_midi = float(librosa.hz_to_midi(mean_hz))
-        
-        # Convert to note names (librosa default)
-        min_note_raw = librosa.midi_to_note(int(np.round(min_midi)))
-        max_note_raw = librosa.midi_to_note(int(np.round(max_midi)))
-        mean_note_raw = librosa.midi_to_note(int(np.round(mean_midi)))
+        min_midi, max_midi, mean_midi = note_table.hz_to_midi([min_hz, max_hz, mean_hz]).tolist()
         
-        # Normalize to Mayor notation (sharp only)
-        min_note = self._normalize_note_to_major(min_note_raw)
-        max_note = self._normalize_note_to_major(max_note_raw)
-        mean_note = self._normalize_note_to_major(mean_note_raw)
+        # Note names from the lookup table (Mayor notation, sharp only)
+        min_note, max_note, mean_note = note_table.midi_to_note([min_midi, max_midi, mean_midi]).tolist()
         
         # Range in semitones
         range_semitones = max_midi - min_midi
@@ -166,68 +180,92 @@ class VocalAnalyzer:
             }
         }
     
+    @staticmethod
+    def _zscore(rows):
+        """Z-score each row over its 12 pitch classes (constant rows -> zeros)"""
+        rows = np.asarray(rows, dtype=np.float64)
+        centered = rows - rows.mean(axis=-1, keepdims=True)
+        std = centered.std(axis=-1, keepdims=True)
+        return np.divide(centered, std, out=np.zeros_like(centered), where=std > 0)
+    
+    def pitch_class_histogram(self, f0_voiced):
+        """Normalized 12-bin pitch class histogram (0=C, 1=C#, ...)"""
+        pitch_classes = note_table.pitch_class(note_table.hz_to_midi(f0_voiced))
+        
+        histogram = np.bincount(pitch_classes, minlength=12).astype(np.float64)
+        return histogram / (np.sum(histogram) + 1e-8)
+    
+    def key_correlations(self, histograms):
+        """
+        Pearson correlation of histograms with all 24 key profiles
+        
+        Args:
+            histograms: (12,) or (N, 12) pitch class histograms
+        
+        Returns:
+            (24,) or (N, 24) correlations, columns ordered as self.key_candidates
+        """
+        return self._zscore(histograms) @ self.key_profile_matrix.T / 12.0
+    
     def _detect_key(self, f0_voiced):
         """
         Detect musical key using Krumhansl-Schmuckler algorithm
         Returns key in Mayor notation (sharp only)
         """
-        # Convert Hz to MIDI
-        midi_notes = librosa.hz_to_midi(f0_voiced)
-        
-        # Get pitch classes (0-11, where 0=C, 1=C#, etc.)
-        pitch_classes = np.mod(np.round(midi_notes), 12).astype(int)
-        
-        # Build pitch class histogram
-        histogram = np.zeros(12)
-        for pc in pitch_classes:
-            histogram[pc] += 1
-        
-        # Normalize
-        histogram = histogram / (np.sum(histogram) + 1e-8)
-        
-        # Correlate with key profiles
-        best_correlation = -1
-        best_key = None
-        best_scale = None
-        
-        # Use Mayor notation (sharp only)
-        key_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+        histogram = self.pitch_class_histogram(f0_voiced)
+        return self.detect_key_batch(histogram[np.newaxis, :])[0]
+    
+    def detect_key_batch(self, histograms):
+        """
+        Krumhansl-Schmuckler key detection for many pitch class histograms at once
         
-        for shift in range(12):
-            # Test major
-            shifted_histogram = np.roll(histogram, shift)
-            correlation_major = np.corrcoef(shifted_histogram, self.major_profile)[0, 1]
-            
-            if correlation_major > best_correlation:
-                best_correlation = correlation_major
-                best_key = key_names[shift]
-                best_scale = 'major'
-            
-            # Test minor
-            correlation_minor = np.corrcoef(shifted_histogram, self.minor_profile)[0, 1]
-            
-            if correlation_minor > best_correlation:
-                best_correlation = correlation_minor
-                best_key = key_names[shift]
-                best_scale = 'minor'
+        Args:
+            histograms: (N, 12) array-like of pitch class histograms (counts or normalized)
         
-        return {
-            'key': best_key,
-            'scale': best_scale,
-            'confidence': float(best_correlation),
-            'pitch_class_histogram': histogram.tolist()
-        }
+        Returns:
+            List of N dicts: {'key', 'scale', 'confidence', 'pitch_class_histogram'}
+        """
+        histograms = np.atleast_2d(np.asarray(histograms, dtype=np.float64))
+        if histograms.shape[-1] != 12:
+            raise ValueError(f"Expected histograms with 12 pitch classes, got shape {histograms.shape}")
+        
+        histograms = histograms / (histograms.sum(axis=1, keepdims=True) + 1e-8)
+        correlations = self.key_correlations(histograms)
+        
+        # argmax keeps the first best candidate (C major before C minor before C# major ...)
+        best = np.argmax(correlations, axis=1)
+        
+        results = []
+        for row, index in enumerate(best):
+            key, scale = self.key_candidates[index]
+            results.append({
+                'key': key,
+                'scale': scale,
+                'confidence': float(correlations[row, index]),
+                'pitch_class_histogram': histograms[row].tolist()
+            })
+        return results
     
     def _calculate_statistics(self, f0_voiced):
         """Calculate various pitch statistics"""
+        return self._statistics_from_values(
+            float(np.mean(f0_voiced)),
+            float(np.median(f0_voiced)),
+            float(np.std(f0_voiced)),
+            float(np.min(f0_voiced)),
+            float(np.max(f0_voiced)),
+            int(len(f0_voiced))
+        )
+    
+    def _statistics_from_values(self, mean_hz, median_hz, std_hz, min_hz, max_hz, num_samples):
         return {
-            'mean_hz': float(np.mean(f0_voiced)),
-            'median_hz': float(np.median(f0_voiced)),
-            'std_hz': float(np.std(f0_voiced)),
-            'min_hz': float(np.min(f0_voiced)),
-            'max_hz': float(np.max(f0_voiced)),
-            'pitch_variability': float(np.std(f0_voiced) / np.mean(f0_voiced)),  # Coefficient of variation
-            'num_samples': int(len(f0_voiced))
+            'mean_hz': mean_hz,
+            'median_hz': median_hz,
+            'std_hz': std_hz,
+            'min_hz': min_hz,
+            'max_hz': max_hz,
+            'pitch_variability': std_hz / mean_hz,  # Coefficient of variation
+            'num_samples': num_samples
         }
     
     def _classify_vocal_range(self, min_midi, max_midi):
@@ -279,8 +317,10 @@ class VocalAnalyzer:
         else:
             indices = np.linspace(0, len(f0_voiced) - 1, num_points).astype(int)
         
-        contour_hz = f0_voiced[indices]
-        contour_midi = librosa.hz_to_midi(contour_hz)
+        return self._contour_from_hz(f0_voiced[indices])
+    
+    def _contour_from_hz(self, contour_hz):
+        contour_midi = note_table.hz_to_midi(np.atleast_1d(contour_hz))
         
         # Normalize to start at 0 (relative pitch)
         contour_relative = contour_midi - contour_midi[0]
@@ -0,0 +1,192 @@
+"""
+Running Vocal Statistics
+
+Accumulator untuk analisis vokal incremental (streaming, multi-recording,
+file panjang) dengan memory konstan:
+- Welford mean/variance (Hz)
+- Min/max
+- Pitch class histogram (12 bin) untuk key detection
+- Quantile sketch: histogram MIDI fixed-bin (default 10 cent) untuk median/percentile
+- Melody contour: sampel berjarak sama, di-decimate saat buffer penuh
+Dua accumulator bisa di-merge; VocalAnalyzer.analyze_stats() mengubah snapshot
+menjadi output yang sama dengan VocalAnalyzer.analyze().
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+import note_table
+
+
+class VocalStats:
+    MIDI_MAX = 128.0
+
+    def __init__(self, cents_per_bin: float = 10.0, contour_points: int = 20):
+        """
+        Initialize VocalStats
+
+        Args:
+            cents_per_bin: Resolution of the quantile sketch
+            contour_points: Melody contour size (buffer keeps up to 2x)
+        """
+        self.cents_per_bin = cents_per_bin
+        self.contour_points = contour_points
+
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min_hz = float('inf')
+        self.max_hz = float('-inf')
+
+        self.pitch_class_counts = np.zeros(12, dtype=np.int64)
+        self.bins_per_semitone = 100.0 / cents_per_bin
+        self.sketch = np.zeros(int(self.MIDI_MAX * self.bins_per_semitone), dtype=np.int64)
+
+        self._contour = np.zeros(0, dtype=np.float64)
+        self._contour_stride = 1
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"VocalStats(count={self.count}, mean_hz={self.mean:.1f})"
+
+    # ===== INPUT =====
+
+    def update(self, f0) -> 'VocalStats':
+        """
+        Add a chunk of pitch values (Hz)
+
+        NaN / non-positive values (unvoiced frames) are ignored, so a raw
+        PitchTrack.pitches chunk can be passed directly.
+        """
+        f0 = np.asarray(f0, dtype=np.float64).ravel()
+        f0 = f0[np.isfinite(f0) & (f0 > 0)]
+        n = len(f0)
+        if n == 0:
+            return self
+
+        # Moments (Chan et al. parallel update with the chunk's own mean/M2)
+        chunk_mean = float(np.mean(f0))
+        chunk_m2 = float(np.sum((f0 - chunk_mean) ** 2))
+        self._combine_moments(n, chunk_mean, chunk_m2)
+
+        self.min_hz = min(self.min_hz, float(np.min(f0)))
+        self.max_hz = max(self.max_hz, float(np.max(f0)))
+
+        midi = note_table.hz_to_midi(f0)
+        self.pitch_class_counts += np.bincount(note_table.pitch_class(midi), minlength=12)
+
+        bins = np.clip((midi * self.bins_per_semitone).astype(int), 0, len(self.sketch) - 1)
+        self.sketch += np.bincount(bins, minlength=len(self.sketch))
+
+        # Contour: keep every stride-th voiced frame (global voiced index)
+        positions = (self.count - n) + np.arange(n)
+        self._contour = np.concatenate([self._contour, f0[positions % self._contour_stride == 0]])
+        self._decimate_contour()
+
+        return self
+
+    def merge(self, other: 'VocalStats') -> 'VocalStats':
+        """
+        Merge another accumulator into this one (in place)
+
+        Moments, min/max, histogram and sketch merge exactly. The contour of
+        `other` is appended after this one (recordings in sequence).
+        """
+        if other.cents_per_bin != self.cents_per_bin:
+            raise ValueError("Cannot merge VocalStats with different cents_per_bin")
+        if other.count == 0:
+            return self
+
+        self._combine_moments(other.count, other.mean, other.m2)
+        self.min_hz = min(self.min_hz, other.min_hz)
+        self.max_hz = max(self.max_hz, other.max_hz)
+        self.pitch_class_counts += other.pitch_class_counts
+        self.sketch += other.sketch
+
+        self._contour = np.concatenate([self._contour, other._contour])
+        self._contour_stride = max(self._contour_stride, other._contour_stride)
+        self._decimate_contour()
+
+        return self
+
+    @classmethod
+    def merged(cls, accumulators: Iterable['VocalStats']) -> 'VocalStats':
+        """New accumulator combining several (e.g. one per recording)"""
+        accumulators = list(accumulators)
+        if not accumulators:
+            return cls()
+        result = cls(accumulators[0].cents_per_bin, accumulators[0].contour_points)
+        for acc in accumulators:
+            result.merge(acc)
+        return result
+
+    def _combine_moments(self, n_b: int, mean_b: float, m2_b: float):
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * n_a * n_b / n
+        self.count = n
+
+    def _decimate_contour(self):
+        while len(self._contour) > 2 * self.contour_points:
+            self._contour = self._contour[::2]
+            self._contour_stride *= 2
+
+    # ===== RESULTS =====
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (same as np.std)"""
+        return float(np.sqrt(self.m2 / self.count)) if self.count else 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile in Hz (error <= half a sketch bin)"""
+        if self.count == 0:
+            return None
+
+        cumulative = np.cumsum(self.sketch)
+        target = q * self.count
+        index = int(np.searchsorted(cumulative, target, side='left'))
+        index = min(index, len(self.sketch) - 1)
+
+        # Linear interpolation inside the bin
+        below = cumulative[index - 1] if index > 0 else 0
+        in_bin = self.sketch[index]
+        fraction = (target - below) / in_bin if in_bin else 0.5
+        midi = (index + min(max(fraction, 0.0), 1.0)) / self.bins_per_semitone
+
+        hz = note_table.midi_to_hz(midi)
+        return float(min(max(hz, self.min_hz), self.max_hz))
+
+    def contour(self) -> np.ndarray:
+        """Up to contour_points evenly spaced voiced pitches (Hz)"""
+        if len(self._contour) <= self.contour_points:
+            return self._contour.copy()
+        indices = np.linspace(0, len(self._contour) - 1, self.contour_points).astype(int)
+        return self._contour[indices]
+
+    def snapshot(self) -> Dict:
+        """Current statistics (plain Python types)"""
+        if self.count == 0:
+            return {'count': 0}
+
+        return {
+            'count': self.count,
+            'mean_hz': float(self.mean),
+            'std_hz': self.std,
+            'min_hz': float(self.min_hz),
+            'max_hz': float(self.max_hz),
+            'median_hz': self.quantile(0.5),
+            'percentiles_hz': {
+                'p5': self.quantile(0.05),
+                'p25': self.quantile(0.25),
+                'p75': self.quantile(0.75),
+                'p95': self.quantile(0.95)
+            },
+            'pitch_class_counts': self.pitch_class_counts.tolist(),
+            'contour_hz': self.contour().tolist()
+        }